@@ -15,7 +15,7 @@ Examples:
 """
 
 import sys
-import time
+import math
 import argparse
 from pathlib import Path
 
@@ -23,7 +23,10 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent / 'host-app'))
 
 try:
+    from tact_clock import SYSTEM_CLOCK, VirtualClock
     from tact_host_simulator import TactHostSimulator
+    from tact_ingest import AGGREGATIONS
+    from tact_transport import InMemoryTransport
 except ImportError:
     print("Error: Could not import TactHostSimulator. Make sure you're running from the correct directory.")
     sys.exit(1)
@@ -40,17 +43,17 @@ def demo_touch_test(controller):
         
         # First contact pulse
         controller.send_touch_event(motor_id, 0.5, first_contact=True)
-        time.sleep(0.5)
+        controller.clock.sleep(0.5)
         
         # Sustained contact with varying intensity
         for intensity in [0.2, 0.4, 0.6, 0.8]:
             print(f"  Intensity: {intensity:.1f}")
             controller.send_touch_event(motor_id, intensity, first_contact=False)
-            time.sleep(0.3)
+            controller.clock.sleep(0.3)
         
         # Release
         controller.send_touch_event(motor_id, 0.0, first_contact=False)
-        time.sleep(0.5)
+        controller.clock.sleep(0.5)
     
     print("Touch test complete!")
 
@@ -62,23 +65,24 @@ def demo_gesture_patterns(controller):
     
     # Stroke pattern
     print("\nStroke pattern (left to right)...")
-    controller.simulate_stroke(duration=2.0, intensity=0.6)
-    time.sleep(1)
+    controller.gesture_stroke(duration=2.0, intensity=0.6)
+    controller.clock.sleep(1)
     
     # Pat pattern
     print("Pat pattern (quick taps)...")
-    controller.simulate_pat(taps=3, intensity=0.8)
-    time.sleep(1)
+    for tap in range(3):
+        controller.gesture_pat(motor_id=1, intensity=0.8)
+    controller.clock.sleep(1)
     
     # Poke pattern
     print("Poke pattern (single strong contact)...")
-    controller.simulate_poke(motor_id=1, intensity=0.9)
-    time.sleep(1)
+    controller.gesture_poke(motor_id=1, intensity=0.9)
+    controller.clock.sleep(1)
     
     # Squeeze pattern
     print("Squeeze pattern (gradual pressure)...")
-    controller.simulate_squeeze(duration=3.0, max_intensity=0.7)
-    time.sleep(1)
+    controller.gesture_squeeze(duration=3.0, max_intensity=0.7)
+    controller.clock.sleep(1)
     
     print("Gesture patterns complete!")
 
@@ -88,28 +92,29 @@ def demo_spatial_patterns(controller):
     """
     print("\n=== Spatial Patterns Demo ===")
     
-    # Circular pattern
-    print("\nCircular activation pattern...")
-    motor_sequence = [0, 1, 3, 2, 0]  # Assuming motors arranged in square
+    # Circular pattern: one contact point moving around the motor layout
+    print("\nCircular contact around the motor layout...")
+    center_x, center_y = controller.spatial.layout.center()
+    radius = 25.0  # mm
     
-    for cycle in range(2):
-        for motor_id in motor_sequence:
-            controller.send_touch_event(motor_id, 0.6, first_contact=True)
-            time.sleep(0.2)
-            controller.send_touch_event(motor_id, 0.0, first_contact=False)
-            time.sleep(0.1)
+    for step in range(2 * 40):  # two turns at 20 Hz
+        angle = 2 * math.pi * step / 40
+        controller.send_contact(center_x + radius * math.cos(angle),
+                                center_y + radius * math.sin(angle), 0.6)
+        controller.clock.sleep(0.05)
+    controller.release_all()
     
     # Wave pattern
     print("Wave pattern (sequential activation)...")
     for wave in range(3):
         for motor_id in range(4):
             controller.send_touch_event(motor_id, 0.5, first_contact=True)
-            time.sleep(0.15)
+            controller.clock.sleep(0.15)
         
         # Fade out
         for motor_id in range(4):
             controller.send_touch_event(motor_id, 0.0, first_contact=False)
-        time.sleep(0.3)
+        controller.clock.sleep(0.3)
     
     # Simultaneous pattern
     print("Simultaneous activation (all motors)...")
@@ -117,13 +122,13 @@ def demo_spatial_patterns(controller):
     for motor_id in range(4):
         controller.send_touch_event(motor_id, 0.7, first_contact=True)
     
-    time.sleep(0.5)
+    controller.clock.sleep(0.5)
     
     # Vary intensity together
     for intensity in [0.3, 0.6, 0.9, 0.6, 0.3]:
         for motor_id in range(4):
             controller.send_touch_event(motor_id, intensity, first_contact=False)
-        time.sleep(0.3)
+        controller.clock.sleep(0.3)
     
     # Release all
     for motor_id in range(4):
@@ -157,11 +162,11 @@ def demo_interactive_mode(controller):
             elif command == 'test':
                 demo_touch_test(controller)
             elif command == 'stroke':
-                controller.simulate_stroke()
+                controller.gesture_stroke()
             elif command == 'pat':
-                controller.simulate_pat()
+                controller.gesture_pat()
             elif command == 'squeeze':
-                controller.simulate_squeeze()
+                controller.gesture_squeeze()
             elif command.startswith('t'):
                 parts = command.split()
                 if len(parts) == 2:
@@ -188,7 +193,7 @@ def demo_interactive_mode(controller):
                 parts = command.split()
                 if len(parts) == 2:
                     motor_id = int(parts[1])
-                    controller.simulate_poke(motor_id)
+                    controller.gesture_poke(motor_id)
                     print(f"Poke motor {motor_id}")
                 else:
                     print("Usage: poke <motor_id>")
@@ -213,15 +218,15 @@ def demo_timing_test(controller):
     print("Testing rapid sequential activation...")
     
     # Rapid sequential test
-    start_time = time.time()
+    start_time = controller.clock.monotonic()
     for i in range(20):
         motor_id = i % 4
         controller.send_touch_event(motor_id, 0.5, first_contact=True)
-        time.sleep(0.05)  # 50ms intervals
+        controller.clock.sleep(0.05)  # 50ms intervals
         controller.send_touch_event(motor_id, 0.0, first_contact=False)
-        time.sleep(0.05)
+        controller.clock.sleep(0.05)
     
-    elapsed = time.time() - start_time
+    elapsed = controller.clock.monotonic() - start_time
     print(f"Completed 20 activations in {elapsed:.2f} seconds")
     print(f"Average rate: {20/elapsed:.1f} activations/second")
     
@@ -232,13 +237,47 @@ def demo_timing_test(controller):
     
     # Hold for 5 seconds with intensity variations
     for i in range(50):
-        intensity = 0.3 + 0.4 * (0.5 + 0.5 * time.sin(i * 0.2))  # Sine wave 0.3-0.7
+        intensity = 0.3 + 0.4 * (0.5 + 0.5 * math.sin(i * 0.2))  # Sine wave 0.3-0.7
         controller.send_touch_event(motor_id, intensity, first_contact=False)
-        time.sleep(0.1)
+        controller.clock.sleep(0.1)
     
     controller.send_touch_event(motor_id, 0.0, first_contact=False)
+    
+    # Physics-rate contact: a 100 Hz collider sweep across the motors
+    print("\nTesting 100 Hz contact samples...")
+    for i in range(200):
+        position = i / 50.0  # one motor per 0.5 s
+        for motor_id in range(4):
+            # First contacts are derived from the depths
+            controller.submit_contact(motor_id, max(0.0, 0.8 - 0.8 * abs(position - motor_id)))
+        controller.clock.sleep(0.01)
+    for motor_id in range(4):
+        controller.submit_contact(motor_id, 0.0)
+    controller.clock.sleep(0.1)
+    if controller.ingestor is not None:
+        print(controller.ingestor.report())
     print("Timing test complete!")
 
+DEMOS = {
+    'touch_test': demo_touch_test,
+    'gestures': demo_gesture_patterns,
+    'spatial': demo_spatial_patterns,
+    'interactive': demo_interactive_mode,
+    'timing': demo_timing_test,
+}
+
+def run_demo(controller, name):
+    """
+    Run a demo by name on an already connected controller
+    """
+    if name == 'all':
+        for demo in (demo_touch_test, demo_gesture_patterns, demo_spatial_patterns):
+            demo(controller)
+            controller.clock.sleep(1)
+        demo_timing_test(controller)
+    else:
+        DEMOS[name](controller)
+
 def main():
     parser = argparse.ArgumentParser(description='Tact Haptic Feedback System - Basic Usage Examples')
     parser.add_argument('--port', '-p', default=None, help='Serial port (auto-detect if not specified)')
@@ -246,6 +285,14 @@ def main():
                        choices=['all', 'touch_test', 'gestures', 'spatial', 'interactive', 'timing'],
                        help='Demo to run')
     parser.add_argument('--baudrate', '-b', type=int, default=115200, help='Serial baudrate')
+    parser.add_argument('--no-reset', action='store_true',
+                       help='Open the port without asserting DTR so the board is not reset')
+    parser.add_argument('--virtual', action='store_true',
+                       help='Run against the firmware model on a virtual clock (no hardware)')
+    parser.add_argument('--record', metavar='FILE',
+                       help='Record every command sent to a session file')
+    parser.add_argument('--ingest', choices=AGGREGATIONS,
+                       help='Send contact samples once per device tick, aggregated with max, mean or last')
     
     args = parser.parse_args()
     
@@ -254,7 +301,13 @@ def main():
     
     # Initialize controller
     try:
-        controller = TactHostSimulator(port=args.port, baudrate=args.baudrate)
+        clock, transport = SYSTEM_CLOCK, None
+        if args.virtual:
+            clock = VirtualClock()
+            transport = InMemoryTransport(clock)
+        controller = TactHostSimulator(port=args.port, baud_rate=args.baudrate,
+                                       reset_on_open=not args.no_reset, clock=clock, transport=transport,
+                                       ingest=args.ingest)
         if not controller.connect():
             print("Failed to connect to Tact device. Please check:")
             print("1. Arduino is connected via USB")
@@ -263,26 +316,11 @@ def main():
             return 1
         
         print(f"Connected to Tact device on {controller.port}")
+        if args.record:
+            controller.start_recording(args.record)
         
         # Run selected demo
-        if args.demo == 'all':
-            demo_touch_test(controller)
-            time.sleep(1)
-            demo_gesture_patterns(controller)
-            time.sleep(1)
-            demo_spatial_patterns(controller)
-            time.sleep(1)
-            demo_timing_test(controller)
-        elif args.demo == 'touch_test':
-            demo_touch_test(controller)
-        elif args.demo == 'gestures':
-            demo_gesture_patterns(controller)
-        elif args.demo == 'spatial':
-            demo_spatial_patterns(controller)
-        elif args.demo == 'interactive':
-            demo_interactive_mode(controller)
-        elif args.demo == 'timing':
-            demo_timing_test(controller)
+        run_demo(controller, args.demo)
         
         print("\nDemo complete!")
         
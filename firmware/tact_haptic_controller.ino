@@ -26,6 +26,70 @@ bool in_first_contact_pulse[NUM_MOTORS] = {false, false, false, false};
 // Serial communication
 const int BAUD_RATE = 115200;
 String input_buffer = "";
+const int MAX_INPUT_LENGTH = 128;  // longest text line kept; the rest is dropped up to the newline
+bool input_overflow = false;
+
+// Binary protocol (opt-in via "MODE BIN")
+// Event: sync, actuator id (bits 0-3) | flags (bits 4-7), depth (0-100), checksum
+// Frame: sync, first contact mask, one depth byte per motor, checksum
+// Sequence prefix: sync, sequence low byte, sequence high byte, checksum
+const byte BINARY_SYNC = 0xA5;
+const int BINARY_EVENT_SIZE = 4;
+const byte FLAG_FIRST_CONTACT = 0x10;
+const byte BINARY_FRAME_SYNC = 0xA6;
+const int BINARY_FRAME_SIZE = 3 + NUM_MOTORS;
+const byte BINARY_SEQUENCE_SYNC = 0xA7;
+const int BINARY_SEQUENCE_SIZE = 4;
+// Schedule prefix: sync, device time in ms (4 bytes, little endian), checksum
+const byte BINARY_SCHEDULE_SYNC = 0xA8;
+const int BINARY_SCHEDULE_SIZE = 6;
+bool binary_mode = false;
+byte frame_buffer[BINARY_FRAME_SIZE];
+int frame_length = 0;
+int frame_size = 0;
+
+// Acknowledgements: sequence number to echo once the next command is applied
+long pending_ack = -1;
+
+// Scheduled commands: applied when millis() reaches due_time
+struct ScheduledCommand {
+  bool active;
+  unsigned long due_time;
+  int actuator_id;               // -1 for a multi-actuator frame
+  float depths[NUM_MOTORS];
+  int first_contact_mask;
+  long ack;
+};
+const int SCHEDULE_SLOTS = 16;
+ScheduledCommand schedule[SCHEDULE_SLOTS];
+bool has_pending_schedule = false;
+unsigned long pending_schedule_time = 0;
+const int LOOP_DELAY = 33;  // milliseconds
+
+// Pattern cache: keyframe tables uploaded once, then played back by id
+const int PATTERN_SLOTS = 8;
+const int MAX_KEYFRAMES = 48;
+struct Keyframe {
+  uint16_t time_ms;
+  byte depths[NUM_MOTORS];       // 0-100
+  byte first_contact_mask;
+};
+struct Pattern {
+  bool complete;
+  int keyframe_count;
+  int expected_count;
+  Keyframe keyframes[MAX_KEYFRAMES];
+};
+Pattern patterns[PATTERN_SLOTS];
+int uploading_pattern = -1;
+int playing_pattern = -1;
+unsigned long playback_start = 0;
+float playback_intensity = 1.0;
+float playback_time_scale = 1.0;
+int playback_next_keyframe = 0;
+
+// Power-on motor test, skipped if "SKIPTEST" arrives shortly after the ready banner
+const unsigned long MOTOR_TEST_SKIP_WINDOW = 250;  // milliseconds
 
 void setup() {
   // Initialize serial communication
@@ -33,6 +97,7 @@ void setup() {
   while (!Serial) {
     ; // Wait for serial port to connect
   }
+  input_buffer.reserve(MAX_INPUT_LENGTH);
   
   // Initialize motor pins
   for (int i = 0; i < NUM_MOTORS; i++) {
@@ -43,39 +108,153 @@ void setup() {
   Serial.println("Tact Haptic Controller Ready");
   Serial.println("Format: actuator_id,penetration_depth,first_contact");
   
-  // Run motor test sequence
-  runMotorTest();
+  // Run motor test sequence unless the host asks to skip it
+  if (motorTestSkipRequested()) {
+    Serial.println("Motor test skipped. Ready for operation.");
+  } else {
+    runMotorTest();
+  }
+}
+
+bool motorTestSkipRequested() {
+  String line = "";
+  unsigned long start = millis();
+  while (millis() - start < MOTOR_TEST_SKIP_WINDOW) {
+    while (Serial.available() > 0) {
+      char c = Serial.read();
+      if (c == '\n') {
+        line.trim();
+        if (line == "SKIPTEST") return true;
+        line = "";
+      } else {
+        line += c;
+      }
+    }
+  }
+  return false;
 }
 
 void loop() {
   // Handle serial input
   while (Serial.available()) {
-    char c = Serial.read();
-    if (c == '\n') {
-      processMessage(input_buffer);
+    byte c = Serial.read();
+    if (frame_length > 0) {
+      // Inside a binary frame
+      frame_buffer[frame_length++] = c;
+      if (frame_length == frame_size) {
+        processBinaryMessage(frame_buffer, frame_size);
+        frame_length = 0;
+      }
+    } else if (binary_mode && binaryMessageSize(c) > 0) {
+      // Sync bytes never occur in text commands, so unterminated text before
+      // one is line noise: drop it and resynchronise on the binary message
       input_buffer = "";
+      input_overflow = false;
+      frame_buffer[0] = c;
+      frame_length = 1;
+      frame_size = binaryMessageSize(c);
+    } else if (c == '\n') {
+      if (input_overflow) {
+        Serial.println("Error: Message too long");
+      } else {
+        processMessage(input_buffer);
+      }
+      input_buffer = "";
+      input_overflow = false;
+    } else if (input_buffer.length() < MAX_INPUT_LENGTH) {
+      input_buffer += (char)c;
     } else {
-      input_buffer += c;
+      input_overflow = true;
     }
   }
   
+  // Advance pattern playback
+  updatePlayback();
+  
   // Update motor states (handle first contact pulses)
   updateMotorStates();
   
-  // Small delay for ~30Hz update rate
-  delay(33);
+  // Small delay for ~30Hz update rate, applying scheduled commands on time
+  unsigned long wait_end = millis() + LOOP_DELAY;
+  while ((long)(millis() - wait_end) < 0) {
+    applyDueCommands();
+  }
+}
+
+int binaryMessageSize(byte sync) {
+  if (sync == BINARY_SYNC) return BINARY_EVENT_SIZE;
+  if (sync == BINARY_FRAME_SYNC) return BINARY_FRAME_SIZE;
+  if (sync == BINARY_SEQUENCE_SYNC) return BINARY_SEQUENCE_SIZE;
+  if (sync == BINARY_SCHEDULE_SYNC) return BINARY_SCHEDULE_SIZE;
+  return 0;
 }
 
 void processMessage(String message) {
   message.trim();
   if (message.length() == 0) return;
   
+  // Protocol mode negotiation
+  if (message == "MODE BIN") {
+    binary_mode = true;
+    Serial.println("Mode: BIN");
+    return;
+  } else if (message == "MODE CSV") {
+    binary_mode = false;
+    Serial.println("Mode: CSV");
+    return;
+  }
+  
+  // A skip request that missed the start-up window has nothing left to skip
+  if (message == "SKIPTEST") return;
+  
+  // Clock sync: reply with the token and the current device time
+  if (message.startsWith("SYNC ")) {
+    unsigned long now = millis();
+    Serial.print("Sync: ");
+    Serial.print(message.substring(5));
+    Serial.print(" ");
+    Serial.println(now);
+    return;
+  }
+  
+  // Pattern cache commands
+  if (message.startsWith("PAT ") || message.startsWith("K ") ||
+      message.startsWith("PLAY ") || message == "PSTOP") {
+    processPatternCommand(message);
+    return;
+  }
+  
+  // Optional schedule: "AT <device_ms> <message>"
+  if (message.startsWith("AT ")) {
+    int space = message.indexOf(' ', 3);
+    if (space == -1) {
+      Serial.println("Error: Invalid message format");
+      return;
+    }
+    pending_schedule_time = strtoul(message.substring(3, space).c_str(), NULL, 10);
+    has_pending_schedule = true;
+    message = message.substring(space + 1);
+  }
+  
+  // Optional sequence number to acknowledge: "<message>@<seq>"
+  int at = message.indexOf('@');
+  if (at != -1) {
+    pending_ack = message.substring(at + 1).toInt();
+    message = message.substring(0, at);
+  }
+  
+  if (message.startsWith("F,")) {
+    processFrameMessage(message);
+    return;
+  }
+  
   // Parse CSV: actuator_id,penetration_depth,first_contact
   int first_comma = message.indexOf(',');
   int second_comma = message.indexOf(',', first_comma + 1);
   
   if (first_comma == -1 || second_comma == -1) {
     Serial.println("Error: Invalid message format");
+    acknowledge(false);
     return;
   }
   
@@ -83,20 +262,316 @@ void processMessage(String message) {
   float penetration_depth = message.substring(first_comma + 1, second_comma).toFloat();
   int first_contact = message.substring(second_comma + 1).toInt();
   
+  dispatchEvent(actuator_id, penetration_depth, first_contact == 1);
+}
+
+void processPatternCommand(String message) {
+  if (message.startsWith("PAT ")) {
+    // Begin upload: PAT <id> <keyframe_count>
+    int space = message.indexOf(' ', 4);
+    int id = message.substring(4, space).toInt();
+    int count = (space == -1) ? 0 : message.substring(space + 1).toInt();
+    if (space == -1 || id < 0 || id >= PATTERN_SLOTS || count < 1 || count > MAX_KEYFRAMES) {
+      uploading_pattern = -1;
+      Serial.println("Error: Pattern upload failed");
+      return;
+    }
+    if (playing_pattern == id) {
+      playing_pattern = -1;
+    }
+    patterns[id].complete = false;
+    patterns[id].keyframe_count = 0;
+    patterns[id].expected_count = count;
+    uploading_pattern = id;
+    Serial.print("Pattern: ");
+    Serial.print(id);
+    Serial.println(" begin");
+  } else if (message.startsWith("K ")) {
+    // Keyframes: K <time_ms>,<d0>,...,<dN-1>,<mask>[;<next keyframe>...]
+    if (uploading_pattern < 0) {
+      Serial.println("Error: Pattern upload failed");
+      return;
+    }
+    Pattern* pattern = &patterns[uploading_pattern];
+    int start = 2;
+    while (start < (int)message.length()) {
+      int end = message.indexOf(';', start);
+      if (end == -1) end = message.length();
+      if (!parseKeyframe(message.substring(start, end), pattern)) {
+        uploading_pattern = -1;
+        Serial.println("Error: Pattern upload failed");
+        return;
+      }
+      start = end + 1;
+    }
+    Serial.print("Pattern: ");
+    Serial.print(uploading_pattern);
+    if (pattern->keyframe_count == pattern->expected_count) {
+      pattern->complete = true;
+      uploading_pattern = -1;
+      Serial.println(" stored");
+    } else {
+      Serial.print(" ");
+      Serial.print(pattern->keyframe_count);
+      Serial.print("/");
+      Serial.println(pattern->expected_count);
+    }
+  } else if (message.startsWith("PLAY ")) {
+    // Trigger playback: PLAY <id> [intensity] [time_scale]
+    int first_space = message.indexOf(' ', 5);
+    int second_space = (first_space == -1) ? -1 : message.indexOf(' ', first_space + 1);
+    int id = message.substring(5, first_space == -1 ? message.length() : first_space).toInt();
+    if (id < 0 || id >= PATTERN_SLOTS || !patterns[id].complete) {
+      Serial.println("Error: Unknown pattern");
+      return;
+    }
+    playback_intensity = 1.0;
+    playback_time_scale = 1.0;
+    if (first_space != -1) {
+      playback_intensity = message.substring(first_space + 1, second_space == -1 ? message.length() : second_space).toFloat();
+    }
+    if (second_space != -1) {
+      playback_time_scale = message.substring(second_space + 1).toFloat();
+    }
+    if (playback_time_scale <= 0.0) {
+      playback_time_scale = 1.0;
+    }
+    playing_pattern = id;
+    playback_start = millis();
+    playback_next_keyframe = 0;
+    updatePlayback();
+  } else {
+    // PSTOP: stop playback and release every motor
+    playing_pattern = -1;
+    float depths[NUM_MOTORS] = {0.0};
+    applyFrame(depths, 0);
+  }
+}
+
+bool parseKeyframe(String text, Pattern* pattern) {
+  if (pattern->keyframe_count >= pattern->expected_count) return false;
+  
+  int values[NUM_MOTORS + 2];
+  int start = 0;
+  for (int i = 0; i < NUM_MOTORS + 2; i++) {
+    int comma = text.indexOf(',', start);
+    if ((comma == -1) != (i == NUM_MOTORS + 1)) return false;
+    values[i] = text.substring(start, comma == -1 ? text.length() : comma).toInt();
+    start = comma + 1;
+  }
+  
+  Keyframe* keyframe = &pattern->keyframes[pattern->keyframe_count++];
+  keyframe->time_ms = values[0];
+  for (int m = 0; m < NUM_MOTORS; m++) {
+    keyframe->depths[m] = constrain(values[1 + m], 0, 100);
+  }
+  keyframe->first_contact_mask = values[NUM_MOTORS + 1];
+  return true;
+}
+
+void updatePlayback() {
+  if (playing_pattern < 0) return;
+  
+  Pattern* pattern = &patterns[playing_pattern];
+  float t = (millis() - playback_start) / playback_time_scale;
+  
+  // Collect first contact flags of every keyframe reached since the last update
+  int first_contact_mask = 0;
+  while (playback_next_keyframe < pattern->keyframe_count &&
+         pattern->keyframes[playback_next_keyframe].time_ms <= t) {
+    first_contact_mask |= pattern->keyframes[playback_next_keyframe].first_contact_mask;
+    playback_next_keyframe++;
+  }
+  if (playback_next_keyframe == 0) return;
+  
+  float depths[NUM_MOTORS];
+  Keyframe* previous = &pattern->keyframes[playback_next_keyframe - 1];
+  if (playback_next_keyframe >= pattern->keyframe_count) {
+    // Past the last keyframe: apply it and finish
+    for (int m = 0; m < NUM_MOTORS; m++) {
+      depths[m] = previous->depths[m] / 100.0 * playback_intensity;
+    }
+    playing_pattern = -1;
+  } else {
+    // Linear interpolation towards the next keyframe
+    Keyframe* next = &pattern->keyframes[playback_next_keyframe];
+    float span = next->time_ms - previous->time_ms;
+    float fraction = (span > 0) ? (t - previous->time_ms) / span : 0.0;
+    for (int m = 0; m < NUM_MOTORS; m++) {
+      float depth = previous->depths[m] + (next->depths[m] - previous->depths[m]) * fraction;
+      depths[m] = depth / 100.0 * playback_intensity;
+    }
+  }
+  
+  applyFrame(depths, first_contact_mask);
+}
+
+void acknowledge(bool applied) {
+  // Echo the pending sequence number only if the command took effect
+  if (pending_ack >= 0 && applied) {
+    Serial.print("Ack: ");
+    Serial.println(pending_ack);
+  }
+  pending_ack = -1;
+  has_pending_schedule = false;
+}
+
+void dispatchEvent(int actuator_id, float penetration_depth, bool first_contact) {
+  if (has_pending_schedule) {
+    float depths[NUM_MOTORS] = {penetration_depth};
+    scheduleCommand(actuator_id, depths, first_contact ? 1 : 0);
+    return;
+  }
+  acknowledge(applyTouchEvent(actuator_id, penetration_depth, first_contact));
+}
+
+void dispatchFrame(float* depths, int first_contact_mask) {
+  if (has_pending_schedule) {
+    scheduleCommand(-1, depths, first_contact_mask);
+    return;
+  }
+  acknowledge(applyFrame(depths, first_contact_mask));
+}
+
+void scheduleCommand(int actuator_id, float* depths, int first_contact_mask) {
+  for (int i = 0; i < SCHEDULE_SLOTS; i++) {
+    if (!schedule[i].active) {
+      schedule[i].active = true;
+      schedule[i].due_time = pending_schedule_time;
+      schedule[i].actuator_id = actuator_id;
+      for (int m = 0; m < NUM_MOTORS; m++) {
+        schedule[i].depths[m] = depths[m];
+      }
+      schedule[i].first_contact_mask = first_contact_mask;
+      schedule[i].ack = pending_ack;
+      pending_ack = -1;
+      has_pending_schedule = false;
+      return;
+    }
+  }
+  Serial.println("Error: Schedule full");
+  acknowledge(false);
+}
+
+void applyDueCommands() {
+  // Apply every due command, earliest first
+  while (true) {
+    unsigned long now = millis();
+    int next = -1;
+    for (int i = 0; i < SCHEDULE_SLOTS; i++) {
+      if (schedule[i].active && (long)(now - schedule[i].due_time) >= 0) {
+        if (next == -1 || (long)(schedule[i].due_time - schedule[next].due_time) < 0) {
+          next = i;
+        }
+      }
+    }
+    if (next == -1) return;
+    
+    ScheduledCommand* command = &schedule[next];
+    command->active = false;
+    bool applied;
+    if (command->actuator_id < 0) {
+      applied = applyFrame(command->depths, command->first_contact_mask);
+    } else {
+      applied = applyTouchEvent(command->actuator_id, command->depths[0], command->first_contact_mask & 1);
+    }
+    pending_ack = command->ack;
+    acknowledge(applied);
+  }
+}
+
+void processFrameMessage(String message) {
+  // Parse CSV frame: F,depth_0,...,depth_N-1,first_contact_mask
+  float depths[NUM_MOTORS];
+  int start = message.indexOf(',') + 1;
+  
+  for (int i = 0; i < NUM_MOTORS; i++) {
+    int comma = message.indexOf(',', start);
+    if (comma == -1) {
+      Serial.println("Error: Invalid message format");
+      acknowledge(false);
+      return;
+    }
+    depths[i] = message.substring(start, comma).toFloat();
+    start = comma + 1;
+  }
+  
+  if (message.indexOf(',', start) != -1) {
+    Serial.println("Error: Invalid message format");
+    acknowledge(false);
+    return;
+  }
+  
+  dispatchFrame(depths, message.substring(start).toInt());
+}
+
+void processBinaryMessage(byte* frame, int length) {
+  // Bytes after the sync byte must sum to zero
+  byte sum = 0;
+  for (int i = 1; i < length; i++) {
+    sum += frame[i];
+  }
+  if (sum != 0) {
+    Serial.println("Error: Invalid checksum");
+    acknowledge(false);
+    return;
+  }
+  
+  if (frame[0] == BINARY_SEQUENCE_SYNC) {
+    // Acknowledge the message that follows
+    pending_ack = frame[1] | ((long)frame[2] << 8);
+    return;
+  }
+  
+  if (frame[0] == BINARY_SCHEDULE_SYNC) {
+    // Apply the message that follows at the given device time
+    pending_schedule_time = (unsigned long)frame[1] | ((unsigned long)frame[2] << 8) |
+                            ((unsigned long)frame[3] << 16) | ((unsigned long)frame[4] << 24);
+    has_pending_schedule = true;
+    return;
+  }
+  
+  if (frame[0] == BINARY_FRAME_SYNC) {
+    float depths[NUM_MOTORS];
+    for (int i = 0; i < NUM_MOTORS; i++) {
+      depths[i] = frame[2 + i] / 100.0;
+    }
+    dispatchFrame(depths, frame[1]);
+    return;
+  }
+  
+  int actuator_id = frame[1] & 0x0F;
+  float penetration_depth = frame[2] / 100.0;
+  bool first_contact = (frame[1] & FLAG_FIRST_CONTACT) != 0;
+  
+  dispatchEvent(actuator_id, penetration_depth, first_contact);
+}
+
+bool applyFrame(float* depths, int first_contact_mask) {
+  // All motors are updated before the next updateMotorStates() pass
+  bool applied = true;
+  for (int i = 0; i < NUM_MOTORS; i++) {
+    applied = applyTouchEvent(i, depths[i], (first_contact_mask & (1 << i)) != 0) && applied;
+  }
+  return applied;
+}
+
+bool applyTouchEvent(int actuator_id, float penetration_depth, bool first_contact) {
   // Validate actuator ID
   if (actuator_id < 0 || actuator_id >= NUM_MOTORS) {
     Serial.println("Error: Invalid actuator ID");
-    return;
+    return false;
   }
   
   // Apply penetration threshold
   if (penetration_depth < PENETRATION_THRESHOLD) {
     penetration_depth = 0.0;
-    first_contact = 0;
+    first_contact = false;
   }
   
   // Update contact state and control motor
-  updateActuator(actuator_id, penetration_depth, first_contact == 1);
+  updateActuator(actuator_id, penetration_depth, first_contact);
+  return true;
 }
 
 void updateActuator(int actuator_id, float penetration_depth, bool is_first_contact) {
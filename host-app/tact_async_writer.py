@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tact Asynchronous Writer
+Background thread that drains per-actuator update slots onto the serial link.
+
+Producers never block on USB: each actuator has a single pending slot, and a
+newer value for the same actuator overwrites the older one before it is sent.
+The writer thread takes every pending slot at once and hands them to a write
+callback, which issues a single serial write for the batch.
+"""
+
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+# actuator_id -> (penetration_depth, first_contact)
+PendingUpdates = Dict[int, Tuple[float, bool]]
+
+
+class LatestValueWriter:
+    def __init__(self, write_batch: Callable[[PendingUpdates], bool], name: str = "tact-writer"):
+        self.write_batch = write_batch
+        self.name = name
+        self.pending: PendingUpdates = {}
+        self.condition = threading.Condition()
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+        self.busy = False
+
+        # Statistics
+        self.submitted = 0
+        self.overwritten = 0
+        self.batches_written = 0
+        self.write_failures = 0
+
+    def start(self):
+        """Start the writer thread."""
+        if self.thread is not None:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self.thread.start()
+
+    def stop(self, flush: bool = True, timeout: float = 1.0):
+        """Stop the writer thread, optionally sending what is still pending."""
+        if self.thread is None:
+            return
+        if flush:
+            self.flush(timeout)
+        with self.condition:
+            if not flush:
+                self.pending.clear()
+            self.running = False
+            self.condition.notify_all()
+        self.thread.join(timeout)
+        self.thread = None
+
+    def submit(self, actuator_id: int, penetration_depth: float, first_contact: bool):
+        """Queue a value for an actuator, replacing any value not yet sent.
+
+        A first contact flag stays set until it has been sent, so overwriting
+        the depth never loses the contact edge.
+        """
+        with self.condition:
+            previous = self.pending.get(actuator_id)
+            if previous is not None:
+                self.overwritten += 1
+                first_contact = first_contact or previous[1]
+            self.pending[actuator_id] = (penetration_depth, first_contact)
+            self.submitted += 1
+            self.condition.notify()
+
+    def flush(self, timeout: float = 1.0) -> bool:
+        """Wait until every pending value has been written."""
+        with self.condition:
+            return self.condition.wait_for(lambda: not self.pending and not self.busy, timeout)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending or not self.running)
+                if not self.pending:
+                    return
+                batch = self.pending
+                self.pending = {}
+                self.busy = True
+
+            try:
+                if self.write_batch(batch):
+                    self.batches_written += 1
+                else:
+                    self.write_failures += 1
+            finally:
+                with self.condition:
+                    self.busy = False
+                    self.condition.notify_all()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tact Clock
+Injectable time source for the host tools.
+
+SystemClock is a thin wrapper around the time module. VirtualClock only moves
+when something sleeps or waits on it, and runs timers registered with call_at
+in due-time order as it advances, so a gesture suite paired with an in-memory
+transport (see tact_transport.py) runs in milliseconds with identical
+timestamps on every run. A virtual clock is single-threaded by design: do not
+combine it with async_writes.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Optional
+
+# OS sleeps can overshoot by a millisecond or two; the rest of a wait is spun
+SPIN_THRESHOLD_NS = 2000000
+
+
+class SystemClock:
+    """Real time: time.monotonic() and time.sleep()."""
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def monotonic_ns(self) -> int:
+        return time.monotonic_ns()
+
+    def time(self) -> float:
+        return time.time()
+
+    def sleep(self, seconds: float):
+        time.sleep(max(0.0, seconds))
+
+    def sleep_until(self, deadline_ns: int, spin_ns: int = SPIN_THRESHOLD_NS):
+        """Sleep until shortly before a monotonic_ns() deadline, then spin to hit it."""
+        remaining_ns = deadline_ns - time.monotonic_ns()
+        if remaining_ns > spin_ns:
+            time.sleep((remaining_ns - spin_ns) / 1e9)
+        # monotonic() can be coarse (e.g. ~16 ms on Windows); spin on perf_counter()
+        spin_end_ns = time.perf_counter_ns() + (deadline_ns - time.monotonic_ns())
+        while time.perf_counter_ns() < spin_end_ns:
+            pass
+
+    def wait(self, event: threading.Event, timeout: float) -> bool:
+        """Block until the event is set or the timeout passes."""
+        return event.wait(timeout)
+
+
+class VirtualClock:
+    """Simulated time that advances only through sleep(), wait() and advance()."""
+
+    def __init__(self, start: float = 0.0, epoch: float = 0.0):
+        self.now_ns = int(round(start * 1e9))
+        self.epoch = epoch  # wall-clock time() at virtual time zero
+        self.timers = []
+        self.timer_ids = itertools.count()
+
+    def monotonic(self) -> float:
+        return self.now_ns / 1e9
+
+    def monotonic_ns(self) -> int:
+        return self.now_ns
+
+    def time(self) -> float:
+        return self.epoch + self.now_ns / 1e9
+
+    def call_at(self, when_ns: int, callback: Callable[[], None]):
+        """Run callback once the clock reaches when_ns."""
+        heapq.heappush(self.timers, (when_ns, next(self.timer_ids), callback))
+
+    def advance_until(self, deadline_ns: int, condition: Optional[Callable[[], bool]] = None) -> bool:
+        """Run timers up to deadline_ns, stopping early once condition() is true."""
+        while True:
+            if condition is not None and condition():
+                return True
+            if not self.timers or self.timers[0][0] > deadline_ns:
+                break
+            when_ns, _, callback = heapq.heappop(self.timers)
+            self.now_ns = max(self.now_ns, when_ns)
+            callback()
+        self.now_ns = max(self.now_ns, deadline_ns)
+        return condition is not None and condition()
+
+    def advance(self, seconds: float):
+        self.advance_until(self.now_ns + int(round(seconds * 1e9)))
+
+    def sleep(self, seconds: float):
+        self.advance(max(0.0, seconds))
+
+    def sleep_until(self, deadline_ns: int, spin_ns: int = SPIN_THRESHOLD_NS):
+        self.advance_until(deadline_ns)
+
+    def wait(self, event: threading.Event, timeout: float) -> bool:
+        return self.advance_until(self.now_ns + int(round(timeout * 1e9)), event.is_set)
+
+
+SYSTEM_CLOCK = SystemClock()
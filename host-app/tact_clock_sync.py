@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Tact Clock Sync
+Estimates the device's millis() clock from the host monotonic clock.
+
+Each exchange records when the host sent "SYNC <token>", when the reply
+arrived, and the device time in the reply. As in NTP, the device time is
+assumed to correspond to the midpoint of the round trip, so a sample's error
+is bounded by half its round-trip time. The firmware only reads serial once per
+loop, which makes round trips noisy. For that reason only the fastest exchange
+of each round is kept (min-RTT filtering). The offset and drift are then fitted
+across the kept samples.
+"""
+
+import collections
+from typing import List, NamedTuple, Optional
+
+from tact_protocol import DEVICE_TIME_MODULO
+
+# Drift is only fitted once kept samples span at least this long
+MIN_DRIFT_SPAN_NS = 5 * 10**9
+
+
+class SyncSample(NamedTuple):
+    host_send_ns: int
+    host_receive_ns: int
+    device_ms: int
+
+    @property
+    def round_trip_ns(self) -> int:
+        return self.host_receive_ns - self.host_send_ns
+
+    @property
+    def midpoint_ns(self) -> int:
+        return (self.host_send_ns + self.host_receive_ns) // 2
+
+
+class ClockSync:
+    def __init__(self, max_samples: int = 32):
+        self.samples = collections.deque(maxlen=max_samples)
+        self.reference_ns: Optional[int] = None
+        self.offset_ms: Optional[float] = None  # device ms - host ms at reference_ns
+        self.drift = 0.0  # extra device ms per host ms
+        self.last_device_ms: Optional[int] = None
+        self.device_wraps = 0
+
+    @property
+    def synchronized(self) -> bool:
+        return self.offset_ms is not None
+
+    def error_bound_ms(self) -> Optional[float]:
+        """Half the round trip of the best kept sample."""
+        if not self.samples:
+            return None
+        return min(sample.round_trip_ns for sample in self.samples) / 2e6
+
+    def add_round(self, samples: List[SyncSample]) -> Optional[SyncSample]:
+        """Keep the fastest exchange of a round and refit the clock model."""
+        if not samples:
+            return None
+        best = min(samples, key=lambda sample: sample.round_trip_ns)
+        self.samples.append(best._replace(device_ms=self._unwrap(best.device_ms)))
+        self._fit()
+        return best
+
+    def _unwrap(self, device_ms: int) -> int:
+        # millis() wraps every ~49.7 days
+        if self.last_device_ms is not None and device_ms < self.last_device_ms - DEVICE_TIME_MODULO // 2:
+            self.device_wraps += 1
+        self.last_device_ms = device_ms
+        return device_ms + self.device_wraps * DEVICE_TIME_MODULO
+
+    def _fit(self):
+        # millis() truncates, so the device time is on average half a tick later
+        points = [(sample.midpoint_ns / 1e6, sample.device_ms + 0.5 - sample.midpoint_ns / 1e6)
+                  for sample in self.samples]
+        latest_ns = self.samples[-1].midpoint_ns
+        span_ns = latest_ns - self.samples[0].midpoint_ns
+
+        if len(points) >= 2 and span_ns >= MIN_DRIFT_SPAN_NS:
+            # Least-squares line through (host ms, offset ms)
+            mean_x = sum(x for x, _ in points) / len(points)
+            mean_y = sum(y for _, y in points) / len(points)
+            variance = sum((x - mean_x) ** 2 for x, _ in points)
+            covariance = sum((x - mean_x) * (y - mean_y) for x, y in points)
+            self.drift = covariance / variance
+            self.offset_ms = mean_y + self.drift * (latest_ns / 1e6 - mean_x)
+        else:
+            # Too little history for drift: trust the most accurate sample
+            best = min(self.samples, key=lambda sample: sample.round_trip_ns)
+            self.drift = 0.0
+            self.offset_ms = best.device_ms + 0.5 - best.midpoint_ns / 1e6
+            latest_ns = best.midpoint_ns
+        self.reference_ns = latest_ns
+
+    def host_to_device(self, host_ns: int) -> int:
+        """Device millis() value expected at the given host monotonic time."""
+        if not self.synchronized:
+            raise RuntimeError("Clock is not synchronized; call sync_clock() first")
+        elapsed_ms = (host_ns - self.reference_ns) / 1e6
+        device_ms = self.reference_ns / 1e6 + elapsed_ms * (1 + self.drift) + self.offset_ms
+        return int(round(device_ms)) % DEVICE_TIME_MODULO
+
+    def device_to_host(self, device_ms: int) -> int:
+        """Host monotonic time in nanoseconds when the device shows device_ms."""
+        if not self.synchronized:
+            raise RuntimeError("Clock is not synchronized; call sync_clock() first")
+        reference_device_ms = (self.reference_ns / 1e6 + self.offset_ms)
+        delta_ms = (device_ms - reference_device_ms) % DEVICE_TIME_MODULO
+        if delta_ms >= DEVICE_TIME_MODULO / 2:
+            delta_ms -= DEVICE_TIME_MODULO
+        return self.reference_ns + int(delta_ms / (1 + self.drift) * 1e6)
+
+    def describe(self) -> str:
+        if not self.synchronized:
+            return "Clock not synchronized"
+        return (f"offset {self.offset_ms:.1f} ms, drift {self.drift * 1e6:.0f} ppm, "
+                f"error <= {self.error_bound_ms():.1f} ms ({len(self.samples)} samples)")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tact Contact Tracker
+Derives first-contact flags from depth transitions on the host.
+
+Each actuator is in or out of contact with hysteresis: it enters contact when
+the depth reaches the on threshold and leaves only when it drops below the
+lower off threshold, so a depth hovering around one value cannot produce a
+string of first-contact pulses. Entering contact is a first-contact edge.
+Depths are compared after quantizing to the wire's hundredths, as the firmware
+sees them.
+
+The tracker also mirrors the firmware's previous_contact state (depth at or
+above PENETRATION_THRESHOLD in the last command it applied). The firmware only
+starts a pulse when a flagged command lands on a motor that was out of contact,
+so any other flag, derived or passed in by the caller, is dropped before it
+reaches the wire. Until the first command after connecting, or while an
+on-device pattern may have moved the motors, the mirror is unknown and flags
+are sent as given.
+"""
+
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from tact_firmware_reference import PENETRATION_THRESHOLD
+from tact_protocol import DEPTH_STEPS, NUM_MOTORS, dequantize_depth, quantize_depth
+
+CONTACT_ON = PENETRATION_THRESHOLD   # an edge at this depth is never zeroed by the firmware
+CONTACT_OFF = 0.05
+
+
+class ContactTracker:
+    def __init__(self, num_motors: int = NUM_MOTORS, on_threshold: float = CONTACT_ON,
+                 off_threshold: float = CONTACT_OFF):
+        if off_threshold > on_threshold:
+            raise ValueError(f"Contact off threshold {off_threshold} is above on threshold {on_threshold}")
+        self.num_motors = num_motors
+        self.on_threshold = on_threshold
+        self.off_threshold = off_threshold
+        self.in_contact = [False] * num_motors
+        self.device_contact: List[Optional[bool]] = [None] * num_motors  # None: unknown
+
+        # Statistics
+        self.edges = 0
+        self.suppressed = 0
+
+    def update(self, actuator_id: int, penetration_depth: float, first_contact: Optional[bool] = None) -> bool:
+        """Track a depth about to be sent; returns the first-contact flag to send with it.
+
+        first_contact=None uses the derived edge, an explicit flag overrides it.
+        """
+        penetration_depth = dequantize_depth(quantize_depth(penetration_depth))
+        edge = False
+        if self.in_contact[actuator_id]:
+            self.in_contact[actuator_id] = penetration_depth >= self.off_threshold
+        elif penetration_depth >= self.on_threshold:
+            self.in_contact[actuator_id] = True
+            edge = True
+
+        flag = edge if first_contact is None else first_contact
+        lands = penetration_depth >= PENETRATION_THRESHOLD
+        if flag and (not lands or self.device_contact[actuator_id]):
+            # The firmware would ignore it
+            flag = False
+            self.suppressed += 1
+        elif flag:
+            self.edges += 1
+        self.device_contact[actuator_id] = lands
+        return flag
+
+    def update_frame(self, depths: Sequence[float], first_contact_mask: Optional[int] = None) -> int:
+        """update() for every motor of a frame; returns the mask to send."""
+        mask = 0
+        for motor_id, depth in enumerate(depths):
+            first_contact = None if first_contact_mask is None else bool(first_contact_mask & (1 << motor_id))
+            if self.update(motor_id, depth, first_contact):
+                mask |= 1 << motor_id
+        return mask
+
+    def update_frames(self, depths: np.ndarray, first_contact: Optional[np.ndarray] = None) -> np.ndarray:
+        """update_frame() for a (ticks x motors) block in one vectorized pass; returns the masks.
+
+        Rows are assumed to be sent in order; the state carries over to the
+        next block.
+        """
+        depths = np.rint(np.clip(depths, 0.0, 1.0) * DEPTH_STEPS) / DEPTH_STEPS
+        rows = np.arange(len(depths))[:, np.newaxis]
+        last_on = np.maximum.accumulate(np.where(depths >= self.on_threshold, rows, -1), axis=0)
+        last_off = np.maximum.accumulate(np.where(depths < self.off_threshold, rows, -1), axis=0)
+        # Between thresholds a motor keeps the state of its last crossing (or the carried state)
+        in_contact = np.where((last_on < 0) & (last_off < 0), np.array(self.in_contact), last_on > last_off)
+        was_in_contact = np.vstack([np.array(self.in_contact)[np.newaxis], in_contact[:-1]])
+
+        if first_contact is None:
+            flags = in_contact & ~was_in_contact
+        else:
+            flags = ((np.asarray(first_contact, dtype=np.uint8)[:, np.newaxis] >> np.arange(self.num_motors)) & 1) > 0
+        lands = depths >= PENETRATION_THRESHOLD
+        device_contact = np.array([bool(state) for state in self.device_contact])
+        landed = np.vstack([device_contact[np.newaxis], lands[:-1]])
+        sent = flags & lands & ~landed
+
+        self.edges += int(sent.sum())
+        self.suppressed += int((flags & ~sent).sum())
+        if len(depths):
+            self.in_contact = in_contact[-1].tolist()
+            self.device_contact = lands[-1].tolist()
+        return (sent << np.arange(self.num_motors)).sum(axis=1).astype(np.uint8)
+
+    def forget(self):
+        """Mark the device state unknown (after connecting or on-device playback)."""
+        self.device_contact = [None] * self.num_motors
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Tact Firmware Emulator
+Runs the firmware model behind a Linux pseudo-terminal.
+
+TactEmulator drives TactFirmwareReference with the firmware's own setup() and
+loop() structure: the start-up banner, the SKIPTEST window and the power-on
+motor test (once the host first writes, as the board waits for the port to
+open), then serial reads once per loop followed by the 33 ms delay during
+which scheduled commands are applied. The host side opens the pty like any
+serial port, so TactHostSimulator, TactValidator and basic_usage.py connect to
+it unchanged. Every PWM change is recorded with a timestamp for latency and
+throughput measurements without hardware.
+"""
+
+import collections
+import csv
+import os
+import pty
+import select
+import threading
+import time
+import tty
+from typing import List, NamedTuple, Optional
+
+from tact_firmware_reference import TactFirmwareReference, _signed32
+from tact_protocol import MOTOR_PINS, NUM_MOTORS
+from tact_reader import READY_BANNER
+
+LOOP_DELAY = 33  # milliseconds
+MOTOR_TEST_SKIP_WINDOW = 250  # milliseconds
+MOTOR_TEST_PWM = 128
+DEFAULT_PWM_TRACE_SIZE = 100000
+
+
+class PwmSample(NamedTuple):
+    timestamp_ns: int
+    actuator_id: int
+    value: int
+
+
+class TactEmulator(TactFirmwareReference):
+    def __init__(self, run_motor_test: bool = True, pwm_trace_size: int = DEFAULT_PWM_TRACE_SIZE,
+                 clock=time.monotonic, sleep=time.sleep):
+        super().__init__(clock)
+        self.sleep = sleep
+        self.run_motor_test = run_motor_test
+        self.pwm_trace = collections.deque(maxlen=pwm_trace_size)
+        self.master_fd, self.slave_fd = pty.openpty()
+        tty.setraw(self.slave_fd)
+        self.port = os.ttyname(self.slave_fd)
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+
+        # Statistics
+        self.loops = 0
+        self.bytes_received = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def println(self, line: str):
+        """Serial.println: lines go straight to the host, terminated with CRLF."""
+        os.write(self.master_fd, (line + "\r\n").encode())
+
+    def analog_write(self, actuator_id: int, value: int):
+        if value != self.pwm[actuator_id]:
+            self.pwm_trace.append(PwmSample(int(self.clock() * 1e9), actuator_id, value))
+        self.pwm[actuator_id] = value
+
+    def serial_read_available(self) -> bytes:
+        """Everything the host has written so far, without blocking."""
+        data = b""
+        while select.select([self.master_fd], [], [], 0)[0]:
+            chunk = os.read(self.master_fd, 4096)
+            if not chunk:
+                break
+            data += chunk
+        self.bytes_received += len(data)
+        return data
+
+    def delay(self, ms: int):
+        self.sleep(ms / 1000.0)
+
+    def wait_for_host(self):
+        """Stand-in for while (!Serial): a pty cannot report DTR, so wait for the first input."""
+        while self.running and not select.select([self.master_fd], [], [], 0.05)[0]:
+            pass
+
+    def setup(self):
+        self.wait_for_host()
+        self.println(READY_BANNER)
+        self.println("Format: actuator_id,penetration_depth,first_contact")
+
+        # Run motor test sequence unless the host asks to skip it
+        if self.motor_test_skip_requested() or not self.run_motor_test:
+            self.println("Motor test skipped. Ready for operation.")
+        else:
+            self.run_motor_test_sequence()
+
+    def motor_test_skip_requested(self) -> bool:
+        line = bytearray()
+        start = self.millis()
+        while _signed32(self.millis() - start) < MOTOR_TEST_SKIP_WINDOW:
+            for c in self.serial_read_available():
+                if c == ord('\n'):
+                    if line.strip() == b"SKIPTEST":
+                        return True
+                    line.clear()
+                else:
+                    line.append(c)
+            self.sleep(0.001)
+        return False
+
+    def run_motor_test_sequence(self):
+        self.println("Running motor test sequence...")
+        for i in range(NUM_MOTORS):
+            self.println(f"Testing motor {i} on pin {MOTOR_PINS[i]}")
+            self.analog_write(i, MOTOR_TEST_PWM)
+            self.delay(500)
+            self.analog_write(i, 0)
+            self.delay(200)
+        self.println("Motor test complete. Ready for operation.")
+
+    def loop(self):
+        # Handle serial input
+        self.feed(self.serial_read_available())
+
+        # Advance pattern playback
+        self.update_playback()
+
+        # Update motor states (handle first contact pulses)
+        self.update_motor_states()
+
+        # Small delay for ~30Hz update rate, applying scheduled commands on time
+        wait_end = self.millis() + LOOP_DELAY
+        while _signed32(self.millis() - wait_end) < 0:
+            self.apply_due_commands()
+            self.sleep(0.0005)
+        self.loops += 1
+
+    def _run(self):
+        try:
+            self.setup()
+            while self.running:
+                self.loop()
+        except OSError:
+            # The pty was closed by stop()
+            pass
+
+    def start(self):
+        """Boot the emulated board on a background thread."""
+        if self.thread is not None:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="tact-emulator", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+        for fd in (self.master_fd, self.slave_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def pwm_samples(self, actuator_id: Optional[int] = None) -> List[PwmSample]:
+        """Recorded PWM changes, optionally for one motor only."""
+        return [sample for sample in list(self.pwm_trace)
+                if actuator_id is None or sample.actuator_id == actuator_id]
+
+    def write_pwm_trace(self, path: str):
+        """Save the PWM trace as CSV (timestamp_ns, actuator_id, value)."""
+        with open(path, 'w', newline='') as trace_file:
+            writer = csv.writer(trace_file)
+            writer.writerow(PwmSample._fields)
+            writer.writerows(self.pwm_samples())
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Tact firmware emulator on a pseudo-terminal')
+    parser.add_argument('--skip-motor-test', action='store_true',
+                        help='Boot without the power-on motor test')
+    parser.add_argument('--link', help='Also expose the pty under this path (symlink)')
+    parser.add_argument('--pwm-trace', help='Write the PWM trace to this CSV file on exit')
+
+    args = parser.parse_args()
+
+    emulator = TactEmulator(run_motor_test=not args.skip_motor_test)
+    if args.link:
+        if os.path.islink(args.link):
+            os.remove(args.link)
+        os.symlink(emulator.port, args.link)
+    emulator.start()
+    print(f"Tact emulator running on {args.link or emulator.port} (Ctrl-C to stop)")
+
+    try:
+        while True:
+            emulator.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator.stop()
+        if args.link and os.path.islink(args.link):
+            os.remove(args.link)
+        if args.pwm_trace:
+            emulator.write_pwm_trace(args.pwm_trace)
+            print(f"PWM trace written to {args.pwm_trace} ({len(emulator.pwm_trace)} changes)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Tact Firmware Reference
+Python model of firmware/tact_haptic_controller.ino.
+
+Feeds raw host bytes through the same parser and contact state machine as the
+Arduino firmware so host-side changes can be checked without hardware. PWM
+values and the lines the firmware would print are kept on the instance.
+"""
+
+import threading
+import time
+from typing import List, Sequence
+
+from tact_protocol import (NUM_MOTORS, BINARY_MESSAGE_SIZES, BINARY_FRAME_SYNC, BINARY_SEQUENCE_SYNC,
+                           BINARY_SCHEDULE_SYNC, CSV_FRAME_PREFIX, CSV_SEQUENCE_SEPARATOR,
+                           CSV_SCHEDULE_PREFIX, ACK_PREFIX, SYNC_COMMAND, SYNC_PREFIX,
+                           DEVICE_TIME_MODULO, FLAG_FIRST_CONTACT, PATTERN_SLOTS, MAX_KEYFRAMES,
+                           MAX_INPUT_LENGTH, PATTERN_PREFIX, Keyframe, dequantize_depth)
+
+# Fixed calibration parameters (same as the firmware)
+FIRST_CONTACT_PULSE_DURATION = 75  # milliseconds
+FIRST_CONTACT_AMPLITUDE = 230
+SUSTAINED_CONTACT_MIN_AMPLITUDE = 51
+SUSTAINED_CONTACT_MAX_AMPLITUDE = 179
+PENETRATION_THRESHOLD = 0.1
+SCHEDULE_SLOTS = 16
+
+
+class ScheduledCommand:
+    def __init__(self, due_time: int, actuator_id: int, depths: List[float],
+                 first_contact_mask: int, ack: int):
+        self.due_time = due_time
+        self.actuator_id = actuator_id  # -1 for a multi-actuator frame
+        self.depths = depths
+        self.first_contact_mask = first_contact_mask
+        self.ack = ack
+
+
+class StoredPattern:
+    def __init__(self, expected_count: int):
+        self.complete = False
+        self.expected_count = expected_count
+        self.keyframes: List[Keyframe] = []
+
+
+class TactFirmwareReference:
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.pwm = [0] * NUM_MOTORS
+        self.previous_contact = [False] * NUM_MOTORS
+        self.pulse_start_time = [0] * NUM_MOTORS
+        self.in_first_contact_pulse = [False] * NUM_MOTORS
+        self.binary_mode = False
+        self.input_buffer = bytearray()
+        self.input_overflow = False
+        self.frame_buffer = bytearray()
+        self.frame_size = 0
+        self.pending_ack = -1
+        self.schedule: List[ScheduledCommand] = []
+        self.has_pending_schedule = False
+        self.pending_schedule_time = 0
+        self.patterns = [StoredPattern(0) for _ in range(PATTERN_SLOTS)]
+        self.uploading_pattern = -1
+        self.playing_pattern = -1
+        self.playback_start = 0
+        self.playback_intensity = 1.0
+        self.playback_time_scale = 1.0
+        self.playback_next_keyframe = 0
+        self.output: List[str] = []
+
+    def millis(self) -> int:
+        return int(self.clock() * 1000) % DEVICE_TIME_MODULO
+
+    def println(self, line: str):
+        self.output.append(line)
+
+    def analog_write(self, actuator_id: int, value: int):
+        self.pwm[actuator_id] = value
+
+    def feed(self, data: bytes):
+        """Handle serial input exactly like the firmware's loop()."""
+        for c in data:
+            if self.frame_buffer:
+                # Inside a binary message
+                self.frame_buffer.append(c)
+                if len(self.frame_buffer) == self.frame_size:
+                    self.process_binary_message(bytes(self.frame_buffer))
+                    self.frame_buffer.clear()
+            elif self.binary_mode and c in BINARY_MESSAGE_SIZES:
+                # Unterminated text before a sync byte is line noise
+                self.input_buffer.clear()
+                self.input_overflow = False
+                self.frame_buffer.append(c)
+                self.frame_size = BINARY_MESSAGE_SIZES[c]
+            elif c == ord('\n'):
+                if self.input_overflow:
+                    self.println("Error: Message too long")
+                else:
+                    self.process_message(self.input_buffer.decode(errors='replace'))
+                self.input_buffer.clear()
+                self.input_overflow = False
+            elif len(self.input_buffer) < MAX_INPUT_LENGTH:
+                self.input_buffer.append(c)
+            else:
+                self.input_overflow = True
+
+    def process_message(self, message: str):
+        message = message.strip()
+        if not message:
+            return
+
+        # Protocol mode negotiation
+        if message == "MODE BIN":
+            self.binary_mode = True
+            self.println("Mode: BIN")
+            return
+        elif message == "MODE CSV":
+            self.binary_mode = False
+            self.println("Mode: CSV")
+            return
+
+        # A skip request that missed the start-up window has nothing left to skip
+        if message == "SKIPTEST":
+            return
+
+        # Clock sync: reply with the token and the current device time
+        if message.startswith(SYNC_COMMAND):
+            self.println(f"{SYNC_PREFIX}{message[len(SYNC_COMMAND):]} {self.millis()}")
+            return
+
+        # Pattern cache commands
+        if message.startswith(("PAT ", "K ", "PLAY ")) or message == "PSTOP":
+            self.process_pattern_command(message)
+            return
+
+        # Optional schedule: "AT <device_ms> <message>"
+        if message.startswith(CSV_SCHEDULE_PREFIX):
+            due_time, space, rest = message[len(CSV_SCHEDULE_PREFIX):].partition(' ')
+            if not space:
+                self.println("Error: Invalid message format")
+                return
+            self.pending_schedule_time = _to_int(due_time) % DEVICE_TIME_MODULO
+            self.has_pending_schedule = True
+            message = rest
+
+        # Optional sequence number to acknowledge: "<message>@<seq>"
+        message, separator, sequence = message.partition(CSV_SEQUENCE_SEPARATOR)
+        if separator:
+            self.pending_ack = _to_int(sequence)
+
+        if message.startswith(CSV_FRAME_PREFIX + ','):
+            self.process_frame_message(message)
+            return
+
+        # Parse CSV: actuator_id,penetration_depth,first_contact
+        fields = message.split(',')
+        if len(fields) < 3:
+            self.println("Error: Invalid message format")
+            self.acknowledge(False)
+            return
+
+        actuator_id = _to_int(fields[0])
+        penetration_depth = _to_float(fields[1])
+        first_contact = _to_int(','.join(fields[2:]))
+
+        self.dispatch_event(actuator_id, penetration_depth, first_contact == 1)
+
+    def process_pattern_command(self, message: str):
+        if message.startswith("PAT "):
+            # Begin upload: PAT <id> <keyframe_count>
+            fields = message[4:].split(' ', 1)
+            pattern_id = _to_int(fields[0])
+            count = _to_int(fields[1]) if len(fields) > 1 else 0
+            if len(fields) < 2 or not 0 <= pattern_id < PATTERN_SLOTS or not 1 <= count <= MAX_KEYFRAMES:
+                self.uploading_pattern = -1
+                self.println("Error: Pattern upload failed")
+                return
+            if self.playing_pattern == pattern_id:
+                self.playing_pattern = -1
+            self.patterns[pattern_id] = StoredPattern(count)
+            self.uploading_pattern = pattern_id
+            self.println(f"{PATTERN_PREFIX}{pattern_id} begin")
+        elif message.startswith("K "):
+            # Keyframes: K <time_ms>,<d0>,...,<dN-1>,<mask>[;<next keyframe>...]
+            if self.uploading_pattern < 0:
+                self.println("Error: Pattern upload failed")
+                return
+            pattern = self.patterns[self.uploading_pattern]
+            for text in message[2:].split(';'):
+                if not self.parse_keyframe(text, pattern):
+                    self.uploading_pattern = -1
+                    self.println("Error: Pattern upload failed")
+                    return
+            if len(pattern.keyframes) == pattern.expected_count:
+                pattern.complete = True
+                self.println(f"{PATTERN_PREFIX}{self.uploading_pattern} stored")
+                self.uploading_pattern = -1
+            else:
+                self.println(f"{PATTERN_PREFIX}{self.uploading_pattern} "
+                             f"{len(pattern.keyframes)}/{pattern.expected_count}")
+        elif message.startswith("PLAY "):
+            # Trigger playback: PLAY <id> [intensity] [time_scale]
+            fields = message[5:].split(' ')
+            pattern_id = _to_int(fields[0])
+            if not 0 <= pattern_id < PATTERN_SLOTS or not self.patterns[pattern_id].complete:
+                self.println("Error: Unknown pattern")
+                return
+            self.playback_intensity = _to_float(fields[1]) if len(fields) > 1 else 1.0
+            self.playback_time_scale = _to_float(fields[2]) if len(fields) > 2 else 1.0
+            if self.playback_time_scale <= 0.0:
+                self.playback_time_scale = 1.0
+            self.playing_pattern = pattern_id
+            self.playback_start = self.millis()
+            self.playback_next_keyframe = 0
+            self.update_playback()
+        else:
+            # PSTOP: stop playback and release every motor
+            self.playing_pattern = -1
+            self.apply_frame([0.0] * NUM_MOTORS, 0)
+
+    def parse_keyframe(self, text: str, pattern: StoredPattern) -> bool:
+        if len(pattern.keyframes) >= pattern.expected_count:
+            return False
+        fields = text.split(',')
+        if len(fields) != NUM_MOTORS + 2:
+            return False
+        values = [_to_int(field) for field in fields]
+        depths = tuple(max(0, min(100, depth)) for depth in values[1:-1])
+        pattern.keyframes.append(Keyframe(values[0] & 0xFFFF, depths, values[-1] & 0xFF))
+        return True
+
+    def update_playback(self):
+        """Advance pattern playback (called once per firmware loop)."""
+        if self.playing_pattern < 0:
+            return
+
+        keyframes = self.patterns[self.playing_pattern].keyframes
+        t = _signed32(self.millis() - self.playback_start) / self.playback_time_scale
+
+        # Collect first contact flags of every keyframe reached since the last update
+        first_contact_mask = 0
+        while (self.playback_next_keyframe < len(keyframes) and
+               keyframes[self.playback_next_keyframe].time_ms <= t):
+            first_contact_mask |= keyframes[self.playback_next_keyframe].first_contact_mask
+            self.playback_next_keyframe += 1
+        if self.playback_next_keyframe == 0:
+            return
+
+        previous = keyframes[self.playback_next_keyframe - 1]
+        if self.playback_next_keyframe >= len(keyframes):
+            # Past the last keyframe: apply it and finish
+            depths = [depth / 100.0 * self.playback_intensity for depth in previous.depths]
+            self.playing_pattern = -1
+        else:
+            # Linear interpolation towards the next keyframe
+            following = keyframes[self.playback_next_keyframe]
+            span = following.time_ms - previous.time_ms
+            fraction = (t - previous.time_ms) / span if span > 0 else 0.0
+            depths = [(a + (b - a) * fraction) / 100.0 * self.playback_intensity
+                      for a, b in zip(previous.depths, following.depths)]
+
+        self.apply_frame(depths, first_contact_mask)
+
+    def acknowledge(self, applied: bool):
+        """Echo the pending sequence number only if the command took effect."""
+        if self.pending_ack >= 0 and applied:
+            self.println(f"{ACK_PREFIX}{self.pending_ack}")
+        self.pending_ack = -1
+        self.has_pending_schedule = False
+
+    def dispatch_event(self, actuator_id: int, penetration_depth: float, first_contact: bool):
+        if self.has_pending_schedule:
+            depths = [penetration_depth] + [0.0] * (NUM_MOTORS - 1)
+            self.schedule_command(actuator_id, depths, 1 if first_contact else 0)
+            return
+        self.acknowledge(self.apply_touch_event(actuator_id, penetration_depth, first_contact))
+
+    def dispatch_frame(self, depths: Sequence[float], first_contact_mask: int):
+        if self.has_pending_schedule:
+            self.schedule_command(-1, list(depths), first_contact_mask)
+            return
+        self.acknowledge(self.apply_frame(depths, first_contact_mask))
+
+    def schedule_command(self, actuator_id: int, depths: List[float], first_contact_mask: int):
+        if len(self.schedule) >= SCHEDULE_SLOTS:
+            self.println("Error: Schedule full")
+            self.acknowledge(False)
+            return
+        self.schedule.append(ScheduledCommand(self.pending_schedule_time, actuator_id, depths,
+                                              first_contact_mask, self.pending_ack))
+        self.pending_ack = -1
+        self.has_pending_schedule = False
+
+    def apply_due_commands(self):
+        """Apply every scheduled command whose device time has arrived, earliest first."""
+        while True:
+            now = self.millis()
+            due = [command for command in self.schedule
+                   if _signed32(now - command.due_time) >= 0]
+            if not due:
+                return
+            command = min(due, key=lambda c: _signed32(c.due_time - now))
+            self.schedule.remove(command)
+            if command.actuator_id < 0:
+                applied = self.apply_frame(command.depths, command.first_contact_mask)
+            else:
+                applied = self.apply_touch_event(command.actuator_id, command.depths[0],
+                                                 bool(command.first_contact_mask & 1))
+            self.pending_ack = command.ack
+            self.acknowledge(applied)
+
+    def process_frame_message(self, message: str):
+        # Parse CSV frame: F,depth_0,...,depth_N-1,first_contact_mask
+        fields = message.split(',')
+        if len(fields) != NUM_MOTORS + 2:
+            self.println("Error: Invalid message format")
+            self.acknowledge(False)
+            return
+
+        depths = [_to_float(field) for field in fields[1:-1]]
+        self.dispatch_frame(depths, _to_int(fields[-1]))
+
+    def process_binary_message(self, raw: bytes):
+        # Bytes after the sync byte must sum to zero
+        if sum(raw[1:]) & 0xFF != 0:
+            self.println("Error: Invalid checksum")
+            self.acknowledge(False)
+            return
+
+        if raw[0] == BINARY_SEQUENCE_SYNC:
+            # Acknowledge the message that follows
+            self.pending_ack = raw[1] | (raw[2] << 8)
+        elif raw[0] == BINARY_SCHEDULE_SYNC:
+            # Apply the message that follows at the given device time
+            self.pending_schedule_time = int.from_bytes(raw[1:5], 'little')
+            self.has_pending_schedule = True
+        elif raw[0] == BINARY_FRAME_SYNC:
+            depths = [dequantize_depth(depth_q) for depth_q in raw[2:-1]]
+            self.dispatch_frame(depths, raw[1])
+        else:
+            self.dispatch_event(raw[1] & 0x0F, dequantize_depth(raw[2]),
+                                bool(raw[1] & FLAG_FIRST_CONTACT))
+
+    def apply_frame(self, depths: Sequence[float], first_contact_mask: int) -> bool:
+        """Apply every actuator's value for one tick as a single step."""
+        applied = True
+        with self.lock:
+            for actuator_id in range(NUM_MOTORS):
+                first_contact = bool(first_contact_mask & (1 << actuator_id))
+                applied = self._apply_touch_event(actuator_id, depths[actuator_id], first_contact) and applied
+        return applied
+
+    def apply_touch_event(self, actuator_id: int, penetration_depth: float, first_contact: bool) -> bool:
+        with self.lock:
+            return self._apply_touch_event(actuator_id, penetration_depth, first_contact)
+
+    def _apply_touch_event(self, actuator_id: int, penetration_depth: float, first_contact: bool) -> bool:
+        # Validate actuator ID
+        if actuator_id < 0 or actuator_id >= NUM_MOTORS:
+            self.println("Error: Invalid actuator ID")
+            return False
+
+        # Apply penetration threshold
+        if penetration_depth < PENETRATION_THRESHOLD:
+            penetration_depth = 0.0
+            first_contact = False
+
+        self.update_actuator(actuator_id, penetration_depth, first_contact)
+        return True
+
+    def update_actuator(self, actuator_id: int, penetration_depth: float, is_first_contact: bool):
+        current_contact = penetration_depth > 0.0
+
+        if is_first_contact and not self.previous_contact[actuator_id] and current_contact:
+            self.start_first_contact_pulse(actuator_id)
+        elif current_contact and not self.in_first_contact_pulse[actuator_id]:
+            self.apply_sustained_vibration(actuator_id, penetration_depth)
+        elif not current_contact:
+            self.analog_write(actuator_id, 0)
+            self.previous_contact[actuator_id] = False
+            self.in_first_contact_pulse[actuator_id] = False
+
+        if current_contact:
+            self.previous_contact[actuator_id] = True
+
+    def start_first_contact_pulse(self, actuator_id: int):
+        self.analog_write(actuator_id, FIRST_CONTACT_AMPLITUDE)
+        self.pulse_start_time[actuator_id] = self.millis()
+        self.in_first_contact_pulse[actuator_id] = True
+        self.println(f"First contact pulse: Motor {actuator_id}")
+
+    def apply_sustained_vibration(self, actuator_id: int, penetration_depth: float):
+        amplitude = SUSTAINED_CONTACT_MIN_AMPLITUDE + int(
+            (SUSTAINED_CONTACT_MAX_AMPLITUDE - SUSTAINED_CONTACT_MIN_AMPLITUDE) * penetration_depth)
+        amplitude = max(SUSTAINED_CONTACT_MIN_AMPLITUDE, min(SUSTAINED_CONTACT_MAX_AMPLITUDE, amplitude))
+        self.analog_write(actuator_id, amplitude)
+
+    def update_motor_states(self):
+        """Expire finished first contact pulses (called once per firmware loop)."""
+        with self.lock:
+            current_time = self.millis()
+            for i in range(NUM_MOTORS):
+                if self.in_first_contact_pulse[i]:
+                    if current_time - self.pulse_start_time[i] >= FIRST_CONTACT_PULSE_DURATION:
+                        self.in_first_contact_pulse[i] = False
+
+
+def _signed32(value: int) -> int:
+    """Interpret an unsigned millis() difference the way (long) does on the device."""
+    value %= DEVICE_TIME_MODULO
+    return value - DEVICE_TIME_MODULO if value >= DEVICE_TIME_MODULO // 2 else value
+
+
+def _to_int(text: str) -> int:
+    """Arduino String.toInt(): leading integer, 0 if none."""
+    text = text.strip()
+    digits = ''
+    for i, ch in enumerate(text):
+        if ch.isdigit() or (i == 0 and ch in '+-'):
+            digits += ch
+        else:
+            break
+    try:
+        return int(digits)
+    except ValueError:
+        return 0
+
+
+def _to_float(text: str) -> float:
+    """Arduino String.toFloat(): leading decimal number, 0.0 if none."""
+    text = text.strip()
+    end = 0
+    seen_dot = False
+    for i, ch in enumerate(text):
+        if ch.isdigit() or (i == 0 and ch in '+-'):
+            end = i + 1
+        elif ch == '.' and not seen_dot:
+            seen_dot = True
+            end = i + 1
+        else:
+            break
+    try:
+        return float(text[:end])
+    except ValueError:
+        return 0.0
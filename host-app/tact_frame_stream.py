@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tact Frame Streaming
+Pre-encoded wire messages for offline (ticks x motors) depth arrays.
+
+A depth array, or a .npy file opened memory-mapped, is processed in chunks of
+FRAME_CHUNK rows. Each chunk is validated, quantized, given its first-contact
+masks by the ContactTracker and encoded with NumPy into one contiguous byte
+buffer plus row offsets, so streaming a row is slicing that buffer. Only one
+chunk is in memory at a time, so a long sequence plays in constant memory.
+
+Encoded rows are byte-for-byte what MessageEncoder.frame() produces:
+
+    CSV     "F,d.dd,d.dd,d.dd,d.dd,<mask>\\n"   (24 or 25 bytes)
+    binary  0xA6, mask, four depth bytes, checksum
+"""
+
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+from tact_contact import ContactTracker
+from tact_protocol import (BINARY_FRAME_SYNC, CSV_FRAME_PREFIX, DEPTH_STEPS, NUM_MOTORS, PROTOCOL_BINARY,
+                           MessageEncoder)
+
+FRAME_CHUNK = 4096  # rows validated, quantized and encoded at a time
+
+
+def load_frames(frames: Union[np.ndarray, str, Path], num_motors: int = NUM_MOTORS) -> np.ndarray:
+    """A (ticks x motors) depth array; .npy files are memory-mapped, not read."""
+    if isinstance(frames, (str, Path)):
+        frames = np.load(frames, mmap_mode='r')
+    elif not isinstance(frames, np.ndarray):
+        frames = np.asarray(frames)
+    if frames.ndim != 2 or frames.shape[1] != num_motors:
+        raise ValueError(f"Frames need shape (ticks, {num_motors}), got {frames.shape}")
+    if not np.issubdtype(frames.dtype, np.number):
+        raise ValueError(f"Frames need a numeric dtype, got {frames.dtype}")
+    for start in range(0, len(frames), FRAME_CHUNK):
+        if not np.isfinite(frames[start:start + FRAME_CHUNK]).all():
+            raise ValueError(f"Frames contain NaN or infinite depths (rows {start}-{start + FRAME_CHUNK - 1})")
+    return frames
+
+
+def quantize_frames(depths: np.ndarray) -> np.ndarray:
+    """Vectorized quantize_depth(): clamp to [0, 1] in hundredths, as uint8."""
+    return np.clip(np.rint(np.asarray(depths, dtype=np.float64) * DEPTH_STEPS), 0, DEPTH_STEPS).astype(np.uint8)
+
+
+def encode_frames(mode: str, depths_q: np.ndarray, masks: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Encode quantized rows into one uint8 buffer; row i is buffer[offsets[i]:offsets[i + 1]]."""
+    rows, num_motors = depths_q.shape
+    masks = masks.astype(np.uint8) & 0x0F
+    if mode == PROTOCOL_BINARY:
+        payload = np.column_stack([masks, depths_q]).astype(np.int64)
+        checksums = (-payload.sum(axis=1)) & 0xFF
+        encoded = np.column_stack([np.full(rows, BINARY_FRAME_SYNC), payload, checksums]).astype(np.uint8)
+        return encoded.ravel(), np.arange(rows + 1) * encoded.shape[1]
+
+    # CSV: "F," then "d.dd," per motor, then a one or two digit mask and "\n"
+    width = 2 + 5 * num_motors + 3
+    encoded = np.zeros((rows, width), dtype=np.uint8)
+    encoded[:, 0] = ord(CSV_FRAME_PREFIX)
+    encoded[:, 1] = ord(',')
+    for motor_id in range(num_motors):
+        column = 2 + 5 * motor_id
+        depth_q = depths_q[:, motor_id]
+        encoded[:, column] = np.where(depth_q == DEPTH_STEPS, ord('1'), ord('0'))
+        encoded[:, column + 1] = ord('.')
+        encoded[:, column + 2] = ord('0') + (depth_q // 10) % 10
+        encoded[:, column + 3] = ord('0') + depth_q % 10
+        encoded[:, column + 4] = ord(',')
+    two_digits = masks >= 10
+    encoded[:, -3] = np.where(two_digits, ord('1'), ord('0') + masks)
+    encoded[:, -2] = np.where(two_digits, ord('0') + masks - 10, ord('\n'))
+    encoded[:, -1] = ord('\n')
+    keep = np.ones((rows, width), dtype=bool)
+    keep[:, -1] = two_digits
+    lengths = width - 1 + two_digits
+    return encoded[keep], np.concatenate([[0], np.cumsum(lengths)])
+
+
+class FrameStream:
+    """Rows of a depth array as wire messages, encoded one chunk ahead of playback.
+
+    Rows must be requested in increasing order (rows may be skipped); the
+    first-contact bits of skipped rows are carried into the next row sent.
+    """
+
+    def __init__(self, frames: np.ndarray, encoder: MessageEncoder, contacts: ContactTracker,
+                 first_contact: Optional[np.ndarray] = None, chunk_size: int = FRAME_CHUNK):
+        if first_contact is not None and len(first_contact) != len(frames):
+            raise ValueError(f"first_contact needs {len(frames)} masks, got {len(first_contact)}")
+        self.frames = frames
+        self.encoder = encoder
+        self.contacts = contacts
+        self.first_contact = first_contact
+        self.chunk_size = chunk_size
+        self.start = 0
+        self.end = 0
+        self.next_row = 0   # first row not yet sent or skipped
+        self.carry = 0      # first-contact bits of skipped rows
+        self.depths_q = self.masks = self.buffer = self.offsets = None
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def _load_next_chunk(self):
+        self.start, self.end = self.end, min(self.end + self.chunk_size, len(self.frames))
+        depths = np.asarray(self.frames[self.start:self.end], dtype=np.float64)
+        explicit = None if self.first_contact is None else self.first_contact[self.start:self.end]
+        self.depths_q = quantize_frames(depths)
+        # The tracker sees the depths the firmware will, as in send_frame()
+        self.masks = self.contacts.update_frames(self.depths_q / DEPTH_STEPS, explicit)
+        self.buffer, self.offsets = encode_frames(self.encoder.mode, self.depths_q, self.masks)
+
+    def message(self, row: int) -> Tuple[Union[memoryview, bytes], int]:
+        """(encoded message, first_contact_mask) for a row."""
+        while row >= self.end:
+            if self.masks is not None:
+                self.carry |= int(np.bitwise_or.reduce(self.masks[self.next_row - self.start:], initial=0))
+            self._load_next_chunk()
+            self.next_row = self.start
+        index = row - self.start
+        if row > self.next_row:
+            self.carry |= int(np.bitwise_or.reduce(self.masks[self.next_row - self.start:index]))
+        mask = int(self.masks[index])
+        self.next_row = row + 1
+        if self.carry & ~mask:
+            mask |= self.carry
+            self.carry = 0
+            return self.encoder.frame(self.depths(row), mask), mask
+        self.carry = 0
+        return memoryview(self.buffer)[self.offsets[index]:self.offsets[index + 1]], mask
+
+    def depths(self, row: int) -> list:
+        """Quantized depths of a row in the current chunk, as floats."""
+        return (self.depths_q[row - self.start] / DEPTH_STEPS).tolist()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Tact Gesture Library
+Keyframe gesture files, loaded and compiled on first use.
+
+A gesture file is JSON with per-motor keyframes (time in seconds, depth 0-1,
+optional first contact), an interpolation mode (linear, step or smooth), an
+optional duration (default: the last keyframe) and an optional loop section:
+
+    {
+      "interpolation": "linear",
+      "duration": 1.2,
+      "loop": {"start": 0.2, "end": 0.8, "count": 3},
+      "motors": {
+        "0": [{"t": 0.0, "depth": 0.0}, {"t": 0.1, "depth": 0.8, "contact": true},
+              {"t": 0.4, "depth": 0.0}]
+      }
+    }
+
+The loop section [start, end) plays `count` times in total. GestureLibrary
+only lists the directory when created; a file is parsed and compiled into a
+GestureTable (at full intensity) the first time it is played. Compiled tables
+are also written to a disk cache named after the SHA-256 of the file contents,
+the tick rate and the motor count, so later runs load a table with one read
+and never parse an unchanged file again.
+"""
+
+import hashlib
+import json
+import os
+import zipfile
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from tact_gestures import DEFAULT_RATE, GestureTable
+from tact_protocol import NUM_MOTORS
+from tact_trace import logger
+
+GESTURE_SUFFIX = '.json'
+DEFAULT_LIBRARY_DIR = Path(__file__).parent / 'gestures'
+DEFAULT_COMPILE_CACHE = Path(os.environ.get('TACT_GESTURE_CACHE', Path.home() / '.tact' / 'gesture_cache'))
+COMPILE_FORMAT = 1  # bump when compiled output changes for the same file
+
+INTERPOLATION_LINEAR = 'linear'
+INTERPOLATION_STEP = 'step'
+INTERPOLATION_SMOOTH = 'smooth'
+INTERPOLATIONS = (INTERPOLATION_LINEAR, INTERPOLATION_STEP, INTERPOLATION_SMOOTH)
+
+
+class MotorKeyframe(NamedTuple):
+    time: float      # seconds from the start of the gesture
+    depth: float     # 0.0-1.0
+    contact: bool    # send a first contact pulse at this keyframe
+
+
+class GestureSpec(NamedTuple):
+    name: str
+    interpolation: str
+    duration: float
+    loop: Optional[Tuple[float, float, int]]   # (start, end, count)
+    motors: Dict[int, List[MotorKeyframe]]
+
+
+def parse_gesture(name: str, text: str, num_motors: int = NUM_MOTORS) -> GestureSpec:
+    """Parse and validate a gesture file; raises ValueError on bad content."""
+    try:
+        data = json.loads(text)
+        interpolation = data.get('interpolation', INTERPOLATION_LINEAR)
+        if interpolation not in INTERPOLATIONS:
+            raise ValueError(f"unknown interpolation {interpolation!r}")
+
+        motors = {}
+        for motor, keyframes in data['motors'].items():
+            motor_id = int(motor)
+            if not 0 <= motor_id < num_motors:
+                raise ValueError(f"motor {motor_id} out of range")
+            motors[motor_id] = sorted(
+                MotorKeyframe(float(key['t']), min(1.0, max(0.0, float(key['depth']))),
+                              bool(key.get('contact', False)))
+                for key in keyframes)
+            if not motors[motor_id]:
+                raise ValueError(f"motor {motor_id} has no keyframes")
+
+        last_time = max(keyframes[-1].time for keyframes in motors.values()) if motors else 0.0
+        duration = float(data.get('duration', last_time))
+
+        loop = data.get('loop')
+        if loop is not None:
+            loop = (float(loop['start']), float(loop['end']), int(loop.get('count', 1)))
+            if not 0 <= loop[0] < loop[1] <= duration or loop[2] < 1:
+                raise ValueError("loop needs 0 <= start < end <= duration and count >= 1")
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid gesture {name}: {e}") from e
+    return GestureSpec(name, interpolation, duration, loop, motors)
+
+
+def _sample(keyframes: List[MotorKeyframe], times: np.ndarray, interpolation: str) -> np.ndarray:
+    key_times = np.array([key.time for key in keyframes])
+    key_depths = np.array([key.depth for key in keyframes])
+    if interpolation == INTERPOLATION_LINEAR or len(keyframes) == 1:
+        return np.interp(times, key_times, key_depths)
+
+    index = np.clip(np.searchsorted(key_times, times, side='right') - 1, 0, len(keyframes) - 1)
+    if interpolation == INTERPOLATION_STEP:
+        return key_depths[index]
+
+    # Smooth: cosine ease between neighbouring keyframes
+    following = np.minimum(index + 1, len(keyframes) - 1)
+    span = key_times[following] - key_times[index]
+    progress = np.clip((times - key_times[index]) / np.where(span > 0, span, 1), 0, 1)
+    eased = (1 - np.cos(np.pi * progress)) / 2
+    return key_depths[index] + (key_depths[following] - key_depths[index]) * eased
+
+
+def compile_spec(spec: GestureSpec, rate: int = DEFAULT_RATE, num_motors: int = NUM_MOTORS) -> GestureTable:
+    """Sample a parsed gesture at the tick rate, unrolling its loop section."""
+    ticks = int(round(spec.duration * rate))
+    times = np.arange(ticks) / rate
+    depths = np.zeros((ticks, num_motors), dtype=np.float32)
+    first_contact = np.zeros(ticks, dtype=np.uint8)
+    for motor_id, keyframes in spec.motors.items():
+        depths[:, motor_id] = _sample(keyframes, times, spec.interpolation)
+        for key in keyframes:
+            tick = int(round(key.time * rate))
+            if key.contact and tick < ticks:
+                first_contact[tick] |= 1 << motor_id
+
+    if spec.loop is not None:
+        loop_start, loop_end = int(round(spec.loop[0] * rate)), int(round(spec.loop[1] * rate))
+        rows = np.concatenate([np.arange(loop_end)] +
+                              [np.arange(loop_start, loop_end)] * (spec.loop[2] - 1) +
+                              [np.arange(loop_end, ticks)])
+        depths, first_contact = depths[rows], first_contact[rows]
+    return GestureTable(depths, first_contact)
+
+
+class GestureLibrary:
+    """A directory of gesture files, parsed and compiled lazily with a disk cache."""
+
+    def __init__(self, directory: Path = DEFAULT_LIBRARY_DIR, cache_dir: Optional[Path] = DEFAULT_COMPILE_CACHE,
+                 rate: int = DEFAULT_RATE, num_motors: int = NUM_MOTORS):
+        self.directory = Path(directory)
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.rate = rate
+        self.num_motors = num_motors
+        self.tables: Dict[str, GestureTable] = {}
+        self.paths = self.index()
+
+        # Statistics
+        self.compiled = 0
+        self.disk_hits = 0
+
+    def index(self) -> Dict[str, Path]:
+        """Gesture name -> file, from the directory listing alone."""
+        try:
+            entries = os.scandir(self.directory)
+        except OSError:
+            return {}
+        with entries:
+            return {Path(entry.name).stem: Path(entry.path) for entry in entries
+                    if entry.name.endswith(GESTURE_SUFFIX) and entry.is_file()}
+
+    def names(self) -> List[str]:
+        return sorted(self.paths)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.paths
+
+    def load(self, name: str) -> GestureSpec:
+        """Parse a gesture file (no caching; compile() is the fast path)."""
+        return parse_gesture(name, self.paths[name].read_text(), self.num_motors)
+
+    def cache_path(self, content: bytes) -> Path:
+        digest = hashlib.sha256(content)
+        digest.update(f"|{COMPILE_FORMAT}|{self.rate}|{self.num_motors}".encode())
+        return self.cache_dir / f"{digest.hexdigest()}.npz"
+
+    def compile(self, name: str) -> GestureTable:
+        """Compiled table for a gesture at full intensity, compiling it on first use."""
+        table = self.tables.get(name)
+        if table is not None:
+            return table
+
+        content = self.paths[name].read_bytes()
+        cache_path = self.cache_path(content) if self.cache_dir is not None else None
+        table = self._read_cache(cache_path)
+        if table is None:
+            spec = parse_gesture(name, content.decode(), self.num_motors)
+            table = compile_spec(spec, self.rate, self.num_motors)
+            self.compiled += 1
+            self._write_cache(cache_path, table)
+        else:
+            self.disk_hits += 1
+
+        table.depths.flags.writeable = False
+        table.first_contact.flags.writeable = False
+        self.tables[name] = table
+        return table
+
+    def _read_cache(self, path: Optional[Path]) -> Optional[GestureTable]:
+        if path is None:
+            return None
+        try:
+            # np.load leaves the file open when it fails to parse, so own the handle
+            with open(path, 'rb') as cache_file, np.load(cache_file) as cached:
+                return GestureTable(cached['depths'], cached['first_contact'])
+        except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+            # A missing, truncated or corrupt cache file is recompiled
+            return None
+
+    def _write_cache(self, path: Optional[Path], table: GestureTable):
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temporary = path.with_suffix('.tmp')
+            with open(temporary, 'wb') as cache_file:
+                np.savez(cache_file, depths=table.depths, first_contact=table.first_contact)
+            os.replace(temporary, path)
+        except OSError as e:
+            logger.debug("Could not write gesture cache %s: %s", path, e)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Tact Gesture Compiler
+Precomputed per-tick depth tables for the built-in gestures.
+
+Each gesture is compiled once from its parameters into a GestureTable: a
+(ticks x motors) float32 array of depths, computed with NumPy in one pass, plus
+the first-contact mask of every tick. Tables are memoized in a bounded LRU
+keyed by (gesture, duration, intensity, rate), so playing the same gesture
+again only walks an existing array. Tables are shared between callers and are
+therefore read-only.
+"""
+
+import collections
+from typing import Callable, Dict, NamedTuple, Tuple
+
+import numpy as np
+
+from tact_protocol import NUM_MOTORS
+
+DEFAULT_RATE = 20            # Hz
+DEFAULT_TABLE_CACHE_SIZE = 64
+
+
+class GestureTable(NamedTuple):
+    depths: np.ndarray          # float32, shape (ticks, motors)
+    first_contact: np.ndarray   # uint8 mask per tick, bit N = motor N
+
+    def __len__(self) -> int:
+        return len(self.depths)
+
+    def frames(self):
+        """(depths, first_contact_mask) per tick as plain Python values."""
+        return zip(self.depths.tolist(), self.first_contact.tolist())
+
+    def scaled(self, intensity: float) -> 'GestureTable':
+        """The same gesture with every depth multiplied by intensity."""
+        if intensity == 1.0:
+            return self
+        return GestureTable(np.minimum(self.depths * np.float32(intensity), 1.0), self.first_contact)
+
+    def motor_mask(self) -> int:
+        """Bit N set if the gesture ever drives motor N."""
+        driven = np.any(self.depths > 0, axis=0)
+        return sum(1 << motor_id for motor_id in np.flatnonzero(driven).tolist())
+
+
+def _first_contact_at_start(steps: int, mask: int) -> np.ndarray:
+    first_contact = np.zeros(steps, dtype=np.uint8)
+    if steps:
+        first_contact[0] = mask
+    return first_contact
+
+
+def compile_stroke(steps: int, intensity: float, num_motors: int = NUM_MOTORS) -> GestureTable:
+    """A full sine cycle swept across the motors, each a quarter period apart."""
+    phase = np.arange(steps, dtype=np.float64) / max(1, steps) * 2 * np.pi
+    motor_phase = phase[:, np.newaxis] + np.arange(num_motors) * np.pi / 2
+    depths = np.maximum(0, intensity * (0.5 + 0.5 * np.abs(np.sin(motor_phase))))
+    return GestureTable(depths.astype(np.float32), _first_contact_at_start(steps, 0b0001))
+
+
+def compile_squeeze(steps: int, max_intensity: float, num_motors: int = NUM_MOTORS) -> GestureTable:
+    """A triangular ramp applied to all motors at once."""
+    half = max(1, steps // 2)
+    step = np.arange(steps, dtype=np.float64)
+    ramp = np.where(step < steps // 2, step, steps - step) / half * max_intensity
+    depths = np.repeat(ramp[:, np.newaxis], num_motors, axis=1)
+    all_motors_mask = (1 << num_motors) - 1
+    return GestureTable(depths.astype(np.float32), _first_contact_at_start(steps, all_motors_mask))
+
+
+def _single_motor(motor_id: int, levels, ticks_per_level: int, num_motors: int) -> GestureTable:
+    depths = np.zeros((len(levels) * ticks_per_level, num_motors), dtype=np.float32)
+    depths[:, motor_id] = np.repeat(np.asarray(levels, dtype=np.float32), ticks_per_level)
+    return GestureTable(depths, _first_contact_at_start(len(depths), 1 << motor_id))
+
+
+def compile_pat(motor_id: int, intensity: float, rate: int = DEFAULT_RATE,
+                num_motors: int = NUM_MOTORS) -> GestureTable:
+    """First contact then two decaying levels, 0.1 s each, on one motor."""
+    levels = [intensity, intensity * 0.7, intensity * 0.4]
+    return _single_motor(motor_id, levels, max(1, round(0.1 * rate)), num_motors)
+
+
+def compile_poke(motor_id: int, intensity: float, rate: int = DEFAULT_RATE,
+                 num_motors: int = NUM_MOTORS) -> GestureTable:
+    """A single 50 ms contact on one motor."""
+    return _single_motor(motor_id, [intensity], max(1, round(0.05 * rate)), num_motors)
+
+
+GESTURE_COMPILERS: Dict[str, Callable[[int, float, int], GestureTable]] = {
+    'stroke': compile_stroke,
+    'squeeze': compile_squeeze,
+}
+
+
+class GestureCompiler:
+    """Bounded LRU of compiled gesture tables."""
+
+    def __init__(self, max_entries: int = DEFAULT_TABLE_CACHE_SIZE, num_motors: int = NUM_MOTORS):
+        self.max_entries = max_entries
+        self.num_motors = num_motors
+        self.tables: 'collections.OrderedDict[Tuple, GestureTable]' = collections.OrderedDict()
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, gesture: str, duration: float, intensity: float,
+                rate: int = DEFAULT_RATE) -> GestureTable:
+        """Table for the gesture, compiled on first use."""
+        key = (gesture, duration, intensity, rate)
+        table = self.tables.get(key)
+        if table is not None:
+            self.tables.move_to_end(key)
+            self.hits += 1
+            return table
+
+        if gesture not in GESTURE_COMPILERS:
+            raise ValueError(f"Unknown gesture: {gesture}")
+        self.misses += 1
+        steps = int(duration * rate)
+        table = GESTURE_COMPILERS[gesture](steps, intensity, self.num_motors)
+        table.depths.flags.writeable = False
+        table.first_contact.flags.writeable = False
+        self.tables[key] = table
+        if len(self.tables) > self.max_entries:
+            self.tables.popitem(last=False)
+        return table
+
+    def clear(self):
+        self.tables.clear()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tact Readiness Handshake
+Waits for the firmware to become ready after the serial port is opened.
+
+Instead of sleeping for a fixed time, the host reads start-up lines as they
+arrive and returns as soon as the firmware reports "Ready for operation." A
+board that was already running when the port opened (and so never prints its
+banner again) is detected by answering a SYNC probe. When asked, the host
+sends SKIPTEST right after the banner so the firmware skips its ~2.8 s
+power-on motor test.
+"""
+
+from typing import List, NamedTuple, Optional
+
+from tact_clock import SYSTEM_CLOCK
+from tact_protocol import READY_SUFFIX, SKIP_TEST_COMMAND, encode_sync_request, parse_sync_reply
+from tact_reader import READY_BANNER
+from tact_trace import MessageTrace
+
+DEFAULT_READY_TIMEOUT = 6.0
+PROBE_INTERVAL = 0.5
+RUNNING_BOARD_TIMEOUT = 1.0  # a running board answers the first or second probe well within this
+READY_PROBE_TOKEN = 0xFFFF  # outside the range sync_clock() uses early in a session
+
+
+class ReadyStatus(NamedTuple):
+    ready: bool
+    elapsed: float             # seconds from the start of the wait
+    banner_seen: bool
+    motor_test_skipped: bool
+    lines: List[str]
+
+
+def wait_for_ready(serial_connection, timeout: float = DEFAULT_READY_TIMEOUT,
+                   skip_motor_test: bool = False, trace: Optional[MessageTrace] = None,
+                   probe_interval: float = PROBE_INTERVAL, clock=SYSTEM_CLOCK) -> ReadyStatus:
+    """Read start-up output until the firmware is ready or the deadline passes."""
+    start = clock.monotonic()
+    deadline = start + timeout
+    banner_seen = False
+    skipped = False
+    lines = []
+    next_probe = start
+
+    original_timeout = serial_connection.timeout
+    serial_connection.timeout = 0.05
+    try:
+        while clock.monotonic() < deadline:
+            # Only probe while the board is silent: a booting board discards input
+            if not banner_seen and clock.monotonic() >= next_probe:
+                serial_connection.write(encode_sync_request(READY_PROBE_TOKEN))
+                next_probe += probe_interval
+
+            raw = serial_connection.readline()
+            if not raw:
+                continue
+            if trace is not None:
+                trace.received(raw)
+            line = raw.decode(errors='replace').strip()
+            lines.append(line)
+
+            if line == READY_BANNER:
+                banner_seen = True
+                if skip_motor_test:
+                    serial_connection.write(SKIP_TEST_COMMAND)
+                    skipped = True
+            elif line.endswith(READY_SUFFIX) or parse_sync_reply(line) is not None:
+                return ReadyStatus(True, clock.monotonic() - start, banner_seen, skipped, lines)
+    finally:
+        serial_connection.timeout = original_timeout
+
+    return ReadyStatus(False, clock.monotonic() - start, banner_seen, skipped, lines)
@@ -9,23 +9,117 @@ with predefined gesture patterns and manual control options.
 """
 
 import serial
-import time
+import numpy as np
+import logging
 import threading
 import sys
-import math
-from typing import List, Tuple
+from typing import Callable, Hashable, Iterator, List, Optional, Sequence
+
+from tact_async_writer import LatestValueWriter, PendingUpdates
+from tact_clock import SYSTEM_CLOCK, VirtualClock
+from tact_clock_sync import ClockSync, SyncSample
+from tact_contact import CONTACT_OFF, CONTACT_ON, ContactTracker
+from tact_gestures import GestureCompiler, compile_pat, compile_poke
+from tact_frame_stream import FrameStream, load_frames
+from tact_gesture_library import DEFAULT_LIBRARY_DIR, GestureLibrary
+from tact_ingest import ContactIngestor
+from tact_latency import AckTracker
+from tact_mixer import BLEND_MAX, BLEND_RULES, GestureHandle, GestureMixer, GesturePlayer
+from tact_handshake import DEFAULT_READY_TIMEOUT, RUNNING_BOARD_TIMEOUT, wait_for_ready
+from tact_port_discovery import find_tact_port
+from tact_recorder import SessionRecorder, SessionReplayer
+from tact_shadow import DEFAULT_KEEPALIVE, DeviceShadow
+from tact_spatial import BACK_OF_HAND_LAYOUT, LAYOUTS, MotorLayout, SpatialRenderer
+from tact_pattern_cache import PatternCache, frames_to_keyframes, simplify_keyframes
+from tact_ticker import CATCH_UP_POLICIES, CATCH_UP_SKIP, TickScheduler
+from tact_trace import DEFAULT_TRACE_SIZE, MessageTrace, format_message, logger
+from tact_transport import InMemoryTransport
+from tact_reader import DeviceReader, EVENT_ACK, EVENT_PATTERN, EVENT_PATTERN_ERROR, EVENT_SYNC
+from tact_protocol import (NUM_MOTORS, PROTOCOL_CSV, PROTOCOL_BINARY, MODE_BINARY_COMMAND,
+                           MODE_BINARY_REPLY, MAX_KEYFRAMES, MAX_KEYFRAME_TIME_MS, PATTERN_STOP_COMMAND,
+                           Keyframe, MessageEncoder, encode_pattern_play, encode_pattern_upload,
+                           encode_sync_request, with_schedule, with_sequence)
+
+GESTURE_RATE = 20  # gestures are generated at 20 Hz
+GESTURE_TICK = 1.0 / GESTURE_RATE
+
+# (duration, intensity, motor_id) used by queue_gesture, matching the gesture_* defaults
+GESTURE_DEFAULTS = {
+    'stroke': (2.0, 0.6, None),
+    'squeeze': (1.5, 0.7, None),
+    'pat': (None, 0.8, 1),
+    'poke': (None, 0.9, 2),
+}
+TOUCH_PRIORITY = 100  # direct touch events preempt gestures below this priority
+
 
 class TactHostSimulator:
-    def __init__(self, port: str = None, baud_rate: int = 115200):
+    def __init__(self, port: str = None, baud_rate: int = 115200, binary: bool = False,
+                 async_writes: bool = False, trace_size: int = DEFAULT_TRACE_SIZE,
+                 read_responses: bool = True, ack_mode: bool = False,
+                 cache_patterns: bool = False, skip_motor_test: bool = False,
+                 ready_timeout: float = DEFAULT_READY_TIMEOUT, reset_on_open: bool = True,
+                 clock=SYSTEM_CLOCK, transport=None, tick_catch_up: str = CATCH_UP_SKIP,
+                 blend: str = BLEND_MAX, gesture_dir=DEFAULT_LIBRARY_DIR,
+                 layout: MotorLayout = BACK_OF_HAND_LAYOUT, ingest: str = None,
+                 contact_on: float = CONTACT_ON, contact_off: float = CONTACT_OFF,
+                 suppress_unchanged: bool = True, keepalive: float = DEFAULT_KEEPALIVE):
         self.port = port
         self.baud_rate = baud_rate
         self.serial_connection = None
         self.is_connected = False
-        self.num_motors = 4
+        self.num_motors = NUM_MOTORS
+        self.binary_requested = binary
+        self.protocol_mode = PROTOCOL_CSV
+        # Every event message is encoded once per protocol, up front
+        self.encoders = {mode: MessageEncoder(mode, NUM_MOTORS) for mode in (PROTOCOL_CSV, PROTOCOL_BINARY)}
+        self.async_writes = async_writes
+        self.writer = None
+        self.clock = clock
+        self.transport = transport
+        self.trace = MessageTrace(trace_size, clock)
+        self.read_responses = read_responses
+        self.reader = None
+        self.pending_callbacks = []
+        self.ack_mode = ack_mode
+        self.acks = AckTracker(clock=clock)
+        self.write_lock = threading.Lock()
+        # Held from contact tracking through the write, so senders on the gesture,
+        # ingest and caller threads reach the port in the order the state assumed
+        self.send_lock = threading.RLock()
+        self.clock_sync = ClockSync()
+        self.sync_token = 0
+        self.cache_patterns = cache_patterns
+        self.pattern_cache = PatternCache()
+        self.gestures = GestureCompiler()
+        self.library = GestureLibrary(gesture_dir, rate=GESTURE_RATE, num_motors=NUM_MOTORS)
+        self.mixer = GestureMixer(NUM_MOTORS, blend)
+        # A virtual clock only moves on the caller's thread, so waiting callers drive playback
+        self.player = GesturePlayer(self.mixer, self.send_frame, GESTURE_TICK, clock, tick_catch_up,
+                                    threaded=not isinstance(clock, VirtualClock))
+        self.handles: List[GestureHandle] = []
+        self.spatial = SpatialRenderer(layout)
+        self.ingest_mode = ingest  # aggregation for submit_contact(), None sends every sample
+        self.ingestor = None
+        self.contacts = ContactTracker(NUM_MOTORS, contact_on, contact_off)
+        # Skips commands that would not change any motor's PWM output
+        self.shadow = DeviceShadow(clock, NUM_MOTORS, keepalive) if suppress_unchanged else None
+        self.recorder = None
+        self.playing_slot = None
+        self.skip_motor_test = skip_motor_test
+        self.ready_timeout = ready_timeout
+        self.reset_on_open = reset_on_open
+        self.ready_status = None
+        self.connect_time = None
+        self.tick_catch_up = tick_catch_up
+        self.last_ticks = None
         
     def connect(self) -> bool:
         """Establish serial connection to Arduino."""
-        if self.port is None:
+        connect_start = self.clock.monotonic()
+        if self.transport is not None:
+            self.port = self.transport.port
+        elif self.port is None:
             self.port = self.find_arduino_port()
             
         if self.port is None:
@@ -33,133 +127,621 @@ class TactHostSimulator:
             return False
             
         try:
-            self.serial_connection = serial.Serial(self.port, self.baud_rate, timeout=1)
-            time.sleep(2)  # Wait for Arduino to initialize
+            self.serial_connection = self.transport or self.open_port()
+            
+            # Wait for the firmware's start-up output instead of a fixed delay. Without a
+            # reset, a running board answers a SYNC probe at once, so only wait briefly
+            first_timeout = (self.ready_timeout if self.reset_on_open
+                             else min(self.ready_timeout, RUNNING_BOARD_TIMEOUT))
+            self.ready_status = wait_for_ready(self.serial_connection, first_timeout,
+                                               self.skip_motor_test, self.trace, clock=self.clock)
+            if not self.ready_status.ready and not self.reset_on_open:
+                # The board may be waiting for DTR before it starts (while (!Serial) in setup)
+                self.serial_connection.dtr = True
+                earlier_lines = self.ready_status.lines
+                self.ready_status = wait_for_ready(self.serial_connection, self.ready_timeout,
+                                                   self.skip_motor_test, self.trace, clock=self.clock)
+                self.ready_status = self.ready_status._replace(lines=earlier_lines + self.ready_status.lines)
+            for line in self.ready_status.lines:
+                print(f"Arduino: {line}")
+            if not self.ready_status.ready:
+                print(f"Warning: Arduino did not report ready within {self.ready_timeout:.1f}s")
             self.is_connected = True
-            print(f"Connected to Arduino on {self.port}")
+            self.contacts.forget()
+            self._forget_device_state()
             
-            # Read initial messages from Arduino
-            for _ in range(10):
-                if self.serial_connection.in_waiting:
-                    response = self.serial_connection.readline().decode().strip()
-                    print(f"Arduino: {response}")
-                time.sleep(0.1)
-                
+            if self.binary_requested:
+                self.negotiate_binary_mode()
+            
+            if self.read_responses:
+                self.reader = DeviceReader(self.serial_connection, self.trace, clock=self.clock)
+                self.reader.add_callback(EVENT_ACK, self._on_ack)
+                self.reader.add_callback(EVENT_PATTERN_ERROR, self._on_pattern_error)
+                for kind, callback in self.pending_callbacks:
+                    self.reader.add_callback(kind, callback)
+                self.reader.start()
+            
+            if self.async_writes:
+                self.writer = LatestValueWriter(self._write_pending)
+                self.writer.start()
+            
+            if self.ingest_mode is not None:
+                self.ingestor = ContactIngestor(self.send_frame, self.num_motors, self.ingest_mode,
+                                                clock=self.clock)
+                self.ingestor.start()
+            
+            self.connect_time = self.clock.monotonic() - connect_start
+            print(f"Connected to Arduino on {self.port} in {self.connect_time:.2f}s")
             return True
         except Exception as e:
             print(f"Error connecting to Arduino: {e}")
             return False
     
-    def find_arduino_port(self) -> str:
-        """Attempt to find Arduino port automatically."""
-        import serial.tools.list_ports
+    def open_port(self) -> serial.Serial:
+        """Open the serial port, optionally without asserting DTR.
         
-        ports = serial.tools.list_ports.comports()
-        for port in ports:
-            if 'Arduino' in port.description or 'USB' in port.description:
-                return port.device
+        Asserting DTR on open resets boards with an auto-reset circuit, which
+        costs the bootloader delay and the firmware's motor test. With
+        reset_on_open=False a board that is already running keeps running.
+        """
+        connection = serial.Serial(timeout=1)
+        connection.port = self.port
+        connection.baudrate = self.baud_rate
+        if not self.reset_on_open:
+            connection.dtr = False
+            connection.rts = False
+        connection.open()
+        return connection
+    
+    def negotiate_binary_mode(self, timeout: float = 1.0) -> bool:
+        """Ask the firmware to accept binary event frames; falls back to CSV."""
+        self.serial_connection.write(MODE_BINARY_COMMAND)
         
-        # Fallback to common port names
-        common_ports = ['/dev/ttyACM0', '/dev/ttyUSB0', 'COM3', 'COM4']
-        for port in common_ports:
-            try:
-                test_serial = serial.Serial(port, self.baud_rate, timeout=0.5)
-                test_serial.close()
-                return port
-            except:
-                continue
-                
-        return None
+        deadline = self.clock.monotonic() + timeout
+        while self.clock.monotonic() < deadline:
+            line = self.serial_connection.readline()
+            if line:
+                self.trace.received(line)
+            response = line.decode(errors='ignore').strip()
+            if response == MODE_BINARY_REPLY:
+                self.protocol_mode = PROTOCOL_BINARY
+                print("Binary protocol enabled")
+                return True
+            if response:
+                print(f"Arduino: {response}")
+        
+        self.protocol_mode = PROTOCOL_CSV
+        print("Firmware did not acknowledge binary mode, using CSV protocol")
+        return False
+    
+    def find_arduino_port(self) -> str:
+        """Attempt to find Arduino port automatically."""
+        return find_tact_port(self.baud_rate)
     
-    def send_touch_event(self, actuator_id: int, penetration_depth: float, first_contact: bool) -> bool:
-        """Send a single touch event to the Arduino."""
+    def send_touch_event(self, actuator_id: int, penetration_depth: float,
+                         first_contact: Optional[bool] = None, force: bool = False) -> bool:
+        """Send a single touch event to the Arduino.
+        
+        Leave first_contact as None to have it derived from the depth; an
+        explicit flag is still dropped if the firmware would ignore it. An
+        event that would not change the motor's output is skipped unless
+        forced.
+        """
         if not self.is_connected:
-            print("Error: Not connected to Arduino")
+            logger.error("Error: Not connected to Arduino")
             return False
             
         # Validate parameters
         if actuator_id < 0 or actuator_id >= self.num_motors:
-            print(f"Error: Invalid actuator ID {actuator_id}")
+            logger.error("Error: Invalid actuator ID %d", actuator_id)
             return False
             
-        penetration_depth = max(0.0, min(1.0, penetration_depth))
-        first_contact_flag = 1 if first_contact else 0
-        
-        # Format CSV message
-        message = f"{actuator_id},{penetration_depth:.2f},{first_contact_flag}\n"
+        self._claim_motor(actuator_id, penetration_depth)
+        with self.send_lock:
+            first_contact = self.contacts.update(actuator_id, penetration_depth, first_contact)
+            if self.shadow is not None and not self.shadow.check_event(actuator_id, penetration_depth,
+                                                                       first_contact, force):
+                return True
+            
+            if self.recorder is not None:
+                self.recorder.record_event(actuator_id, penetration_depth, first_contact)
+            
+            if self.writer is not None:
+                self.writer.submit(actuator_id, penetration_depth, first_contact)
+                return True
+            
+            # Format CSV line or binary frame depending on the negotiated mode
+            sequence = self._next_sequence()
+            message = self.encoders[self.protocol_mode].event(actuator_id, penetration_depth, first_contact,
+                                                              sequence)
+            return self._write_message(message, [sequence])
+    
+    def _claim_motor(self, actuator_id: int, penetration_depth: float):
+        if not self.mixer.idle:
+            # Touch input from the VR engine takes the motor away from ambient gestures
+            self.mixer.preempt(1 << actuator_id, TOUCH_PRIORITY)
+            self.mixer.hold(actuator_id, penetration_depth)
+    
+    def submit_contact(self, actuator_id: int, penetration_depth: float,
+                       first_contact: Optional[bool] = None) -> bool:
+        """Feed one physics-rate contact sample.
         
+        With ingestion enabled, samples are aggregated and sent once per device
+        tick; otherwise each sample is sent as a touch event.
+        """
+        if self.ingestor is None:
+            return self.send_touch_event(actuator_id, penetration_depth, first_contact)
+        if actuator_id < 0 or actuator_id >= self.num_motors:
+            logger.error("Error: Invalid actuator ID %d", actuator_id)
+            return False
+        self._claim_motor(actuator_id, penetration_depth)
+        self.ingestor.submit(actuator_id, penetration_depth, first_contact)
+        return True
+    
+    def _forget_device_state(self):
+        if self.shadow is not None:
+            with self.send_lock:
+                self.shadow.forget()
+    
+    def _next_sequence(self):
+        """Sequence number for the next command in ack mode, None otherwise."""
+        return self.acks.allocate() if self.ack_mode else None
+    
+    def _on_ack(self, event):
+        self.acks.mark_acked(event.sequence, event.timestamp_ns)
+    
+    def _on_pattern_error(self, event):
+        # "Unknown pattern" means the device lost a slot we believed cached (e.g. after a reset)
+        if event.line == "Error: Unknown pattern" and self.playing_slot is not None:
+            self.pattern_cache.invalidate_slot(self.playing_slot)
+    
+    def _write_message(self, message: bytes, sequences: List = ()) -> bool:
+        """Write encoded bytes to the serial port."""
+        sent_ns = self.clock.monotonic_ns()
+        for sequence in sequences:
+            if sequence is not None:
+                self.acks.mark_sent(sequence, sent_ns)
         try:
-            self.serial_connection.write(message.encode())
-            print(f"Sent: {message.strip()}")
-            return True
+            with self.write_lock:
+                self.serial_connection.write(message)
         except Exception as e:
-            print(f"Error sending message: {e}")
+            logger.error("Error sending message: %s", e)
             return False
+        
+        # The trace keeps messages, so it gets its own copy of a reused buffer or slice
+        self.trace.sent(message if isinstance(message, bytes) else bytes(message))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Sent: %s", format_message(message))
+        return True
+    
+    def _write_pending(self, pending: PendingUpdates) -> bool:
+        """Encode a batch of pending actuator updates into a single write."""
+        encoder = self.encoders[self.protocol_mode]
+        if len(pending) == self.num_motors:
+            depths = [pending[motor_id][0] for motor_id in range(self.num_motors)]
+            mask = sum(1 << motor_id for motor_id in range(self.num_motors) if pending[motor_id][1])
+            sequences = [self._next_sequence()]
+            message = encoder.frame(depths, mask, sequences[0])
+        elif not self.ack_mode:
+            # Pre-encoded events copied into the encoder's reusable buffer
+            sequences = []
+            message = encoder.batch((motor_id, depth, first_contact)
+                                    for motor_id, (depth, first_contact) in sorted(pending.items()))
+        else:
+            sequences = [self._next_sequence() for _ in pending]
+            message = b"".join(encoder.event(motor_id, depth, first_contact, sequence)
+                               for (motor_id, (depth, first_contact)), sequence
+                               in zip(sorted(pending.items()), sequences))
+        return self._write_message(message, sequences)
+    
+    def flush(self, timeout: float = 1.0) -> bool:
+        """Wait for queued asynchronous updates to reach the serial port."""
+        if self.writer is None:
+            return True
+        return self.writer.flush(timeout)
+    
+    def send_frame(self, depths: List[float], first_contact_mask: Optional[int] = None,
+                   force: bool = False) -> bool:
+        """Send every actuator's depth for one tick in a single message.
+        
+        Bit N of first_contact_mask marks a first contact on motor N; None
+        derives the mask from the depths. A frame that would not change any
+        motor's output is skipped unless forced.
+        """
+        if not self.is_connected:
+            logger.error("Error: Not connected to Arduino")
+            return False
+            
+        if len(depths) != self.num_motors:
+            logger.error("Error: Frame needs %d depths, got %d", self.num_motors, len(depths))
+            return False
+        with self.send_lock:
+            first_contact_mask = self.contacts.update_frame(depths, first_contact_mask)
+            if self.shadow is not None and not self.shadow.check_frame(depths, first_contact_mask, force):
+                return True
+            
+            if self.recorder is not None:
+                self.recorder.record_frame(depths, first_contact_mask)
+            
+            if self.writer is not None:
+                for motor_id, depth in enumerate(depths):
+                    self.writer.submit(motor_id, depth, bool(first_contact_mask & (1 << motor_id)))
+                return True
+            
+            sequence = self._next_sequence()
+            message = self.encoders[self.protocol_mode].frame(depths, first_contact_mask, sequence)
+            return self._write_message(message, [sequence])
+    
+    def send_contact(self, x: float, y: float, depth: float, first_contact: Optional[bool] = None) -> bool:
+        """Render a contact at (x, y) mm on the motor layout and send it as one frame.
+        
+        An explicit first-contact flag goes to every motor the contact drives;
+        None derives it per motor.
+        """
+        intensities = self.spatial.render(x, y, depth)
+        first_contact_mask = None
+        if first_contact is not None:
+            first_contact_mask = sum(1 << motor_id for motor_id, intensity in enumerate(intensities)
+                                     if first_contact and intensity > 0)
+        return self.send_frame(intensities, first_contact_mask)
+    
+    def sync_clock(self, samples: int = 8, timeout: float = 0.5, loop_period: float = 0.033) -> bool:
+        """Run one round of clock sync exchanges and update the device clock estimate.
+        
+        The firmware only reads serial once per loop, so exchanges are started at
+        evenly spread offsets within the loop period; the one that lands just
+        before the device polls has the shortest round trip and is kept.
+        Needs the reader thread (read_responses=True) to receive the replies.
+        """
+        if not self.is_connected or self.reader is None:
+            logger.error("Error: Clock sync needs a connection with read_responses enabled")
+            return False
+        
+        replies = {}
+        arrived = threading.Event()
+        
+        def on_sync(event):
+            replies[event.sequence] = (event.timestamp_ns, event.device_time)
+            arrived.set()
+        
+        self.reader.add_callback(EVENT_SYNC, on_sync)
+        round_samples = []
+        try:
+            for index in range(samples):
+                self.clock.sleep(loop_period * index / samples)
+                token = self.sync_token
+                self.sync_token += 1
+                arrived.clear()
+                sent_ns = self.clock.monotonic_ns()
+                if not self._write_message(encode_sync_request(token)):
+                    break
+                if not self.clock.wait(arrived, timeout) or token not in replies:
+                    continue
+                received_ns, device_ms = replies.pop(token)
+                round_samples.append(SyncSample(sent_ns, received_ns, device_ms))
+        finally:
+            self.reader.remove_callback(EVENT_SYNC, on_sync)
+        
+        if not round_samples:
+            logger.error("Error: No clock sync replies from device")
+            return False
+        self.clock_sync.add_round(round_samples)
+        logger.info("Clock sync: %s", self.clock_sync.describe())
+        return True
+    
+    def schedule_touch_event(self, when: float, actuator_id: int, penetration_depth: float,
+                             first_contact: Optional[bool] = None) -> bool:
+        """Ask the device to apply a touch event at host time `when` (clock.monotonic())."""
+        if not self.is_connected:
+            logger.error("Error: Not connected to Arduino")
+            return False
+        if actuator_id < 0 or actuator_id >= self.num_motors:
+            logger.error("Error: Invalid actuator ID %d", actuator_id)
+            return False
+        
+        if not self.clock_sync.synchronized:
+            logger.error("Error: Clock is not synchronized; call sync_clock() first")
+            return False
+        
+        device_ms = self.clock_sync.host_to_device(int(when * 1e9))
+        with self.send_lock:
+            first_contact = self.contacts.update(actuator_id, penetration_depth, first_contact)
+            sequence = self._next_sequence()
+            message = self.encoders[self.protocol_mode].event(actuator_id, penetration_depth, first_contact,
+                                                              sequence)
+            self._forget_device_state()
+            return self._write_message(with_schedule(self.protocol_mode, message, device_ms), [sequence])
+    
+    def schedule_frame(self, when: float, depths: List[float], first_contact_mask: Optional[int] = None) -> bool:
+        """Ask the device to apply a frame at host time `when` (clock.monotonic())."""
+        if not self.is_connected:
+            logger.error("Error: Not connected to Arduino")
+            return False
+        if len(depths) != self.num_motors:
+            logger.error("Error: Frame needs %d depths, got %d", self.num_motors, len(depths))
+            return False
+        
+        if not self.clock_sync.synchronized:
+            logger.error("Error: Clock is not synchronized; call sync_clock() first")
+            return False
+        
+        device_ms = self.clock_sync.host_to_device(int(when * 1e9))
+        with self.send_lock:
+            first_contact_mask = self.contacts.update_frame(depths, first_contact_mask)
+            sequence = self._next_sequence()
+            message = self.encoders[self.protocol_mode].frame(depths, first_contact_mask, sequence)
+            self._forget_device_state()
+            return self._write_message(with_schedule(self.protocol_mode, message, device_ms), [sequence])
+    
+    def release_all(self) -> bool:
+        """Stop every motor with one frame."""
+        return self.send_frame([0.0] * self.num_motors)
+    
+    def upload_pattern(self, slot: int, keyframes: Sequence[Keyframe], timeout: float = 1.0) -> bool:
+        """Store a keyframe table in a device pattern slot.
+        
+        Each upload line is acknowledged by the firmware before the next one is
+        sent, so its small serial buffer never overflows.
+        """
+        if not self.is_connected or self.reader is None:
+            logger.error("Error: Pattern upload needs a connection with read_responses enabled")
+            return False
+        
+        replies = []
+        arrived = threading.Event()
+        
+        def on_reply(event):
+            replies.append(event)
+            arrived.set()
+        
+        self.reader.add_callback(EVENT_PATTERN, on_reply)
+        self.reader.add_callback(EVENT_PATTERN_ERROR, on_reply)
+        try:
+            for line in encode_pattern_upload(slot, keyframes):
+                arrived.clear()
+                if not self._write_message(line):
+                    return False
+                if not self.clock.wait(arrived, timeout):
+                    logger.error("Error: No reply while uploading pattern %d", slot)
+                    return False
+                event = replies.pop(0)
+                if event.kind == EVENT_PATTERN_ERROR:
+                    logger.error("Error: Device rejected pattern %d: %s", slot, event.line)
+                    return False
+        finally:
+            self.reader.remove_callback(EVENT_PATTERN, on_reply)
+            self.reader.remove_callback(EVENT_PATTERN_ERROR, on_reply)
+        
+        logger.debug("Uploaded pattern %d (%d keyframes)", slot, len(keyframes))
+        return event.status == "stored"
+    
+    def play_cached_pattern(self, key: Hashable, build_keyframes: Callable[[], List[Keyframe]],
+                            intensity: float = 1.0, time_scale: float = 1.0) -> bool:
+        """Play a gesture from the device pattern cache, uploading it on first use.
+        
+        Returns False if the pattern cannot be cached, in which case the caller
+        should stream the gesture frame by frame instead.
+        """
+        slot = self.pattern_cache.lookup(key)
+        if slot is None:
+            keyframes = build_keyframes()
+            if len(keyframes) > MAX_KEYFRAMES:
+                logger.info("Pattern %s needs %d keyframes, the device holds %d", key, len(keyframes), MAX_KEYFRAMES)
+                return False
+            if keyframes and keyframes[-1].time_ms > MAX_KEYFRAME_TIME_MS:
+                # The device would wrap the times and play the keyframes out of order
+                logger.info("Pattern %s lasts %d ms, the device can time at most %d ms",
+                            key, keyframes[-1].time_ms, MAX_KEYFRAME_TIME_MS)
+                return False
+            slot = self.pattern_cache.allocate(key)
+            if not self.upload_pattern(slot, keyframes):
+                self.pattern_cache.invalidate(key)
+                return False
+        
+        self.playing_slot = slot
+        with self.send_lock:
+            self.contacts.forget()
+            self._forget_device_state()
+            return self._write_message(encode_pattern_play(slot, intensity, time_scale))
+    
+    def stop_pattern(self) -> bool:
+        """Stop on-device pattern playback and release every motor."""
+        if not self.is_connected:
+            logger.error("Error: Not connected to Arduino")
+            return False
+        with self.send_lock:
+            self.contacts.forget()
+            self._forget_device_state()
+            return self._write_message(PATTERN_STOP_COMMAND)
+    
+    def _play_gesture(self, gesture: str, duration: float, intensity: float):
+        """Play a compiled 20 Hz gesture, releasing the motors if interrupted."""
+        try:
+            self._run_gesture(gesture, duration, intensity)
+        except KeyboardInterrupt:
+            self.stop_gestures()
+            raise
+    
+    def _run_gesture(self, gesture: str, duration: float, intensity: float):
+        """Play a gesture from the pattern cache, or stream it frame by frame."""
+        table = self.gestures.compile(gesture, duration, intensity, GESTURE_RATE)
+        if self.cache_patterns:
+            key = (gesture, len(table))
+            
+            def build_keyframes():
+                unit_table = self.gestures.compile(gesture, duration, 1.0, GESTURE_RATE)
+                keyframes = frames_to_keyframes(unit_table.frames(), int(GESTURE_TICK * 1000))
+                return simplify_keyframes(keyframes)
+            
+            if self.play_cached_pattern(key, build_keyframes, intensity):
+                self.clock.sleep(len(table) * GESTURE_TICK)
+                return
+            logger.info("Pattern %s not cached, streaming instead", key)
+        
+        sent = 0
+        for index in self._ticks(GESTURE_TICK, len(table) + 1):
+            if index == len(table):
+                # Turn off all motors
+                self.release_all()
+                break
+            # Keep first-contact pulses from frames the scheduler skipped
+            first_contact_mask = int(np.bitwise_or.reduce(table.first_contact[sent:index + 1]))
+            self.send_frame(table.depths[index].tolist(), first_contact_mask)
+            sent = index + 1
+    
+    def _ticks(self, period: float, count: int) -> Iterator[int]:
+        """Deadline-driven ticks for a gesture; the scheduler is kept for tick_report()."""
+        self.last_ticks = TickScheduler(period, self.clock, self.tick_catch_up)
+        return self.last_ticks.ticks(count)
     
     def gesture_stroke(self, duration: float = 2.0, intensity: float = 0.6):
         """Simulate a stroking gesture across all motors."""
-        print(f"Executing stroke gesture (duration: {duration}s, intensity: {intensity})")
-        
-        steps = int(duration * 20)  # 20 Hz update rate
-        for step in range(steps):
-            for motor_id in range(self.num_motors):
-                # Create wave pattern across motors
-                phase = (step / steps) * 2 * 3.14159  # Full cycle
-                motor_phase = phase + (motor_id * 3.14159 / 2)  # Offset each motor
-                depth = max(0, intensity * (0.5 + 0.5 * abs(math.sin(motor_phase))))
-                
-                first_contact = (step == 0 and motor_id == 0)
-                self.send_touch_event(motor_id, depth, first_contact)
-                
-            time.sleep(0.05)  # 20 Hz
+        logger.info("Executing stroke gesture (duration: %ss, intensity: %s)", duration, intensity)
         
-        # Turn off all motors
-        for motor_id in range(self.num_motors):
-            self.send_touch_event(motor_id, 0.0, False)
+        self._play_gesture('stroke', duration, intensity)
     
     def gesture_pat(self, motor_id: int = 1, intensity: float = 0.8):
         """Simulate a patting gesture on a specific motor."""
-        print(f"Executing pat gesture on motor {motor_id} (intensity: {intensity})")
+        logger.info("Executing pat gesture on motor %d (intensity: %s)", motor_id, intensity)
         
-        # Quick pulse pattern
-        self.send_touch_event(motor_id, intensity, True)  # First contact
-        time.sleep(0.1)
-        self.send_touch_event(motor_id, intensity * 0.7, False)
-        time.sleep(0.1)
-        self.send_touch_event(motor_id, intensity * 0.4, False)
-        time.sleep(0.1)
-        self.send_touch_event(motor_id, 0.0, False)  # Release
+        # Quick pulse pattern: first contact, two decays, release
+        steps = [intensity, intensity * 0.7, intensity * 0.4, 0.0]
+        for index in self._ticks(0.1, len(steps)):
+            self.send_touch_event(motor_id, steps[index])
     
     def gesture_poke(self, motor_id: int = 2, intensity: float = 0.9):
         """Simulate a poking gesture - sharp contact and release."""
-        print(f"Executing poke gesture on motor {motor_id} (intensity: {intensity})")
+        logger.info("Executing poke gesture on motor %d (intensity: %s)", motor_id, intensity)
         
-        self.send_touch_event(motor_id, intensity, True)  # Sharp first contact
-        time.sleep(0.05)
-        self.send_touch_event(motor_id, 0.0, False)  # Quick release
+        for index in self._ticks(0.05, 2):
+            # Sharp first contact, then a quick release
+            self.send_touch_event(motor_id, intensity if index == 0 else 0.0)
     
     def gesture_squeeze(self, duration: float = 1.5, max_intensity: float = 0.7):
         """Simulate a squeezing gesture - gradual pressure increase/decrease."""
-        print(f"Executing squeeze gesture (duration: {duration}s, max intensity: {max_intensity})")
-        
-        steps = int(duration * 20)  # 20 Hz
-        for step in range(steps):
-            # Triangular intensity pattern
-            if step < steps // 2:
-                intensity = (step / (steps // 2)) * max_intensity
-            else:
-                intensity = ((steps - step) / (steps // 2)) * max_intensity
-            
-            # Apply to all motors simultaneously
-            for motor_id in range(self.num_motors):
-                first_contact = (step == 0)
-                self.send_touch_event(motor_id, intensity, first_contact)
-            
-            time.sleep(0.05)  # 20 Hz
+        logger.info("Executing squeeze gesture (duration: %ss, max intensity: %s)", duration, max_intensity)
         
-        # Release all motors
-        for motor_id in range(self.num_motors):
-            self.send_touch_event(motor_id, 0.0, False)
+        self._play_gesture('squeeze', duration, max_intensity)
+    
+    def queue_gesture(self, gesture: str, start: float = 0.0, priority: int = 0,
+                      duration: float = None, intensity: float = None, motor_id: int = None,
+                      preempt: bool = False) -> GestureHandle:
+        """Add a gesture to the mixer timeline, `start` seconds after the next tick.
+        
+        gesture is a built-in gesture or the name of a file in the gesture library.
+        Queued gestures play with the next play_mix(), or right away if other
+        started gestures are already playing. With preempt, gestures of lower
+        priority give up the motors this one drives.
+        """
+        start_tick = self.mixer.tick + int(round(start * GESTURE_RATE))
+        if gesture not in GESTURE_DEFAULTS:
+            table = self.library.compile(gesture).scaled(1.0 if intensity is None else intensity)
+            voice = self.mixer.add(gesture, table, start_tick, table.motor_mask(), priority, preempt)
+            return self._track(voice)
+        
+        default_duration, default_intensity, default_motor = GESTURE_DEFAULTS[gesture]
+        intensity = default_intensity if intensity is None else intensity
+        if gesture in ('pat', 'poke'):
+            motor_id = default_motor if motor_id is None else motor_id
+            compile_single = compile_pat if gesture == 'pat' else compile_poke
+            table = compile_single(motor_id, intensity, GESTURE_RATE, self.num_motors)
+            voice = self.mixer.add(gesture, table, start_tick, 1 << motor_id, priority, preempt)
+        else:
+            duration = default_duration if duration is None else duration
+            table = self.gestures.compile(gesture, duration, intensity, GESTURE_RATE)
+            voice = self.mixer.add(gesture, table, start_tick, priority=priority, preempt=preempt)
+        
+        return self._track(voice)
+    
+    def _track(self, voice) -> GestureHandle:
+        handle = GestureHandle(voice, self.mixer, self.player)
+        self.handles = [h for h in self.handles if not h.done] + [handle]
+        return handle
+    
+    def start_gesture(self, gesture: str, start: float = 0.0, priority: int = 0,
+                      duration: float = None, intensity: float = None, motor_id: int = None,
+                      preempt: bool = False) -> GestureHandle:
+        """Start a gesture without blocking and return a handle to wait for or cancel it.
+        
+        With a virtual clock nothing plays until a handle is waited on or play_mix() runs.
+        """
+        handle = self.queue_gesture(gesture, start, priority, duration, intensity, motor_id, preempt)
+        self.player.start()
+        self.player.notify()
+        return handle
+    
+    def play_mix(self):
+        """Play the mixer timeline, one merged frame per tick, until every gesture has ended."""
+        if not self.is_connected:
+            logger.error("Error: Not connected to Arduino")
+            return
+        
+        logger.info("Mixing %d gestures (%s blend)", len(self.mixer.voices), self.mixer.blend)
+        try:
+            self.player.start()
+            self.player.wait_idle()
+        except KeyboardInterrupt:
+            self.stop_gestures()
+            raise
+        self.last_ticks = self.player.ticker
+    
+    def stop_gestures(self):
+        """Cancel every gesture and release all motors right away."""
+        self.mixer.cancel_all()
+        if self.cache_patterns and self.playing_slot is not None:
+            self.stop_pattern()
+        self.release_all()
+    
+    def play_gesture(self, name: str, intensity: float = 1.0):
+        """Play a gesture from the library and wait for it to finish."""
+        logger.info("Executing library gesture %s (intensity: %s)", name, intensity)
+        try:
+            self.start_gesture(name, intensity=intensity).wait()
+        except KeyboardInterrupt:
+            self.stop_gestures()
+            raise
+        self.last_ticks = self.player.ticker
+    
+    def play_frames(self, frames, rate_hz: float = GESTURE_RATE, first_contact=None) -> int:
+        """Stream a (ticks x motors) depth array, or a .npy file, at rate_hz.
+        
+        The array is validated, quantized and encoded with NumPy a chunk at a
+        time, so each tick only writes a slice of an encoded buffer and a
+        memory-mapped file of any length plays in constant memory. First
+        contacts are derived from the depths unless a mask per row is given.
+        The motors are released at the end. Returns the number of frames sent.
+        """
+        if not self.is_connected:
+            logger.error("Error: Not connected to Arduino")
+            return 0
+        stream = FrameStream(load_frames(frames, self.num_motors), self.encoders[self.protocol_mode],
+                             self.contacts, first_contact)
+        logger.info("Streaming %d frames at %s Hz", len(stream), rate_hz)
+        
+        sent = 0
+        try:
+            for row in self._ticks(1.0 / rate_hz, len(stream)):
+                with self.send_lock:
+                    message, first_contact_mask = stream.message(row)
+                    if self.recorder is not None:
+                        self.recorder.record_frame(stream.depths(row), first_contact_mask)
+                    sequence = self._next_sequence()
+                    if sequence is not None:
+                        message = with_sequence(self.protocol_mode, bytes(message), sequence)
+                    if self._write_message(message, [sequence]):
+                        sent += 1
+        finally:
+            # The frames bypassed the device shadow
+            self._forget_device_state()
+            self.release_all()
+        return sent
+    
+    def gesture_mix_demo(self):
+        """Stroke with a pat and a poke layered on top of it."""
+        self.queue_gesture('stroke', duration=2.0, intensity=0.4)
+        self.queue_gesture('pat', start=0.5, motor_id=1, priority=1)
+        self.queue_gesture('poke', start=1.2, motor_id=3, priority=1)
+        self.play_mix()
     
     def interactive_mode(self):
         """Interactive command-line interface for manual testing."""
@@ -170,7 +752,25 @@ class TactHostSimulator:
         print("  poke [motor_id] - Execute poke gesture (default motor 2)")
         print("  squeeze - Execute squeeze gesture")
         print("  manual [motor_id] [depth] [first_contact] - Send manual command")
+        print("  contact <x> <y> <depth> - Touch a point on the motor layout (mm)")
         print("  test - Run all gesture tests")
+        print("  trace [count] - Show the last messages sent/received (default 20)")
+        print("  events - Show counts of parsed device responses")
+        print("  latency - Show round-trip latency percentiles (requires --ack)")
+        print("  sync - Estimate the device clock offset and drift")
+        print("  patterns - Show device pattern cache usage (requires --cache-patterns)")
+        print("  pstop - Stop on-device pattern playback")
+        print("  ticks - Show tick timing of the last gesture")
+        print("  sent - Show how many unchanged commands were skipped")
+        print("  mix - Play a stroke with a pat and a poke mixed in")
+        print("  bg <gesture> [priority] - Start a built-in or library gesture in the background")
+        print("  gestures - List background gestures and their progress")
+        print("  library - List gestures in the gesture library")
+        print("  record <file>|stop - Record sent commands to a session file")
+        print("  replay <file> [speed] - Replay a session recording")
+        print("  frames <file.npy> [rate] - Stream a (ticks x motors) depth array (default 20 Hz)")
+        print("  play <name> [intensity] - Play a library gesture")
+        print("  cancel - Cancel all gestures and release the motors")
         print("  quit - Exit interactive mode")
         print()
         
@@ -202,12 +802,80 @@ class TactHostSimulator:
                         self.send_touch_event(motor_id, depth, first_contact)
                     else:
                         print("Usage: manual [motor_id] [depth] [first_contact]")
+                elif cmd == 'contact':
+                    if len(command) >= 4:
+                        self.send_contact(float(command[1]), float(command[2]), float(command[3]),
+                                          first_contact=True)
+                    else:
+                        print("Usage: contact <x> <y> <depth>")
                 elif cmd == 'test':
                     self.run_gesture_tests()
+                elif cmd == 'events':
+                    for kind, count in sorted(self.device_event_counts().items()):
+                        print(f"  {kind}: {count}")
+                elif cmd == 'sync':
+                    self.sync_clock()
+                    print(self.clock_sync.describe())
+                elif cmd == 'latency':
+                    print(self.latency_report())
+                elif cmd == 'patterns':
+                    print(self.pattern_cache_report())
+                elif cmd == 'pstop':
+                    self.stop_pattern()
+                elif cmd == 'ticks':
+                    print(self.tick_report())
+                elif cmd == 'sent':
+                    print(self.suppression_report())
+                elif cmd == 'mix':
+                    self.gesture_mix_demo()
+                elif cmd == 'bg':
+                    if len(command) >= 2 and (command[1] in GESTURE_DEFAULTS or command[1] in self.library):
+                        priority = int(command[2]) if len(command) > 2 else 0
+                        print(self.start_gesture(command[1], priority=priority))
+                    else:
+                        print("Usage: bg <gesture> [priority] (built-in or library gesture)")
+                elif cmd == 'record':
+                    if len(command) == 2 and command[1] != 'stop':
+                        self.start_recording(command[1])
+                    elif len(command) == 2:
+                        self.stop_recording()
+                    else:
+                        print("Usage: record <file>|stop")
+                elif cmd == 'replay':
+                    if len(command) >= 2:
+                        speed = float(command[2]) if len(command) > 2 else 1.0
+                        print(self.replay_recording(command[1], speed))
+                    else:
+                        print("Usage: replay <file> [speed]")
+                elif cmd == 'frames':
+                    if len(command) >= 2:
+                        rate = float(command[2]) if len(command) > 2 else GESTURE_RATE
+                        print(f"{self.play_frames(command[1], rate)} frames sent")
+                        print(self.tick_report())
+                    else:
+                        print("Usage: frames <file.npy> [rate]")
+                elif cmd == 'library':
+                    for name in self.library.names():
+                        print(f"  {name}")
+                elif cmd == 'play':
+                    if len(command) >= 2 and command[1] in self.library:
+                        intensity = float(command[2]) if len(command) > 2 else 1.0
+                        self.play_gesture(command[1], intensity)
+                    else:
+                        print("Usage: play <library gesture> [intensity]")
+                elif cmd == 'gestures':
+                    for handle in self.handles:
+                        print(f"  {handle}")
+                elif cmd == 'cancel':
+                    self.stop_gestures()
+                elif cmd == 'trace':
+                    count = int(command[1]) if len(command) > 1 else 20
+                    self.print_trace(count)
                 else:
                     print(f"Unknown command: {cmd}")
                     
             except KeyboardInterrupt:
+                self.stop_gestures()
                 break
             except Exception as e:
                 print(f"Error: {e}")
@@ -218,29 +886,112 @@ class TactHostSimulator:
         
         print("\n1. Testing stroke gesture...")
         self.gesture_stroke(duration=2.0, intensity=0.6)
-        time.sleep(1)
+        self.clock.sleep(1)
         
         print("\n2. Testing pat gestures...")
         for motor_id in range(self.num_motors):
             print(f"   Pat on motor {motor_id}")
             self.gesture_pat(motor_id, 0.8)
-            time.sleep(0.5)
+            self.clock.sleep(0.5)
         
         print("\n3. Testing poke gestures...")
         for motor_id in range(self.num_motors):
             print(f"   Poke on motor {motor_id}")
             self.gesture_poke(motor_id, 0.9)
-            time.sleep(0.5)
+            self.clock.sleep(0.5)
         
         print("\n4. Testing squeeze gesture...")
         self.gesture_squeeze(duration=1.5, max_intensity=0.7)
         
         print("\nGesture tests complete!")
     
+    def on_device_event(self, kind: str, callback):
+        """Register a callback for parsed device events (kind None = all events).
+        
+        Callbacks run on the reader thread started by connect().
+        """
+        self.pending_callbacks.append((kind, callback))
+        if self.reader is not None:
+            self.reader.add_callback(kind, callback)
+    
+    def device_event_counts(self) -> dict:
+        """Number of parsed device events seen so far, by kind."""
+        return self.reader.counts() if self.reader is not None else {}
+    
+    def latency_report(self) -> str:
+        """Summary of round-trip latency measured from device acks."""
+        if not self.ack_mode:
+            return "Ack mode is off; start with --ack to measure round-trip latency"
+        return self.acks.report()
+    
+    def pattern_cache_report(self) -> str:
+        """Summary of device pattern cache usage."""
+        if not self.cache_patterns:
+            return "Pattern caching is off; start with --cache-patterns to use it"
+        cache = self.pattern_cache
+        return (f"{len(cache.entries)}/{cache.slots} slots used | {cache.hits} hits, "
+                f"{cache.misses} misses, {cache.evictions} evictions")
+    
+    def suppression_report(self) -> str:
+        """How many commands the device shadow let through or skipped."""
+        if self.shadow is None:
+            return "Change suppression is off"
+        total = self.shadow.sent + self.shadow.suppressed
+        share = self.shadow.suppressed / total if total else 0.0
+        return f"{self.shadow.sent} commands sent, {self.shadow.suppressed} unchanged skipped ({share:.0%})"
+    
+    def tick_report(self) -> str:
+        """Timing of the last streamed gesture against its deadlines."""
+        if self.last_ticks is None:
+            return "No gesture has been streamed yet"
+        return self.last_ticks.report()
+    
+    def start_recording(self, path: str):
+        """Append every touch event and frame sent from now on to a session recording."""
+        self.stop_recording()
+        self.recorder = SessionRecorder(path, self.clock)
+        print(f"Recording to {path}")
+    
+    def stop_recording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            print(f"Recorded {self.recorder.recorded} commands to {self.recorder.path}")
+            self.recorder = None
+    
+    def replay_recording(self, path: str, speed: float = 1.0) -> str:
+        """Re-send a session recording on its original schedule (speed None: unpaced)."""
+        replayer = SessionReplayer(path)
+        info = replayer.info()
+        logger.info("Replaying %d records (%.1fs) from %s", info.records, info.duration, path)
+        replayer.replay(self, speed)
+        return replayer.report()
+    
+    def dump_trace(self, count: int = None) -> List[str]:
+        """Return the last traced messages as formatted lines."""
+        return self.trace.dump(count)
+    
+    def print_trace(self, count: int = None):
+        """Print the last traced messages."""
+        for line in self.dump_trace(count):
+            print(line)
+    
     def disconnect(self):
         """Close serial connection."""
+        self.player.stop()
+        if self.ingestor is not None:
+            self.ingestor.stop()
+            self.ingestor = None
+        self.stop_recording()
+        if self.writer is not None:
+            self.writer.stop(flush=True)
+            self.writer = None
+        if self.reader is not None:
+            self.reader.running = False
         if self.serial_connection:
             self.serial_connection.close()
+            if self.reader is not None:
+                self.reader.stop()
+                self.reader = None
             self.is_connected = False
             print("Disconnected from Arduino")
 
@@ -253,34 +1004,97 @@ def main():
     parser.add_argument('--baud', type=int, default=115200, help='Baud rate (default: 115200)')
     parser.add_argument('--test', action='store_true', help='Run gesture tests and exit')
     parser.add_argument('--interactive', action='store_true', help='Start interactive mode')
+    parser.add_argument('--binary', action='store_true', help='Negotiate the compact binary protocol')
+    parser.add_argument('--async-writes', action='store_true',
+                        help='Send from a background thread, dropping superseded values')
+    parser.add_argument('--ack', action='store_true',
+                        help='Request acks from the device and measure round-trip latency')
+    parser.add_argument('--cache-patterns', action='store_true',
+                        help='Upload gestures to the device once and trigger them by id')
+    parser.add_argument('--skip-motor-test', action='store_true',
+                        help='Ask the firmware to skip its power-on motor test')
+    parser.add_argument('--no-reset', action='store_true',
+                        help='Open the port without asserting DTR so the board is not reset')
+    parser.add_argument('--virtual', action='store_true',
+                        help='Drive the firmware model on a virtual clock instead of hardware')
+    parser.add_argument('--catch-up', default=CATCH_UP_SKIP, choices=CATCH_UP_POLICIES,
+                        help='What a late gesture does with missed ticks (default: skip)')
+    parser.add_argument('--blend', default=BLEND_MAX, choices=BLEND_RULES,
+                        help='How overlapping mixed gestures combine per motor (default: max)')
+    parser.add_argument('--gesture-dir', default=DEFAULT_LIBRARY_DIR,
+                        help='Directory of keyframe gesture files (default: host-app/gestures)')
+    parser.add_argument('--layout', default=BACK_OF_HAND_LAYOUT.name, choices=sorted(LAYOUTS),
+                        help='Motor placement used for spatial contacts (default: back_of_hand)')
+    parser.add_argument('--send-all', action='store_true',
+                        help='Send every command, even ones that would not change any motor')
+    parser.add_argument('--keepalive', type=float, default=DEFAULT_KEEPALIVE,
+                        help='Resend an unchanged motor after this many seconds; 0 never (default: 1.0)')
+    parser.add_argument('--record', metavar='FILE',
+                        help='Record every touch event and frame sent to a session file')
+    parser.add_argument('--replay', metavar='FILE', help='Replay a session recording and exit')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='Replay speed multiplier; 0 sends as fast as possible (default: 1.0)')
+    parser.add_argument('--frames', metavar='FILE',
+                        help='Stream a .npy (ticks x motors) depth array and exit')
+    parser.add_argument('--frame-rate', type=float, default=GESTURE_RATE,
+                        help='Rate for --frames in Hz (default: 20)')
+    parser.add_argument('--log-level', default='INFO',
+                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help='Console log level; DEBUG prints every message (default: INFO)')
     
     args = parser.parse_args()
+    logging.basicConfig(level=getattr(logging, args.log_level), format='%(message)s')
+    
+    clock, transport = SYSTEM_CLOCK, None
+    if args.virtual:
+        clock = VirtualClock()
+        transport = InMemoryTransport(clock)
     
     # Create simulator instance
-    simulator = TactHostSimulator(port=args.port, baud_rate=args.baud)
+    simulator = TactHostSimulator(port=args.port, baud_rate=args.baud, binary=args.binary,
+                                  async_writes=args.async_writes, ack_mode=args.ack,
+                                  cache_patterns=args.cache_patterns,
+                                  skip_motor_test=args.skip_motor_test,
+                                  reset_on_open=not args.no_reset, clock=clock, transport=transport,
+                                  tick_catch_up=args.catch_up, blend=args.blend,
+                                  gesture_dir=args.gesture_dir, layout=LAYOUTS[args.layout],
+                                  suppress_unchanged=not args.send_all, keepalive=args.keepalive)
     
     # Connect to Arduino
     if not simulator.connect():
         sys.exit(1)
     
+    if args.record:
+        simulator.start_recording(args.record)
+    
     try:
-        if args.test:
+        if args.replay:
+            print(simulator.replay_recording(args.replay, args.speed or None))
+        elif args.frames:
+            print(f"{simulator.play_frames(args.frames, args.frame_rate)} frames sent")
+            print(simulator.tick_report())
+        elif args.test:
             simulator.run_gesture_tests()
         elif args.interactive:
             simulator.interactive_mode()
         else:
             # Default: run a quick demo
             print("Running quick demo...")
-            time.sleep(1)
+            simulator.clock.sleep(1)
             simulator.gesture_poke(0)
-            time.sleep(1)
+            simulator.clock.sleep(1)
             simulator.gesture_pat(1)
-            time.sleep(1)
+            simulator.clock.sleep(1)
             simulator.gesture_stroke()
             print("Demo complete. Use --interactive for manual control.")
+        
+        if args.ack:
+            simulator.acks.wait_for_acks()
+            print(simulator.latency_report())
             
     except KeyboardInterrupt:
         print("\nInterrupted by user")
+        simulator.stop_gestures()
     finally:
         simulator.disconnect()
 
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Tact Contact Ingestion
+Downsamples physics-rate contact samples to one frame per device tick.
+
+A VR engine reports penetration depths at 90-120 Hz per collider, but the
+firmware only reads serial once per ~33 ms loop. ContactAggregator collects
+every sample for an actuator in the current window and reduces them to one
+value when the window closes:
+
+    max   - the deepest sample (max-hold), so short taps are never lost
+    mean  - the average of the samples
+    last  - the most recent sample
+
+An actuator with no samples in a window keeps its last depth, and a first
+contact flagged anywhere in the window is carried into that window's frame
+mask (samples without a flag leave the edges to the contact tracker).
+ContactIngestor closes a window on every device tick (on a background thread
+for the system clock, on clock timers for a virtual clock) and sends it as a
+single frame, so the serial bandwidth is one frame per tick however fast the
+samples arrive. Nothing is sent while every motor is released and no samples
+arrive.
+"""
+
+import threading
+from typing import Callable, List, Optional, Tuple
+
+from tact_clock import SYSTEM_CLOCK, VirtualClock
+from tact_protocol import NUM_MOTORS
+from tact_ticker import CATCH_UP_SKIP, TickScheduler
+
+AGGREGATE_MAX = 'max'
+AGGREGATE_MEAN = 'mean'
+AGGREGATE_LAST = 'last'
+AGGREGATIONS = (AGGREGATE_MAX, AGGREGATE_MEAN, AGGREGATE_LAST)
+
+DEVICE_TICK = 0.033  # seconds, one firmware loop
+
+
+class ContactAggregator:
+    """Per-actuator accumulators for the current window."""
+
+    def __init__(self, num_motors: int = NUM_MOTORS, mode: str = AGGREGATE_MAX):
+        if mode not in AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation: {mode}")
+        self.num_motors = num_motors
+        self.mode = mode
+        self.lock = threading.Lock()
+        self.peak = [0.0] * num_motors
+        self.total = [0.0] * num_motors
+        self.count = [0] * num_motors
+        self.depths = [0.0] * num_motors   # last value of each actuator, held across empty windows
+        self.first_contact: Optional[int] = None  # None until a sample carries an explicit flag
+
+        # Statistics
+        self.samples = 0
+        self.windows = 0
+
+    def submit(self, actuator_id: int, penetration_depth: float, first_contact: Optional[bool] = None):
+        with self.lock:
+            if self.count[actuator_id]:
+                self.peak[actuator_id] = max(self.peak[actuator_id], penetration_depth)
+            else:
+                self.peak[actuator_id] = penetration_depth
+            self.total[actuator_id] += penetration_depth
+            self.count[actuator_id] += 1
+            self.depths[actuator_id] = penetration_depth
+            if first_contact is not None:
+                self.first_contact = (self.first_contact or 0) | (int(first_contact) << actuator_id)
+            self.samples += 1
+
+    @property
+    def active(self) -> bool:
+        """True if the next window has something to send."""
+        with self.lock:
+            return any(self.count) or any(depth > 0 for depth in self.depths)
+
+    def close_window(self) -> Tuple[List[float], Optional[int]]:
+        """One (depths, first_contact_mask) frame for the window, then start a new one.
+
+        The mask is None if no sample in the window gave a flag, leaving the
+        edges to be derived from the depths.
+        """
+        with self.lock:
+            depths = []
+            for motor_id in range(self.num_motors):
+                count = self.count[motor_id]
+                if not count or self.mode == AGGREGATE_LAST:
+                    depths.append(self.depths[motor_id])
+                elif self.mode == AGGREGATE_MAX:
+                    depths.append(self.peak[motor_id])
+                else:
+                    depths.append(self.total[motor_id] / count)
+            first_contact = self.first_contact
+
+            self.total = [0.0] * self.num_motors
+            self.count = [0] * self.num_motors
+            self.first_contact = None
+            self.windows += 1
+            return depths, first_contact
+
+
+class ContactIngestor:
+    """Sends one aggregated frame per device tick while contacts are active."""
+
+    def __init__(self, send_frame: Callable[[List[float], Optional[int]], bool], num_motors: int = NUM_MOTORS,
+                 mode: str = AGGREGATE_MAX, period: float = DEVICE_TICK, clock=SYSTEM_CLOCK):
+        self.aggregator = ContactAggregator(num_motors, mode)
+        self.send_frame = send_frame
+        self.period = period
+        self.period_ns = int(round(period * 1e9))
+        self.clock = clock
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+        self.ticker: Optional[TickScheduler] = None
+
+        # Statistics
+        self.frames_sent = 0
+
+    def submit(self, actuator_id: int, penetration_depth: float, first_contact: Optional[bool] = None):
+        """Add a physics-rate sample; it is sent with the next device tick."""
+        self.aggregator.submit(actuator_id, penetration_depth, first_contact)
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        if isinstance(self.clock, VirtualClock):
+            # A virtual clock has no second thread to tick on; use its timers instead
+            self.clock.call_at(self.clock.monotonic_ns() + self.period_ns, self._virtual_tick)
+            return
+        self.thread = threading.Thread(target=self._run, name="tact-ingest", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        """Stop ticking; samples still in the open window are sent first."""
+        if not self.running:
+            return
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+        self.tick()
+
+    def tick(self) -> bool:
+        """Close the current window and send it; False if there was nothing to send."""
+        if not self.aggregator.active:
+            return False
+        self.send_frame(*self.aggregator.close_window())
+        self.frames_sent += 1
+        return True
+
+    def _run(self):
+        self.ticker = TickScheduler(self.period, self.clock, CATCH_UP_SKIP)
+        for _ in self.ticker.ticks():
+            if not self.running:
+                return
+            self.tick()
+
+    def _virtual_tick(self):
+        if not self.running:
+            return
+        self.tick()
+        self.clock.call_at(self.clock.monotonic_ns() + self.period_ns, self._virtual_tick)
+
+    def report(self) -> str:
+        aggregator = self.aggregator
+        return (f"{aggregator.samples} samples -> {self.frames_sent} frames "
+                f"({aggregator.mode}, {1 / self.period:.1f} Hz)")
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Tact Latency Measurement
+Round-trip latency tracking for sequence-numbered commands.
+
+Commands sent in ack mode carry a sequence number that the firmware echoes as
+"Ack: <seq>" once applied. AckTracker pairs each ack with its send time and
+records the round trip in a LatencyHistogram.
+
+LatencyHistogram follows the HDR histogram layout: values below 2 * SUB_BUCKETS
+are counted exactly, and above that every power-of-two range is split into
+SUB_BUCKETS linear buckets, so the relative error stays under 1 / SUB_BUCKETS
+at any magnitude while memory stays proportional to the number of distinct
+buckets hit.
+"""
+
+import collections
+import threading
+from typing import Dict, Optional
+
+from tact_clock import SYSTEM_CLOCK
+from tact_protocol import SEQUENCE_MODULO
+
+SUB_BUCKET_BITS = 7
+SUB_BUCKETS = 1 << (SUB_BUCKET_BITS - 1)  # linear buckets per power of two
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = collections.Counter()
+        self.count = 0
+        self.total = 0
+        self.min_value = None
+        self.max_value = None
+
+    @staticmethod
+    def bucket_index(value: int) -> int:
+        if value < 2 * SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - SUB_BUCKET_BITS
+        return 2 * SUB_BUCKETS + (shift - 1) * SUB_BUCKETS + ((value >> shift) - SUB_BUCKETS)
+
+    @staticmethod
+    def bucket_value(index: int) -> int:
+        """Highest value that maps to the given bucket."""
+        if index < 2 * SUB_BUCKETS:
+            return index
+        shift = (index - 2 * SUB_BUCKETS) // SUB_BUCKETS + 1
+        sub_bucket = (index - 2 * SUB_BUCKETS) % SUB_BUCKETS + SUB_BUCKETS
+        return ((sub_bucket + 1) << shift) - 1
+
+    def record(self, value: int):
+        """Record a non-negative integer value (e.g. microseconds)."""
+        value = max(0, int(value))
+        self.counts[self.bucket_index(value)] += 1
+        self.count += 1
+        self.total += value
+        self.min_value = value if self.min_value is None else min(self.min_value, value)
+        self.max_value = value if self.max_value is None else max(self.max_value, value)
+
+    def reset(self):
+        self.__init__()
+
+    def percentile(self, percent: float) -> Optional[int]:
+        """Value at the given percentile (0-100), accurate to the bucket width."""
+        if self.count == 0:
+            return None
+        target = max(1, int(round(self.count * percent / 100.0)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self.bucket_value(index), self.max_value)
+        return self.max_value
+
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        return {
+            'count': self.count,
+            'min': self.min_value,
+            'mean': self.mean(),
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'max': self.max_value,
+        }
+
+
+class AckTracker:
+    """Pairs sent sequence numbers with device acks and records round trips."""
+
+    def __init__(self, timeout: float = 2.0, clock=SYSTEM_CLOCK):
+        self.clock = clock
+        self.timeout_ns = int(timeout * 1e9)
+        self.histogram = LatencyHistogram()  # microseconds
+        self.lock = threading.Lock()
+        self.in_flight: Dict[int, int] = {}
+        self.next_sequence = 0
+        self.sent = 0
+        self.acked = 0
+        self.lost = 0
+        self.unexpected = 0
+
+    def allocate(self) -> int:
+        """Reserve the next sequence number."""
+        with self.lock:
+            sequence = self.next_sequence
+            self.next_sequence = (sequence + 1) % SEQUENCE_MODULO
+            return sequence
+
+    def mark_sent(self, sequence: int, timestamp_ns: Optional[int] = None):
+        """Record when a sequenced command was written to the port."""
+        timestamp_ns = self.clock.monotonic_ns() if timestamp_ns is None else timestamp_ns
+        with self.lock:
+            if sequence in self.in_flight:
+                self.lost += 1
+            self.in_flight[sequence] = timestamp_ns
+            self.sent += 1
+
+    def mark_acked(self, sequence: int, timestamp_ns: Optional[int] = None) -> Optional[int]:
+        """Record an ack; returns the round trip in microseconds if it matched."""
+        timestamp_ns = self.clock.monotonic_ns() if timestamp_ns is None else timestamp_ns
+        with self.lock:
+            sent_ns = self.in_flight.pop(sequence, None)
+            if sent_ns is None:
+                self.unexpected += 1
+                return None
+            round_trip_us = (timestamp_ns - sent_ns) // 1000
+            self.histogram.record(round_trip_us)
+            self.acked += 1
+            return round_trip_us
+
+    def expire(self, now_ns: Optional[int] = None) -> int:
+        """Count commands that have waited longer than the timeout as lost."""
+        now_ns = self.clock.monotonic_ns() if now_ns is None else now_ns
+        with self.lock:
+            expired = [seq for seq, sent_ns in self.in_flight.items()
+                       if now_ns - sent_ns > self.timeout_ns]
+            for sequence in expired:
+                del self.in_flight[sequence]
+            self.lost += len(expired)
+            return len(expired)
+
+    def wait_for_acks(self, timeout: float = 1.0) -> bool:
+        """Poll until every in-flight command is acked or the timeout passes."""
+        deadline = self.clock.monotonic() + timeout
+        while self.clock.monotonic() < deadline:
+            with self.lock:
+                if not self.in_flight:
+                    return True
+            self.clock.sleep(0.005)
+        return False
+
+    def reset(self):
+        with self.lock:
+            self.histogram.reset()
+            self.in_flight.clear()
+            self.sent = self.acked = self.lost = self.unexpected = 0
+
+    def report(self) -> str:
+        """One-line latency summary in milliseconds."""
+        self.expire()
+        stats = self.histogram.summary()
+        if not stats['count']:
+            return f"No acks received ({self.sent} sent, {self.lost} lost)"
+
+        def ms(value):
+            return f"{value / 1000:.2f}"
+
+        return (f"{self.acked}/{self.sent} acked, {self.lost} lost | round trip ms: "
+                f"p50 {ms(stats['p50'])}, p95 {ms(stats['p95'])}, "
+                f"p99 {ms(stats['p99'])}, max {ms(stats['max'])}")
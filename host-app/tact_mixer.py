@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Tact Gesture Mixer
+Blends overlapping gestures into one frame per tick.
+
+Each gesture instance is a Voice: a compiled GestureTable placed on the
+mixer's tick timeline, the set of motors it drives and a priority. mix()
+combines the rows of every voice active on a tick into a single frame using
+the blend rule:
+
+    max       - each motor takes the strongest contribution
+    sum       - contributions add up, clamped to full depth
+    priority  - each motor follows its highest-priority voice (latest wins ties)
+
+A motor no voice covers is sent as 0, and once every voice has ended one final
+all-zero frame releases the motors, after which mix() returns None until
+something new is added. However many gestures overlap, the device receives
+one frame per tick.
+
+Voices can be cancelled, or preempted on some motors by something of higher
+priority, at any time; the next frame releases the motors they gave up.
+Touch events sent directly while gestures play are held as overrides so that
+mixed frames do not overwrite them. GesturePlayer runs the mixer on its tick
+deadlines, on a background thread for the system clock or on the waiting
+caller's thread for a virtual clock, and GestureHandle is what callers get
+back to follow, wait for or cancel a gesture.
+"""
+
+import itertools
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from tact_clock import SYSTEM_CLOCK
+from tact_gestures import GestureTable
+from tact_protocol import NUM_MOTORS
+from tact_ticker import CATCH_UP_SKIP, TickScheduler
+
+BLEND_MAX = 'max'
+BLEND_SUM = 'sum'
+BLEND_PRIORITY = 'priority'
+BLEND_RULES = (BLEND_MAX, BLEND_SUM, BLEND_PRIORITY)
+
+# Voice states
+VOICE_PLAYING = 'playing'      # queued or running
+VOICE_DONE = 'done'
+VOICE_CANCELLED = 'cancelled'
+VOICE_PREEMPTED = 'preempted'  # lost all of its motors to higher-priority input
+
+
+class Voice:
+    """One gesture instance on the mixer timeline."""
+
+    def __init__(self, name: str, table: GestureTable, start_tick: int, motor_mask: int,
+                 priority: int, order: int, num_motors: int = NUM_MOTORS):
+        self.name = name
+        self.table = table
+        self.start_tick = start_tick
+        self.num_motors = num_motors
+        self.priority = priority
+        self.order = order
+        self.state = VOICE_PLAYING
+        self.finished = threading.Event()
+        self.set_motors(motor_mask)
+
+    def set_motors(self, motor_mask: int):
+        self.motor_mask = motor_mask
+        self.motors = np.array([bool(motor_mask & (1 << motor_id)) for motor_id in range(self.num_motors)])
+
+    def finish(self, state: str):
+        self.state = state
+        self.finished.set()
+
+    @property
+    def end_tick(self) -> int:
+        return self.start_tick + len(self.table)
+
+    def first_contact(self, first_tick: int, tick: int) -> int:
+        """First-contact bits of this voice from first_tick through tick."""
+        start = max(first_tick, self.start_tick) - self.start_tick
+        rows = self.table.first_contact[start:tick - self.start_tick + 1]
+        return int(np.bitwise_or.reduce(rows)) & self.motor_mask if len(rows) else 0
+
+
+class GestureMixer:
+    def __init__(self, num_motors: int = NUM_MOTORS, blend: str = BLEND_MAX):
+        if blend not in BLEND_RULES:
+            raise ValueError(f"Unknown blend rule: {blend}")
+        self.num_motors = num_motors
+        self.blend = blend
+        self.lock = threading.RLock()
+        self.voices: List[Voice] = []
+        self.holds: Dict[int, float] = {}  # motor -> depth of a direct touch event
+        self.tick = 0         # next tick to mix
+        self.live_mask = 0    # motors the last frame drove for a voice
+        self.voice_order = itertools.count()
+
+        # Statistics
+        self.frames_mixed = 0
+        self.voices_added = 0
+        self.cancelled = 0
+        self.preempted = 0
+
+    def add(self, name: str, table: GestureTable, start_tick: Optional[int] = None,
+            motor_mask: Optional[int] = None, priority: int = 0, preempt: bool = False) -> Voice:
+        """Place a gesture on the timeline, by default starting at the next tick.
+
+        With preempt, lower-priority voices give up the motors this one drives.
+        """
+        if motor_mask is None:
+            motor_mask = (1 << self.num_motors) - 1
+        with self.lock:
+            start_tick = self.tick if start_tick is None else max(start_tick, self.tick)
+            if preempt:
+                self.preempt(motor_mask, priority)
+            voice = Voice(name, table, start_tick, motor_mask, priority, next(self.voice_order),
+                          self.num_motors)
+            self.voices.append(voice)
+            self.voices_added += 1
+            return voice
+
+    def cancel(self, voice: Voice) -> bool:
+        """Stop a voice; the next frame releases its motors."""
+        with self.lock:
+            if voice not in self.voices:
+                return False
+            self.voices.remove(voice)
+            self.cancelled += 1
+            voice.finish(VOICE_CANCELLED)
+            return True
+
+    def cancel_all(self):
+        with self.lock:
+            for voice in list(self.voices):
+                self.cancel(voice)
+            self.holds.clear()
+
+    def preempt(self, motor_mask: int, priority: int) -> List[Voice]:
+        """Take motors away from voices below the given priority; returns the voices affected."""
+        affected = []
+        with self.lock:
+            for voice in list(self.voices):
+                if voice.priority >= priority or not voice.motor_mask & motor_mask:
+                    continue
+                affected.append(voice)
+                voice.set_motors(voice.motor_mask & ~motor_mask)
+                if not voice.motor_mask:
+                    self.voices.remove(voice)
+                    self.preempted += 1
+                    voice.finish(VOICE_PREEMPTED)
+        return affected
+
+    def hold(self, motor_id: int, depth: float):
+        """Keep a directly sent touch depth on a motor while gestures play (0 lets go)."""
+        with self.lock:
+            if depth > 0:
+                self.holds[motor_id] = depth
+            else:
+                self.holds.pop(motor_id, None)
+
+    def end_tick(self) -> int:
+        """First tick at which every voice has ended."""
+        with self.lock:
+            return max((voice.end_tick for voice in self.voices), default=self.tick)
+
+    @property
+    def idle(self) -> bool:
+        return not self.voices and not self.live_mask
+
+    def mix(self, tick: Optional[int] = None) -> Optional[Tuple[List[float], int]]:
+        """Merged (depths, first_contact_mask) for a tick, or None if there is nothing to send.
+
+        Passing a later tick than the next one skips the ticks in between; their
+        first-contact bits are carried into this frame.
+        """
+        with self.lock:
+            tick = self.tick if tick is None else max(tick, self.tick)
+            first_tick = self.tick
+            for voice in self.voices:
+                if voice.end_tick <= tick:
+                    voice.finish(VOICE_DONE)
+            self.voices = [voice for voice in self.voices if voice.end_tick > tick]
+            active = [voice for voice in self.voices if voice.start_tick <= tick < voice.end_tick]
+            if self.blend == BLEND_PRIORITY:
+                active.sort(key=lambda voice: (voice.priority, voice.order))
+
+            depths = np.zeros(self.num_motors, dtype=np.float32)
+            first_contact = 0
+            covered = 0
+            for voice in active:
+                row = voice.table.depths[tick - voice.start_tick]
+                if self.blend == BLEND_MAX:
+                    depths = np.where(voice.motors, np.maximum(depths, row), depths)
+                elif self.blend == BLEND_SUM:
+                    depths = np.where(voice.motors, depths + row, depths)
+                else:
+                    depths = np.where(voice.motors, row, depths)
+                    first_contact &= ~voice.motor_mask
+                first_contact |= voice.first_contact(first_tick, tick)
+                covered |= voice.motor_mask
+
+            # Held touch depths override every voice on their motor
+            for motor_id, depth in self.holds.items():
+                depths[motor_id] = depth
+                first_contact &= ~(1 << motor_id)
+
+            self.tick = tick + 1
+            send = covered or self.live_mask
+            self.live_mask = covered
+            if not self.voices:
+                # Direct touch events own their motors again once no gesture plays
+                self.holds.clear()
+            if not send:
+                return None
+            self.frames_mixed += 1
+            return np.minimum(depths, 1.0).tolist(), first_contact
+
+
+class GesturePlayer:
+    """Sends mixer frames on tick deadlines until the mixer runs out of gestures."""
+
+    def __init__(self, mixer: GestureMixer, send_frame: Callable[[List[float], int], bool],
+                 period: float, clock=SYSTEM_CLOCK, catch_up: str = CATCH_UP_SKIP,
+                 threaded: bool = True):
+        self.mixer = mixer
+        self.send_frame = send_frame
+        self.period = period
+        self.clock = clock
+        self.catch_up = catch_up
+        self.threaded = threaded
+        self.wake = threading.Condition(mixer.lock)
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+        self.ticker: Optional[TickScheduler] = None  # last run, for tick reports
+
+    def start(self):
+        """Start the background thread (threaded players only)."""
+        if not self.threaded or self.thread is not None:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="tact-gestures", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        self.running = False
+        self.notify()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+
+    def notify(self):
+        """Wake the background thread after gestures were added."""
+        with self.wake:
+            self.wake.notify_all()
+
+    def _run(self):
+        while self.running:
+            with self.wake:
+                while self.running and self.mixer.idle:
+                    self.wake.wait()
+            self.run_until(lambda: self.mixer.idle or not self.running)
+            self.notify()
+
+    def run_until(self, condition: Callable[[], bool], timeout: Optional[float] = None) -> bool:
+        """Mix and send frames on the calling thread until condition() or the timeout."""
+        if condition():
+            return True
+        deadline_ns = None if timeout is None else self.clock.monotonic_ns() + int(timeout * 1e9)
+        first_tick = self.mixer.tick
+        self.ticker = TickScheduler(self.period, self.clock, self.catch_up)
+        for index in self.ticker.ticks():
+            frame = self.mixer.mix(first_tick + index)
+            if frame is not None:
+                self.send_frame(*frame)
+            if condition():
+                return True
+            if deadline_ns is not None and self.clock.monotonic_ns() >= deadline_ns:
+                return False
+        return condition()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until every gesture has ended and its motors are released."""
+        if self.threaded and self.thread is not None:
+            with self.wake:
+                self.wake.notify_all()
+                return self.wake.wait_for(lambda: self.mixer.idle, timeout)
+        return self.run_until(lambda: self.mixer.idle, timeout)
+
+    def wait(self, voice: Voice, timeout: Optional[float] = None) -> bool:
+        """Block until a voice has finished; drives the mixer itself when not threaded."""
+        if self.threaded and self.thread is not None:
+            if timeout is None:
+                return voice.finished.wait()
+            return self.clock.wait(voice.finished, timeout)
+        return self.run_until(voice.finished.is_set, timeout)
+
+
+class GestureHandle:
+    """A running gesture: follow its progress, wait for it or cancel it."""
+
+    def __init__(self, voice: Voice, mixer: GestureMixer, player: GesturePlayer):
+        self.voice = voice
+        self.mixer = mixer
+        self.player = player
+
+    @property
+    def name(self) -> str:
+        return self.voice.name
+
+    @property
+    def priority(self) -> int:
+        return self.voice.priority
+
+    @property
+    def state(self) -> str:
+        return self.voice.state
+
+    @property
+    def done(self) -> bool:
+        return self.voice.finished.is_set()
+
+    @property
+    def progress(self) -> float:
+        """Fraction of the gesture played so far (1.0 once finished)."""
+        if self.done:
+            return 1.0
+        played = self.mixer.tick - self.voice.start_tick
+        return min(1.0, max(0.0, played / max(1, len(self.voice.table))))
+
+    def cancel(self) -> bool:
+        """Stop the gesture; its motors are released on the next tick."""
+        return self.mixer.cancel(self.voice)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the gesture to end; True if it ended within the timeout."""
+        return self.player.wait(self.voice, timeout)
+
+    def __repr__(self):
+        return f"<GestureHandle {self.name} {self.state} {self.progress:.0%} priority {self.priority}>"
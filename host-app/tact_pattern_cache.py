@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tact Pattern Cache
+Host-side bookkeeping for gesture patterns stored on the device.
+
+A gesture is compiled once into a keyframe table, uploaded into one of the
+device's numbered pattern slots and afterwards triggered with a single PLAY
+command. PatternCache remembers which gesture lives in which slot and evicts
+the least recently used one when every slot is taken.
+"""
+
+import collections
+from typing import Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from tact_protocol import PATTERN_SLOTS, Keyframe, quantize_depth
+
+
+class PatternCache:
+    def __init__(self, slots: int = PATTERN_SLOTS):
+        self.slots = slots
+        self.entries = collections.OrderedDict()  # key -> slot, least recently used first
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, key: Hashable) -> Optional[int]:
+        """Slot holding the pattern for key, marking it as recently used."""
+        slot = self.entries.get(key)
+        if slot is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return slot
+
+    def allocate(self, key: Hashable) -> int:
+        """Reserve a slot for key, evicting the least recently used pattern if needed."""
+        used = set(self.entries.values())
+        free = [slot for slot in range(self.slots) if slot not in used]
+        if free:
+            slot = free[0]
+        else:
+            _, slot = self.entries.popitem(last=False)
+            self.evictions += 1
+        self.entries[key] = slot
+        return slot
+
+    def invalidate(self, key: Hashable):
+        """Forget a pattern, e.g. after a failed upload."""
+        self.entries.pop(key, None)
+
+    def invalidate_slot(self, slot: int):
+        """Forget whatever pattern the host believed was in a device slot."""
+        for key, cached_slot in list(self.entries.items()):
+            if cached_slot == slot:
+                del self.entries[key]
+
+    def clear(self):
+        self.entries.clear()
+
+
+def frames_to_keyframes(frames: Iterable[Tuple[Sequence[float], int]], tick_ms: int) -> List[Keyframe]:
+    """Turn per-tick (depths, first_contact_mask) frames into a keyframe table.
+
+    A final all-zero keyframe one tick after the last frame releases the motors.
+    """
+    keyframes = []
+    for index, (depths, first_contact_mask) in enumerate(frames):
+        quantized = tuple(quantize_depth(depth) for depth in depths)
+        keyframes.append(Keyframe(index * tick_ms, quantized, first_contact_mask))
+    num_motors = len(keyframes[0].depths) if keyframes else 0
+    keyframes.append(Keyframe(len(keyframes) * tick_ms, (0,) * num_motors, 0))
+    return keyframes
+
+
+def simplify_keyframes(keyframes: Sequence[Keyframe], tolerance: int = 1) -> List[Keyframe]:
+    """Drop keyframes that linear interpolation between their neighbours reproduces.
+
+    Keyframes carrying a first contact flag are always kept.
+    """
+    if len(keyframes) <= 2:
+        return list(keyframes)
+
+    kept = [keyframes[0]]
+    anchor = 0
+    for index in range(1, len(keyframes) - 1):
+        end = keyframes[index + 1]
+        skipped = keyframes[anchor + 1:index + 1]
+        if keyframes[index].first_contact_mask or not all(
+                _interpolates(keyframes[anchor], end, keyframe, tolerance) for keyframe in skipped):
+            kept.append(keyframes[index])
+            anchor = index
+    kept.append(keyframes[-1])
+    return kept
+
+
+def _interpolates(start: Keyframe, end: Keyframe, keyframe: Keyframe, tolerance: int) -> bool:
+    span = end.time_ms - start.time_ms
+    fraction = (keyframe.time_ms - start.time_ms) / span if span > 0 else 0.0
+    return all(abs(a + (b - a) * fraction - value) <= tolerance
+               for a, b, value in zip(start.depths, end.depths, keyframe.depths))
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Tact Port Discovery
+Finds the serial port of a Tact controller.
+
+Candidate ports are picked by USB vendor/product ID (falling back to the port
+description), then probed concurrently with a short timeout: each probe sends
+"SYNC <token>" and listens for the sync reply or the ready banner, which
+identifies the Tact firmware without moving any motors. The last good port and
+its USB identity are saved to a small JSON cache, and on later runs a cached
+port that is still attached with the same identity is used without any probing.
+"""
+
+import concurrent.futures
+import json
+import os
+import time
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+import serial
+import serial.tools.list_ports
+
+from tact_protocol import encode_sync_request, parse_sync_reply
+from tact_reader import READY_BANNER
+from tact_trace import logger
+
+# USB vendor ID -> product IDs (None matches any product from that vendor)
+KNOWN_USB_IDS = {
+    0x8087: {0x0AB6},   # Intel Arduino/Genuino 101
+    0x2341: None,       # Arduino LLC
+    0x2A03: None,       # Arduino SRL
+}
+DESCRIPTION_KEYWORDS = ('arduino', 'genuino', 'intel')
+FALLBACK_PORTS = ['/dev/ttyACM0', '/dev/ttyUSB0', 'COM3', 'COM4']
+
+FIRMWARE_NAME = "Tact Haptic Controller"
+PROBE_TOKEN = 0x7AC7
+DEFAULT_CACHE_PATH = Path(os.environ.get('TACT_PORT_CACHE', Path.home() / '.tact' / 'port_cache.json'))
+
+# Candidate scores
+SCORE_USB_ID = 2
+SCORE_DESCRIPTION = 1
+SCORE_FALLBACK = 0
+
+
+class PortCandidate(NamedTuple):
+    device: str
+    score: int
+    vid: Optional[int] = None
+    pid: Optional[int] = None
+    serial_number: Optional[str] = None
+    description: str = ""
+
+
+class ProbeResult(NamedTuple):
+    candidate: PortCandidate
+    opened: bool
+    firmware: Optional[str]
+    elapsed: float
+
+    @property
+    def verified(self) -> bool:
+        return self.firmware is not None
+
+
+def list_candidates() -> List[PortCandidate]:
+    """Ports that look like an Arduino, best match first."""
+    candidates = []
+    for port in serial.tools.list_ports.comports():
+        products = KNOWN_USB_IDS.get(port.vid, ())
+        if port.vid in KNOWN_USB_IDS and (products is None or port.pid in products):
+            score = SCORE_USB_ID
+        elif any(keyword in (port.description or "").lower() for keyword in DESCRIPTION_KEYWORDS):
+            score = SCORE_DESCRIPTION
+        else:
+            continue
+        candidates.append(PortCandidate(port.device, score, port.vid, port.pid,
+                                        port.serial_number, port.description or ""))
+    candidates.sort(key=lambda candidate: -candidate.score)
+    return candidates
+
+
+def probe_port(candidate: PortCandidate, baud_rate: int = 115200, timeout: float = 0.5) -> ProbeResult:
+    """Open a port briefly and check whether the Tact firmware answers."""
+    start = time.monotonic()
+    try:
+        # Leave DTR deasserted so probing does not reset the board
+        connection = serial.Serial(timeout=0.05, write_timeout=timeout)
+        connection.port = candidate.device
+        connection.baudrate = baud_rate
+        connection.dtr = False
+        connection.rts = False
+        connection.open()
+    except (serial.SerialException, OSError, ValueError):
+        return ProbeResult(candidate, False, None, time.monotonic() - start)
+
+    firmware = None
+    try:
+        connection.write(encode_sync_request(PROBE_TOKEN))
+        deadline = start + timeout
+        while firmware is None and time.monotonic() < deadline:
+            line = connection.readline().decode(errors='ignore').strip()
+            reply = parse_sync_reply(line)
+            if READY_BANNER in line or (reply is not None and reply[0] == PROBE_TOKEN):
+                firmware = FIRMWARE_NAME
+    except (serial.SerialException, OSError):
+        pass
+    finally:
+        connection.close()
+    return ProbeResult(candidate, True, firmware, time.monotonic() - start)
+
+
+def probe_ports(candidates: List[PortCandidate], baud_rate: int = 115200,
+                timeout: float = 0.5) -> List[ProbeResult]:
+    """Probe every candidate at once; verified ports first, then by score."""
+    if not candidates:
+        return []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(candidates)) as executor:
+        results = list(executor.map(lambda candidate: probe_port(candidate, baud_rate, timeout),
+                                    candidates))
+    results.sort(key=lambda result: (not result.verified, not result.opened, -result.candidate.score))
+    return results
+
+
+def load_port_cache(path: Path = DEFAULT_CACHE_PATH) -> Optional[dict]:
+    try:
+        with open(path) as cache_file:
+            return json.load(cache_file)
+    except (OSError, ValueError):
+        return None
+
+
+def save_port_cache(result: ProbeResult, path: Path = DEFAULT_CACHE_PATH):
+    """Remember a verified port and its USB identity."""
+    candidate = result.candidate
+    entry = {
+        'device': candidate.device,
+        'vid': candidate.vid,
+        'pid': candidate.pid,
+        'serial_number': candidate.serial_number,
+        'firmware': result.firmware,
+        'verified_at': time.time(),
+    }
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix('.tmp')
+        with open(temporary, 'w') as cache_file:
+            json.dump(entry, cache_file, indent=2)
+        os.replace(temporary, path)
+    except OSError as e:
+        logger.debug("Could not write port cache %s: %s", path, e)
+
+
+def _cached_candidate(entry: dict, candidates: List[PortCandidate]) -> Optional[PortCandidate]:
+    """The attached port matching the cache entry, if it is still the same board."""
+    for candidate in candidates:
+        if candidate.device == entry.get('device'):
+            same_board = (candidate.vid, candidate.pid, candidate.serial_number) == \
+                (entry.get('vid'), entry.get('pid'), entry.get('serial_number'))
+            return candidate if same_board else None
+    return None
+
+
+def discover_ports(baud_rate: int = 115200, timeout: float = 0.5, use_cache: bool = True,
+                   cache_path: Path = DEFAULT_CACHE_PATH) -> List[ProbeResult]:
+    """Find Tact controllers, best first.
+
+    A cached port that is still attached with the same USB identity is returned
+    without being opened. Otherwise every candidate is probed concurrently and
+    the first verified port is cached for next time.
+    """
+    candidates = list_candidates()
+
+    entry = load_port_cache(cache_path) if use_cache else None
+    if entry is not None:
+        cached = _cached_candidate(entry, candidates)
+        if cached is not None and cached.serial_number is not None:
+            logger.debug("Using cached port %s", cached.device)
+            return [ProbeResult(cached, True, entry.get('firmware'), 0.0)]
+        if cached is not None:
+            # No USB serial number to tell boards apart: confirm the cached port alone first
+            result = probe_port(cached, baud_rate, timeout)
+            if result.verified:
+                return [result]
+
+    if not candidates:
+        candidates = [PortCandidate(device, SCORE_FALLBACK) for device in FALLBACK_PORTS
+                      if device.startswith('COM') or os.path.exists(device)]
+
+    results = [result for result in probe_ports(candidates, baud_rate, timeout) if result.opened]
+    if results and results[0].verified:
+        save_port_cache(results[0], cache_path)
+    return results
+
+
+def find_tact_port(baud_rate: int = 115200, timeout: float = 0.5, use_cache: bool = True,
+                   cache_path: Path = DEFAULT_CACHE_PATH) -> Optional[str]:
+    """Device name of the best Tact controller found, or None."""
+    results = discover_ports(baud_rate, timeout, use_cache, cache_path)
+    return results[0].candidate.device if results else None
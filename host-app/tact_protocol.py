@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""
+Tact Wire Protocol
+Encoders and a reference decoder for the messages exchanged between the host
+application and the Arduino 101 firmware.
+
+Two formats are supported:
+  - CSV text lines: "actuator_id,penetration_depth,first_contact\\n"
+  - Binary events (opt-in, negotiated at connect time): 4 bytes per event
+
+Binary event layout:
+  byte 0  BINARY_SYNC (0xA5)
+  byte 1  actuator id in bits 0-3, flags in bits 4-7
+  byte 2  penetration depth quantized to hundredths (0-100)
+  byte 3  checksum, chosen so that bytes 1-3 sum to 0 modulo 256
+
+Both formats also carry multi-actuator frames holding every motor's depth for
+one tick, which the firmware applies in a single step:
+  - CSV: "F,depth_0,depth_1,depth_2,depth_3,first_contact_mask\\n"
+  - Binary: BINARY_FRAME_SYNC (0xA6), first contact mask, one depth byte per
+    motor, checksum
+
+Any event or frame can carry a 16-bit sequence number, which the firmware
+echoes as "Ack: <seq>" once the command has been applied:
+  - CSV: the line is suffixed with "@<seq>", e.g. "0,0.50,1@17\\n"
+  - Binary: the message is preceded by BINARY_SEQUENCE_SYNC (0xA7), sequence
+    low byte, sequence high byte, checksum
+
+Any event or frame can also be scheduled for a given device time (millis()):
+  - CSV: the line is prefixed with "AT <device_ms> "
+  - Binary: the message is preceded by BINARY_SCHEDULE_SYNC (0xA8), the device
+    time as 4 little-endian bytes, checksum
+
+Clock sync: the host sends "SYNC <token>" and the firmware replies
+"Sync: <token> <device_ms>".
+
+Pattern cache: keyframe tables are uploaded once into a numbered device slot
+and then triggered with one short command:
+  - "PAT <id> <keyframe_count>"                -> "Pattern: <id> begin"
+  - "K <time_ms>,<d0>,...,<d3>,<mask>[;...]"   -> "Pattern: <id> <n>/<count>"
+                                                  or "Pattern: <id> stored"
+  - "PLAY <id> <intensity> <time_scale>"
+  - "PSTOP"
+Keyframe depths are integers 0-100; the firmware interpolates linearly
+between keyframes.
+"""
+
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+NUM_MOTORS = 4
+MOTOR_PINS = [3, 5, 6, 9]  # PWM pin of each motor on the Arduino 101
+
+# Depth precision on the wire (matches the two decimals of the CSV format)
+DEPTH_STEPS = 100
+
+# Protocol modes
+PROTOCOL_CSV = 'csv'
+PROTOCOL_BINARY = 'binary'
+
+# Binary framing
+BINARY_SYNC = 0xA5
+BINARY_EVENT_SIZE = 4
+FLAG_FIRST_CONTACT = 0x10
+BINARY_FRAME_SYNC = 0xA6
+BINARY_FRAME_SIZE = 3 + NUM_MOTORS
+BINARY_SEQUENCE_SYNC = 0xA7
+BINARY_SEQUENCE_SIZE = 4
+BINARY_SCHEDULE_SYNC = 0xA8
+BINARY_SCHEDULE_SIZE = 6
+CSV_FRAME_PREFIX = 'F'
+CSV_SCHEDULE_PREFIX = 'AT '
+CSV_SEQUENCE_SEPARATOR = '@'
+SEQUENCE_MODULO = 1 << 16
+ACK_PREFIX = "Ack: "
+SYNC_COMMAND = "SYNC "
+SYNC_PREFIX = "Sync: "
+DEVICE_TIME_MODULO = 1 << 32
+
+# Pattern cache
+PATTERN_SLOTS = 8
+MAX_KEYFRAMES = 48
+MAX_KEYFRAME_TIME_MS = 0xFFFF  # keyframe times are uint16_t on the device
+KEYFRAMES_PER_LINE = 3  # keeps each upload line within the device's serial buffer
+PATTERN_STOP_COMMAND = b"PSTOP\n"
+PATTERN_PREFIX = "Pattern: "
+
+# Longest text line the firmware buffers; longer lines are dropped with an error
+MAX_INPUT_LENGTH = 128
+
+# Total size of each binary message, keyed by its sync byte
+BINARY_MESSAGE_SIZES = {
+    BINARY_SYNC: BINARY_EVENT_SIZE,
+    BINARY_FRAME_SYNC: BINARY_FRAME_SIZE,
+    BINARY_SEQUENCE_SYNC: BINARY_SEQUENCE_SIZE,
+    BINARY_SCHEDULE_SYNC: BINARY_SCHEDULE_SIZE,
+}
+
+# Mode negotiation (text commands understood by the firmware in any mode)
+MODE_BINARY_COMMAND = b"MODE BIN\n"
+MODE_CSV_COMMAND = b"MODE CSV\n"
+MODE_BINARY_REPLY = "Mode: BIN"
+MODE_CSV_REPLY = "Mode: CSV"
+
+# Start-up: sent right after the ready banner to skip the power-on motor test
+SKIP_TEST_COMMAND = b"SKIPTEST\n"
+READY_SUFFIX = "Ready for operation."
+
+
+class TouchEvent(NamedTuple):
+    actuator_id: int
+    penetration_depth: float
+    first_contact: bool
+
+
+class TouchFrame(NamedTuple):
+    depths: tuple
+    first_contact_mask: int
+
+
+class SequenceNumber(NamedTuple):
+    sequence: int
+
+
+class ScheduleTime(NamedTuple):
+    device_time_ms: int
+
+
+class Keyframe(NamedTuple):
+    time_ms: int
+    depths: tuple  # quantized, 0-100
+    first_contact_mask: int
+
+
+def quantize_depth(penetration_depth: float) -> int:
+    """Clamp a depth to [0, 1] and quantize it to wire precision."""
+    penetration_depth = max(0.0, min(1.0, penetration_depth))
+    return int(round(penetration_depth * DEPTH_STEPS))
+
+
+def dequantize_depth(depth_q: int) -> float:
+    """Convert a quantized depth back to a float in [0, 1]."""
+    return depth_q / DEPTH_STEPS
+
+
+def checksum(payload) -> int:
+    """Checksum byte that makes the payload plus checksum sum to 0 mod 256."""
+    return -sum(payload) & 0xFF
+
+
+def encode_csv_event(actuator_id: int, penetration_depth: float, first_contact: bool) -> bytes:
+    """Encode a touch event as a CSV text line."""
+    depth = dequantize_depth(quantize_depth(penetration_depth))
+    return f"{actuator_id},{depth:.2f},{1 if first_contact else 0}\n".encode()
+
+
+def encode_binary_event(actuator_id: int, penetration_depth: float, first_contact: bool) -> bytes:
+    """Encode a touch event as a 4-byte binary frame."""
+    if actuator_id < 0 or actuator_id > 0x0F:
+        raise ValueError(f"Actuator ID {actuator_id} does not fit in a binary frame")
+
+    id_flags = actuator_id | (FLAG_FIRST_CONTACT if first_contact else 0)
+    depth_q = quantize_depth(penetration_depth)
+    return bytes((BINARY_SYNC, id_flags, depth_q, checksum((id_flags, depth_q))))
+
+
+def encode_binary_sequence(sequence: int) -> bytes:
+    """Encode the binary prefix that asks the firmware to ack the next message."""
+    payload = (sequence & 0xFF, (sequence >> 8) & 0xFF)
+    return bytes((BINARY_SEQUENCE_SYNC,) + payload + (checksum(payload),))
+
+
+def with_sequence(mode: str, message: bytes, sequence: Optional[int]) -> bytes:
+    """Attach a sequence number to an encoded event or frame."""
+    if sequence is None:
+        return message
+    if mode == PROTOCOL_BINARY:
+        return encode_binary_sequence(sequence) + message
+    return message[:-1] + f"{CSV_SEQUENCE_SEPARATOR}{sequence}\n".encode()
+
+
+def encode_binary_schedule(device_time_ms: int) -> bytes:
+    """Encode the binary prefix that defers the next message to a device time."""
+    payload = tuple((device_time_ms % DEVICE_TIME_MODULO).to_bytes(4, 'little'))
+    return bytes((BINARY_SCHEDULE_SYNC,) + payload + (checksum(payload),))
+
+
+def with_schedule(mode: str, message: bytes, device_time_ms: Optional[int]) -> bytes:
+    """Ask the firmware to apply an encoded event or frame at a device time."""
+    if device_time_ms is None:
+        return message
+    if mode == PROTOCOL_BINARY:
+        return encode_binary_schedule(device_time_ms) + message
+    return f"{CSV_SCHEDULE_PREFIX}{device_time_ms % DEVICE_TIME_MODULO} ".encode() + message
+
+
+def encode_sync_request(token: int) -> bytes:
+    """Encode a clock sync request; the firmware answers with its millis()."""
+    return f"{SYNC_COMMAND}{token}\n".encode()
+
+
+def parse_sync_reply(line: str) -> Optional[Tuple[int, int]]:
+    """Return (token, device_ms) for a "Sync: <token> <device_ms>" line, or None."""
+    line = line.strip()
+    if not line.startswith(SYNC_PREFIX):
+        return None
+    fields = line[len(SYNC_PREFIX):].split()
+    if len(fields) != 2:
+        return None
+    try:
+        return int(fields[0]), int(fields[1])
+    except ValueError:
+        return None
+
+
+def encode_pattern_upload(pattern_id: int, keyframes: Sequence[Keyframe]) -> List[bytes]:
+    """Encode the lines that upload a keyframe table into a device slot."""
+    if not 0 < len(keyframes) <= MAX_KEYFRAMES:
+        raise ValueError(f"Pattern needs 1-{MAX_KEYFRAMES} keyframes, got {len(keyframes)}")
+    if max(k.time_ms for k in keyframes) > MAX_KEYFRAME_TIME_MS:
+        raise ValueError(f"Pattern keyframe times must be at most {MAX_KEYFRAME_TIME_MS} ms")
+
+    lines = [f"PAT {pattern_id} {len(keyframes)}\n".encode()]
+    for start in range(0, len(keyframes), KEYFRAMES_PER_LINE):
+        chunk = keyframes[start:start + KEYFRAMES_PER_LINE]
+        fields = [','.join(str(value) for value in (k.time_ms,) + tuple(k.depths) + (k.first_contact_mask,))
+                  for k in chunk]
+        lines.append(f"K {';'.join(fields)}\n".encode())
+    return lines
+
+
+def encode_pattern_play(pattern_id: int, intensity: float = 1.0, time_scale: float = 1.0) -> bytes:
+    """Encode the command that plays a cached pattern."""
+    return f"PLAY {pattern_id} {intensity:.2f} {time_scale:.3f}\n".encode()
+
+
+def parse_pattern_reply(line: str) -> Optional[Tuple[int, str]]:
+    """Return (pattern_id, status) for a "Pattern: <id> <status>" line, or None."""
+    line = line.strip()
+    if not line.startswith(PATTERN_PREFIX):
+        return None
+    fields = line[len(PATTERN_PREFIX):].split(' ', 1)
+    if len(fields) != 2:
+        return None
+    try:
+        return int(fields[0]), fields[1]
+    except ValueError:
+        return None
+
+
+def encode_event(mode: str, actuator_id: int, penetration_depth: float, first_contact: bool,
+                 sequence: Optional[int] = None) -> bytes:
+    """Encode a touch event in the given protocol mode."""
+    if mode == PROTOCOL_BINARY:
+        message = encode_binary_event(actuator_id, penetration_depth, first_contact)
+    else:
+        message = encode_csv_event(actuator_id, penetration_depth, first_contact)
+    return with_sequence(mode, message, sequence)
+
+
+def _validate_frame_depths(depths: Sequence[float]):
+    if len(depths) != NUM_MOTORS:
+        raise ValueError(f"Frame needs {NUM_MOTORS} depths, got {len(depths)}")
+
+
+def encode_csv_frame(depths: Sequence[float], first_contact_mask: int) -> bytes:
+    """Encode one tick of all actuators' depths as a CSV frame line."""
+    _validate_frame_depths(depths)
+    fields = [f"{dequantize_depth(quantize_depth(depth)):.2f}" for depth in depths]
+    return f"{CSV_FRAME_PREFIX},{','.join(fields)},{first_contact_mask & 0x0F}\n".encode()
+
+
+def encode_binary_frame(depths: Sequence[float], first_contact_mask: int) -> bytes:
+    """Encode one tick of all actuators' depths as a binary frame."""
+    _validate_frame_depths(depths)
+    payload = [first_contact_mask & 0x0F] + [quantize_depth(depth) for depth in depths]
+    return bytes([BINARY_FRAME_SYNC] + payload + [checksum(payload)])
+
+
+def encode_frame(mode: str, depths: Sequence[float], first_contact_mask: int,
+                 sequence: Optional[int] = None) -> bytes:
+    """Encode a multi-actuator frame in the given protocol mode."""
+    if mode == PROTOCOL_BINARY:
+        message = encode_binary_frame(depths, first_contact_mask)
+    else:
+        message = encode_csv_frame(depths, first_contact_mask)
+    return with_sequence(mode, message, sequence)
+
+
+class MessageEncoder:
+    """Pre-encoded messages for one protocol mode.
+
+    Every possible event (actuator x quantized depth x first contact) is
+    encoded once when the encoder is built, so encoding an event is a table
+    lookup that returns a shared bytes object. Frames are joined from
+    pre-encoded depth fields, and batches of events are copied into one
+    reusable buffer.
+    """
+
+    def __init__(self, mode: str, num_motors: int = NUM_MOTORS):
+        self.mode = mode
+        self.num_motors = num_motors
+        encode = encode_binary_event if mode == PROTOCOL_BINARY else encode_csv_event
+        self.events = tuple(encode(actuator_id, dequantize_depth(depth_q), first_contact)
+                            for actuator_id in range(num_motors)
+                            for depth_q in range(DEPTH_STEPS + 1)
+                            for first_contact in (False, True))
+        self.depth_fields = tuple(f"{dequantize_depth(depth_q):.2f}".encode() for depth_q in range(DEPTH_STEPS + 1))
+        self.mask_fields = tuple(f",{mask}\n".encode() for mask in range(0x10))
+        self.frame_prefix = f"{CSV_FRAME_PREFIX},".encode()
+        self.buffer = bytearray()
+
+    def event(self, actuator_id: int, penetration_depth: float, first_contact: bool,
+              sequence: Optional[int] = None) -> bytes:
+        """Encode a touch event (same bytes as encode_event)."""
+        if not 0 <= actuator_id < self.num_motors:
+            raise ValueError(f"Actuator ID {actuator_id} out of range")
+        # Same result as quantize_depth(), without the function call; clamping
+        # first keeps inf and NaN out of round()
+        depth_q = round(max(0.0, min(1.0, penetration_depth)) * DEPTH_STEPS)
+        message = self.events[(actuator_id * (DEPTH_STEPS + 1) + depth_q) * 2 + (1 if first_contact else 0)]
+        return message if sequence is None else with_sequence(self.mode, message, sequence)
+
+    def frame(self, depths: Sequence[float], first_contact_mask: int, sequence: Optional[int] = None) -> bytes:
+        """Encode a multi-actuator frame (same bytes as encode_frame)."""
+        _validate_frame_depths(depths)
+        depths_q = [round(max(0.0, min(1.0, depth)) * DEPTH_STEPS) for depth in depths]
+        mask = first_contact_mask & 0x0F
+        if self.mode == PROTOCOL_BINARY:
+            message = bytes([BINARY_FRAME_SYNC, mask] + depths_q + [checksum([mask] + depths_q)])
+        else:
+            fields = self.depth_fields
+            message = b"".join((self.frame_prefix, b",".join([fields[depth_q] for depth_q in depths_q]),
+                                self.mask_fields[mask]))
+        return message if sequence is None else with_sequence(self.mode, message, sequence)
+
+    def batch(self, events: Iterable[Tuple[int, float, bool]]) -> bytearray:
+        """Several events back to back in the shared buffer, valid until the next batch() call."""
+        buffer = self.buffer
+        buffer.clear()
+        for actuator_id, penetration_depth, first_contact in events:
+            buffer += self.event(actuator_id, penetration_depth, first_contact)
+        return buffer
+
+
+def split_csv_sequence(line: str) -> Tuple[str, Optional[int]]:
+    """Separate a CSV line from its optional "@<seq>" suffix."""
+    message, separator, sequence = line.strip().partition(CSV_SEQUENCE_SEPARATOR)
+    return message, (int(sequence) if separator else None)
+
+
+def parse_ack(line: str) -> Optional[int]:
+    """Return the sequence number of an "Ack: <seq>" line, or None."""
+    line = line.strip()
+    if not line.startswith(ACK_PREFIX):
+        return None
+    try:
+        return int(line[len(ACK_PREFIX):])
+    except ValueError:
+        return None
+
+
+def parse_csv_event(line: str) -> TouchEvent:
+    """Parse a CSV text line into a TouchEvent."""
+    fields = line.strip().split(',')
+    if len(fields) != 3:
+        raise ValueError(f"Invalid message format: {line.strip()!r}")
+    return TouchEvent(int(fields[0]), float(fields[1]), fields[2].strip() == '1')
+
+
+def parse_csv_frame(line: str) -> TouchFrame:
+    """Parse a CSV frame line ("F,...") into a TouchFrame."""
+    fields = line.strip().split(',')
+    if len(fields) != NUM_MOTORS + 2 or fields[0] != CSV_FRAME_PREFIX:
+        raise ValueError(f"Invalid frame format: {line.strip()!r}")
+    depths = tuple(float(field) for field in fields[1:-1])
+    return TouchFrame(depths, int(fields[-1]))
+
+
+def parse_csv_message(line: str) -> Union[TouchEvent, TouchFrame]:
+    """Parse either kind of CSV line (without a sequence suffix)."""
+    if line.lstrip().startswith(CSV_FRAME_PREFIX):
+        return parse_csv_frame(line)
+    return parse_csv_event(line)
+
+
+class BinaryDecoder:
+    """Reference decoder for the binary message stream.
+
+    Parses a byte at a time like the firmware, and drops and counts messages
+    with a bad checksum. Bytes outside a message are skipped and counted until
+    a sync byte is seen. The firmware collects them as a text line instead, but
+    in binary mode a sync byte discards any unterminated text and starts a
+    message, so both resynchronise on the next sync byte. This decoder models a
+    purely binary stream and ignores text commands.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.expected_size = 0
+        self.checksum_errors = 0
+        self.skipped_bytes = 0
+
+    def feed(self, data: bytes) -> List[Union[TouchEvent, TouchFrame, SequenceNumber, ScheduleTime]]:
+        """Consume raw bytes and return every complete message they finish."""
+        messages = []
+        for byte in data:
+            if not self.buffer:
+                if byte not in BINARY_MESSAGE_SIZES:
+                    self.skipped_bytes += 1
+                    continue
+                self.expected_size = BINARY_MESSAGE_SIZES[byte]
+            self.buffer.append(byte)
+
+            if len(self.buffer) == self.expected_size:
+                raw = bytes(self.buffer)
+                self.buffer.clear()
+                message = decode_binary_message(raw)
+                if message is None:
+                    self.checksum_errors += 1
+                else:
+                    messages.append(message)
+        return messages
+
+
+def decode_binary_message(raw: bytes):
+    """Decode a complete binary message; returns None on a bad checksum."""
+    if raw[:1] == bytes((BINARY_FRAME_SYNC,)):
+        return decode_binary_frame(raw)
+    if raw[:1] == bytes((BINARY_SEQUENCE_SYNC,)):
+        if len(raw) != BINARY_SEQUENCE_SIZE:
+            raise ValueError(f"Not a binary sequence prefix: {raw!r}")
+        if sum(raw[1:]) & 0xFF != 0:
+            return None
+        return SequenceNumber(raw[1] | (raw[2] << 8))
+    if raw[:1] == bytes((BINARY_SCHEDULE_SYNC,)):
+        if len(raw) != BINARY_SCHEDULE_SIZE:
+            raise ValueError(f"Not a binary schedule prefix: {raw!r}")
+        if sum(raw[1:]) & 0xFF != 0:
+            return None
+        return ScheduleTime(int.from_bytes(raw[1:5], 'little'))
+    return decode_binary_event(raw)
+
+
+def decode_binary_frame(raw: bytes):
+    """Decode a single multi-actuator binary frame; returns None on a bad checksum."""
+    if len(raw) != BINARY_FRAME_SIZE or raw[0] != BINARY_FRAME_SYNC:
+        raise ValueError(f"Not a binary multi-actuator frame: {raw!r}")
+    if sum(raw[1:]) & 0xFF != 0:
+        return None
+
+    depths = tuple(dequantize_depth(depth_q) for depth_q in raw[2:-1])
+    return TouchFrame(depths, raw[1])
+
+
+def decode_binary_event(frame: bytes):
+    """Decode a single 4-byte binary frame; returns None on a bad checksum."""
+    if len(frame) != BINARY_EVENT_SIZE or frame[0] != BINARY_SYNC:
+        raise ValueError(f"Not a binary event frame: {frame!r}")
+    if sum(frame[1:]) & 0xFF != 0:
+        return None
+
+    id_flags, depth_q = frame[1], frame[2]
+    return TouchEvent(id_flags & 0x0F, dequantize_depth(depth_q),
+                      bool(id_flags & FLAG_FIRST_CONTACT))
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Tact Device Reader
+Background thread that continuously drains the device-to-host stream and
+turns each firmware line into a typed event.
+
+Keeping the port drained stops the firmware's Serial.print calls from stalling
+when the host is busy writing. Parsed events are counted and dispatched to
+registered callbacks on the reader thread, so callbacks should return quickly.
+"""
+
+import collections
+import threading
+from typing import Callable, NamedTuple, Optional
+
+from tact_clock import SYSTEM_CLOCK
+from tact_protocol import parse_ack, parse_pattern_reply, parse_sync_reply
+from tact_trace import MessageTrace, logger
+
+# Event kinds
+EVENT_READY = 'ready'
+EVENT_PULSE_STARTED = 'pulse_started'
+EVENT_PARSE_ERROR = 'parse_error'
+EVENT_BAD_ID = 'bad_id'
+EVENT_ACK = 'ack'
+EVENT_SYNC = 'sync'
+EVENT_PATTERN = 'pattern'
+EVENT_PATTERN_ERROR = 'pattern_error'
+EVENT_INFO = 'info'
+
+READY_BANNER = "Tact Haptic Controller Ready"
+PULSE_PREFIX = "First contact pulse: Motor "
+
+
+class DeviceEvent(NamedTuple):
+    kind: str
+    timestamp_ns: int
+    line: str
+    actuator_id: Optional[int] = None
+    sequence: Optional[int] = None
+    device_time: Optional[int] = None
+    pattern_id: Optional[int] = None
+    status: Optional[str] = None
+
+
+def parse_device_line(line: str, timestamp_ns: int = 0) -> DeviceEvent:
+    """Classify a single line printed by the firmware."""
+    line = line.strip()
+    if line.startswith(PULSE_PREFIX):
+        try:
+            actuator_id = int(line[len(PULSE_PREFIX):])
+        except ValueError:
+            actuator_id = None
+        return DeviceEvent(EVENT_PULSE_STARTED, timestamp_ns, line, actuator_id)
+    sequence = parse_ack(line)
+    if sequence is not None:
+        return DeviceEvent(EVENT_ACK, timestamp_ns, line, sequence=sequence)
+    sync_reply = parse_sync_reply(line)
+    if sync_reply is not None:
+        return DeviceEvent(EVENT_SYNC, timestamp_ns, line, sequence=sync_reply[0],
+                           device_time=sync_reply[1])
+    pattern_reply = parse_pattern_reply(line)
+    if pattern_reply is not None:
+        return DeviceEvent(EVENT_PATTERN, timestamp_ns, line, pattern_id=pattern_reply[0],
+                           status=pattern_reply[1])
+    if line in ("Error: Pattern upload failed", "Error: Unknown pattern"):
+        return DeviceEvent(EVENT_PATTERN_ERROR, timestamp_ns, line)
+    if line == "Error: Invalid actuator ID":
+        return DeviceEvent(EVENT_BAD_ID, timestamp_ns, line)
+    if line in ("Error: Invalid message format", "Error: Invalid checksum"):
+        return DeviceEvent(EVENT_PARSE_ERROR, timestamp_ns, line)
+    if line == READY_BANNER:
+        return DeviceEvent(EVENT_READY, timestamp_ns, line)
+    return DeviceEvent(EVENT_INFO, timestamp_ns, line)
+
+
+class DeviceReader:
+    def __init__(self, serial_connection, trace: Optional[MessageTrace] = None,
+                 name: str = "tact-reader", clock=SYSTEM_CLOCK):
+        self.serial_connection = serial_connection
+        self.clock = clock
+        self.trace = trace
+        self.name = name
+        self.callbacks = collections.defaultdict(list)
+        self.counters = collections.Counter()
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+        self.subscribed = False
+
+    def add_callback(self, kind: Optional[str], callback: Callable[[DeviceEvent], None]):
+        """Register a callback for one event kind, or for every event if kind is None."""
+        self.callbacks[kind].append(callback)
+
+    def remove_callback(self, kind: Optional[str], callback: Callable[[DeviceEvent], None]):
+        self.callbacks[kind].remove(callback)
+
+    def start(self):
+        """Start the reader thread."""
+        if self.thread is not None or self.subscribed:
+            return
+        if hasattr(self.serial_connection, 'subscribe'):
+            # In-memory transports push lines as they are printed; no thread needed
+            self.serial_connection.subscribe(self.handle_line)
+            self.subscribed = True
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        """Ask the reader thread to exit after its current read."""
+        self.running = False
+        if self.subscribed:
+            self.serial_connection.unsubscribe(self.handle_line)
+            self.subscribed = False
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+        self.thread = None
+
+    def _run(self):
+        while self.running:
+            try:
+                raw = self.serial_connection.readline()
+            except Exception as e:
+                if self.running:
+                    logger.error("Error reading from device: %s", e)
+                break
+            if raw:
+                self.handle_line(raw)
+
+    def handle_line(self, raw: bytes) -> DeviceEvent:
+        """Trace, parse, count and dispatch one raw line from the device."""
+        timestamp_ns = self.clock.monotonic_ns()
+        if self.trace is not None:
+            self.trace.received(raw)
+        event = parse_device_line(raw.decode(errors='replace'), timestamp_ns)
+        self.counters[event.kind] += 1
+        logger.debug("Arduino: %s", event.line)
+
+        for callback in self.callbacks[event.kind] + self.callbacks[None]:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error("Error in device event callback: %s", e)
+        return event
+
+    def counts(self) -> dict:
+        """Snapshot of how many events of each kind have been seen."""
+        return dict(self.counters)
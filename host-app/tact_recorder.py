@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Tact Session Recorder
+Append-only binary capture of outgoing touch events and frames, and replay.
+
+A recording is a 32-byte header followed by fixed-size 32-byte records:
+
+    timestamp_ns  int64    host monotonic time the command was sent
+    kind          uint8    RECORD_EVENT, RECORD_FRAME or RECORD_SESSION
+    actuator      uint8    motor of a touch event
+    first_contact uint8    first-contact bit mask (bit N = motor N)
+    depths        float32  x4, one per motor (an event only fills its motor)
+
+SessionRecorder only queues a tuple on the sending thread; a background thread
+packs records and writes them in batches through a buffered file, so recording
+does not slow the send path. SessionReplayer maps the file with np.memmap and
+walks it in chunks, so an hour-long session is paged in as it plays rather than
+loaded into memory, and re-sends every record on its original schedule, at a
+faster or slower speed, or as fast as possible for load tests.
+
+Recording again to an existing file appends a new session to it: the recorder
+first trims a partial record left by a crash, then writes a RECORD_SESSION
+marker, because each run's monotonic clock has its own origin. The replayer
+restarts its schedule at every marker, so the gap between runs is not replayed.
+A file that does not end on a record boundary is rejected until
+repair_recording() trims it.
+"""
+
+import os
+import queue
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from tact_clock import SYSTEM_CLOCK
+from tact_latency import LatencyHistogram
+from tact_protocol import NUM_MOTORS
+from tact_trace import logger
+
+RECORDING_MAGIC = b"TACTREC1"
+HEADER_FORMAT = '<8sHHHHd8x'   # magic, version, record size, motors, reserved, wall time
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+RECORDING_VERSION = 1
+
+RECORD_EVENT = 1
+RECORD_FRAME = 2
+RECORD_SESSION = 3         # start of an appended session; resets the time base
+
+RECORD_FORMAT = f'<qBBB5x{NUM_MOTORS}f'
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+RECORD_DTYPE = np.dtype([
+    ('timestamp_ns', '<i8'),
+    ('kind', 'u1'),
+    ('actuator', 'u1'),
+    ('first_contact', 'u1'),
+    ('reserved', 'V5'),
+    ('depths', '<f4', (NUM_MOTORS,)),
+])
+
+WRITE_BATCH = 256          # records packed per write
+REPLAY_CHUNK = 4096        # records paged in per step during replay
+
+
+class RecordingInfo(NamedTuple):
+    records: int           # touch events and frames, not session markers
+    duration: float        # seconds from first to last record, summed over sessions
+    wall_time: float       # time.time() when the recording was created
+
+
+class SessionRecorder:
+    """Buffered background writer for outgoing commands."""
+
+    def __init__(self, path, clock=SYSTEM_CLOCK, buffer_size: int = 1 << 16):
+        self.path = Path(path)
+        self.clock = clock
+        self.pending = queue.SimpleQueue()
+        new_file = not self.path.exists() or self.path.stat().st_size == 0
+        if not new_file:
+            check_header(self.path)
+            repair_recording(self.path)
+        self.file = open(self.path, 'ab', buffering=buffer_size)
+        if new_file:
+            self.file.write(struct.pack(HEADER_FORMAT, RECORDING_MAGIC, RECORDING_VERSION,
+                                        RECORD_SIZE, NUM_MOTORS, 0, time.time()))
+        else:
+            self.file.write(struct.pack(RECORD_FORMAT, self.clock.monotonic_ns(), RECORD_SESSION, 0, 0,
+                                        *[0.0] * NUM_MOTORS))
+
+        # Statistics
+        self.recorded = 0
+
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="tact-recorder", daemon=True)
+        self.thread.start()
+
+    def record_event(self, actuator_id: int, depth: float, first_contact: bool):
+        depths = [0.0] * NUM_MOTORS
+        depths[actuator_id] = depth
+        self.pending.put((self.clock.monotonic_ns(), RECORD_EVENT, actuator_id,
+                          int(first_contact) << actuator_id, depths))
+
+    def record_frame(self, depths: Sequence[float], first_contact_mask: int):
+        self.pending.put((self.clock.monotonic_ns(), RECORD_FRAME, 0, first_contact_mask, list(depths)))
+
+    def _run(self):
+        while True:
+            batch = [self.pending.get()]
+            while len(batch) < WRITE_BATCH:
+                try:
+                    batch.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            stop = batch[-1] is None
+            records = [entry for entry in batch if entry is not None]
+            self.file.write(b"".join(struct.pack(RECORD_FORMAT, timestamp_ns, kind, actuator,
+                                                 first_contact, *depths)
+                                     for timestamp_ns, kind, actuator, first_contact, depths in records))
+            self.recorded += len(records)
+            if stop:
+                return
+
+    def close(self):
+        """Write out everything queued and close the file."""
+        if not self.running:
+            return
+        self.running = False
+        self.pending.put(None)
+        self.thread.join()
+        self.file.close()
+
+
+def check_header(path) -> float:
+    """Validate a recording's header and return its creation wall time."""
+    with open(path, 'rb') as recording:
+        header = recording.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE:
+        raise ValueError(f"{path}: not a Tact recording (file too short)")
+    magic, version, record_size, num_motors, _, wall_time = struct.unpack(HEADER_FORMAT, header)
+    if magic != RECORDING_MAGIC or version != RECORDING_VERSION:
+        raise ValueError(f"{path}: not a Tact recording (version {version})")
+    if record_size != RECORD_SIZE or num_motors != NUM_MOTORS:
+        raise ValueError(f"{path}: recorded with {num_motors} motors / {record_size}-byte records")
+    return wall_time
+
+
+def repair_recording(path) -> int:
+    """Trim a partial record left at the end of a recording; return the bytes removed."""
+    size = os.path.getsize(path)
+    partial = (size - HEADER_SIZE) % RECORD_SIZE
+    if partial:
+        os.truncate(path, size - partial)
+        logger.warning("%s: trimmed a %d-byte partial record", path, partial)
+    return partial
+
+
+class SessionReplayer:
+    """Memory-mapped reader that re-sends a recording through a TactHostSimulator."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.wall_time = check_header(self.path)
+        count, partial = divmod(os.path.getsize(self.path) - HEADER_SIZE, RECORD_SIZE)
+        if partial:
+            raise ValueError(f"{self.path}: ends in a {partial}-byte partial record "
+                             f"(trim it with: python tact_recorder.py --repair {self.path})")
+        self.records = (np.memmap(self.path, dtype=RECORD_DTYPE, mode='r', offset=HEADER_SIZE, shape=(count,))
+                        if count else np.zeros(0, dtype=RECORD_DTYPE))
+        self.lateness = LatencyHistogram()  # microseconds behind schedule
+        self.sent = 0
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def info(self) -> RecordingInfo:
+        if not len(self.records):
+            return RecordingInfo(0, 0.0, self.wall_time)
+        # Sum the sessions separately: the step into a session marker crosses clock origins
+        commands = self.records['kind'] != RECORD_SESSION
+        steps = np.diff(self.records['timestamp_ns'])
+        duration = int(steps[commands[1:]].sum()) / 1e9
+        return RecordingInfo(int(commands.sum()), duration, self.wall_time)
+
+    def replay(self, simulator, speed: Optional[float] = 1.0, clock=None) -> int:
+        """Re-send every record; speed 2.0 plays twice as fast, None as fast as possible."""
+        clock = clock or simulator.clock
+        self.lateness.reset()
+        self.sent = 0
+        if not len(self.records):
+            return 0
+        first_ns = int(self.records[0]['timestamp_ns'])
+        start_ns = clock.monotonic_ns()
+        for offset in range(0, len(self.records), REPLAY_CHUNK):
+            chunk = self.records[offset:offset + REPLAY_CHUNK]
+            timestamps = chunk['timestamp_ns'].tolist()
+            kinds = chunk['kind'].tolist()
+            actuators = chunk['actuator'].tolist()
+            first_contacts = chunk['first_contact'].tolist()
+            depths = chunk['depths'].tolist()
+            for index, timestamp_ns in enumerate(timestamps):
+                kind = kinds[index]
+                if kind == RECORD_SESSION:
+                    first_ns = timestamp_ns
+                    start_ns = clock.monotonic_ns()
+                    continue
+                if kind not in (RECORD_EVENT, RECORD_FRAME):
+                    raise ValueError(f"{self.path}: record {offset + index} has unknown kind {kind}")
+                if speed is not None:
+                    deadline_ns = start_ns + int((timestamp_ns - first_ns) / speed)
+                    clock.sleep_until(deadline_ns)
+                    self.lateness.record((clock.monotonic_ns() - deadline_ns) // 1000)
+                if kind == RECORD_EVENT:
+                    actuator = actuators[index]
+                    simulator.send_touch_event(actuator, depths[index][actuator],
+                                               bool(first_contacts[index] & (1 << actuator)))
+                else:
+                    simulator.send_frame(depths[index], first_contacts[index])
+                self.sent += 1
+        return self.sent
+
+    def report(self) -> str:
+        stats = self.lateness.summary()
+        if not stats['count']:
+            return f"{self.sent} records replayed (unpaced)"
+        return (f"{self.sent} records replayed | lateness ms: p50 {stats['p50'] / 1000:.2f}, "
+                f"p99 {stats['p99'] / 1000:.2f}, max {stats['max'] / 1000:.2f}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Summarise a Tact session recording')
+    parser.add_argument('recording', help='Recording file')
+    parser.add_argument('--repair', action='store_true', help='Trim a partial record left by a crash')
+    args = parser.parse_args()
+
+    if args.repair:
+        check_header(args.recording)
+        print(f"{args.recording}: removed {repair_recording(args.recording)} trailing bytes")
+    replayer = SessionReplayer(args.recording)
+    info = replayer.info()
+    created = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(info.wall_time))
+    print(f"{args.recording}: {info.records} records over {info.duration:.3f}s (recorded {created})")
+    if info.records:
+        kinds = np.bincount(replayer.records['kind'], minlength=RECORD_SESSION + 1)
+        print(f"  {kinds[RECORD_EVENT]} touch events, {kinds[RECORD_FRAME]} frames, "
+              f"{kinds[RECORD_SESSION] + 1} sessions")
+
+
+if __name__ == '__main__':
+    main()
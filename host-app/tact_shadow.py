@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tact Device Shadow
+Host copy of each motor's output, used to skip commands that change nothing.
+
+For every actuator the shadow keeps the PWM level the firmware should be
+driving, computed the way the firmware does: the depth quantized to the wire's
+hundredths, zeroed below PENETRATION_THRESHOLD and mapped onto the sustained
+amplitude range, or the first-contact amplitude after a pulse. A command whose
+PWM level equals the shadow's is suppressed unless it carries a first contact,
+the caller forces it, or the actuator has not been refreshed for the keep-alive
+interval (so a device that was reset or dropped bytes recovers).
+
+During a first-contact pulse the firmware ignores sustained depths and keeps
+the pulse amplitude until the next command after the pulse, so the shadow
+holds the pulse level (with a loop of margin either side) rather than the
+depth that was sent, and the first command after the pulse always goes out.
+"""
+
+from typing import List, Optional, Sequence
+
+from tact_firmware_reference import (FIRST_CONTACT_AMPLITUDE, FIRST_CONTACT_PULSE_DURATION,
+                                     PENETRATION_THRESHOLD, SUSTAINED_CONTACT_MAX_AMPLITUDE,
+                                     SUSTAINED_CONTACT_MIN_AMPLITUDE)
+from tact_protocol import NUM_MOTORS, dequantize_depth, quantize_depth
+
+DEFAULT_KEEPALIVE = 1.0  # seconds
+PULSE_MARGIN_MS = 2 * 33  # a firmware loop before the pulse starts and after it ends
+
+
+def expected_pwm(penetration_depth: float) -> int:
+    """PWM level the firmware drives for a sustained depth sent over the wire."""
+    depth = dequantize_depth(quantize_depth(penetration_depth))
+    if depth < PENETRATION_THRESHOLD:
+        return 0
+    amplitude = SUSTAINED_CONTACT_MIN_AMPLITUDE + int(
+        (SUSTAINED_CONTACT_MAX_AMPLITUDE - SUSTAINED_CONTACT_MIN_AMPLITUDE) * depth)
+    return max(SUSTAINED_CONTACT_MIN_AMPLITUDE, min(SUSTAINED_CONTACT_MAX_AMPLITUDE, amplitude))
+
+
+class DeviceShadow:
+    def __init__(self, clock, num_motors: int = NUM_MOTORS, keepalive: Optional[float] = DEFAULT_KEEPALIVE):
+        self.clock = clock
+        self.num_motors = num_motors
+        self.keepalive_ns = int(keepalive * 1e9) if keepalive else None
+        self.pulse_ns = (FIRST_CONTACT_PULSE_DURATION + PULSE_MARGIN_MS) * 1000000
+        self.pwm: List[Optional[int]] = [None] * num_motors  # None: unknown
+        self.sent_ns = [0] * num_motors
+        self.pulse_end_ns = [0] * num_motors
+
+        # Statistics
+        self.sent = 0
+        self.suppressed = 0
+
+    def _changes(self, actuator_id: int, pwm: int, first_contact: bool, now_ns: int) -> bool:
+        if first_contact or self.pwm[actuator_id] != pwm:
+            return True
+        return self.keepalive_ns is not None and now_ns - self.sent_ns[actuator_id] >= self.keepalive_ns
+
+    def _apply(self, actuator_id: int, pwm: int, first_contact: bool, now_ns: int):
+        self.sent_ns[actuator_id] = now_ns
+        if first_contact and pwm:
+            self.pwm[actuator_id] = FIRST_CONTACT_AMPLITUDE
+            self.pulse_end_ns[actuator_id] = now_ns + self.pulse_ns
+        elif pwm and now_ns < self.pulse_end_ns[actuator_id]:
+            # Ignored by the firmware while the pulse runs
+            self.pwm[actuator_id] = FIRST_CONTACT_AMPLITUDE
+        else:
+            self.pwm[actuator_id] = pwm
+            self.pulse_end_ns[actuator_id] = 0
+
+    def check_event(self, actuator_id: int, penetration_depth: float, first_contact: bool,
+                    force: bool = False) -> bool:
+        """True if the event should be sent; the shadow then assumes it was."""
+        now_ns = self.clock.monotonic_ns()
+        pwm = expected_pwm(penetration_depth)
+        if not force and not self._changes(actuator_id, pwm, first_contact, now_ns):
+            self.suppressed += 1
+            return False
+        self._apply(actuator_id, pwm, first_contact, now_ns)
+        self.sent += 1
+        return True
+
+    def check_frame(self, depths: Sequence[float], first_contact_mask: int, force: bool = False) -> bool:
+        """True if the frame changes any motor; a frame is sent or skipped as a whole."""
+        now_ns = self.clock.monotonic_ns()
+        pwms = [expected_pwm(depth) for depth in depths]
+        first_contacts = [bool(first_contact_mask & (1 << motor_id)) for motor_id in range(len(depths))]
+        if not force and not any(self._changes(motor_id, pwm, first_contact, now_ns)
+                                 for motor_id, (pwm, first_contact) in enumerate(zip(pwms, first_contacts))):
+            self.suppressed += 1
+            return False
+        for motor_id, (pwm, first_contact) in enumerate(zip(pwms, first_contacts)):
+            self._apply(motor_id, pwm, first_contact, now_ns)
+        self.sent += 1
+        return True
+
+    def forget(self):
+        """Mark every motor unknown so the next command for it is sent."""
+        self.pwm = [None] * self.num_motors
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Tact Spatial Renderer
+Turns a contact point on the skin into per-motor intensities.
+
+MotorLayout gives every motor (and its PWM pin) a physical position in
+millimetres; the two layouts from the wiring guide are predefined. A contact
+between motors is rendered as a phantom sensation using the energy model:
+the surrounding motors get linear (barycentric) weights that sum to 1, and
+each intensity is depth * sqrt(weight), so the summed vibration energy stays
+equal to the contact depth wherever the contact is.
+
+The weights depend only on the layout, so SpatialRenderer computes them once
+for a grid of cells covering the layout (plus a margin) and rendering a
+contact, or a whole path of contacts, is a table lookup.
+"""
+
+import itertools
+from typing import List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from tact_protocol import MOTOR_PINS, NUM_MOTORS
+
+MOTOR_SPACING = 63.5  # mm, 2.5 inches as recommended in the wiring guide
+
+
+class MotorPosition(NamedTuple):
+    actuator_id: int
+    pin: int
+    x: float   # mm
+    y: float   # mm
+
+
+class MotorLayout:
+    def __init__(self, name: str, coordinates: Sequence[Tuple[float, float]]):
+        self.name = name
+        self.motors = [MotorPosition(actuator_id, MOTOR_PINS[actuator_id], float(x), float(y))
+                       for actuator_id, (x, y) in enumerate(coordinates)]
+
+    def positions(self) -> np.ndarray:
+        """(motors, 2) array of x, y."""
+        return np.array([(motor.x, motor.y) for motor in self.motors])
+
+    def center(self) -> Tuple[float, float]:
+        x, y = self.positions().mean(axis=0)
+        return float(x), float(y)
+
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """min_x, min_y, max_x, max_y."""
+        positions = self.positions()
+        return (*positions.min(axis=0).tolist(), *positions.max(axis=0).tolist())
+
+
+# Back of hand: x across the hand, y from the fingers towards the wrist
+BACK_OF_HAND_LAYOUT = MotorLayout('back_of_hand', [
+    (0.0, 0.0), (0.0, MOTOR_SPACING), (MOTOR_SPACING, MOTOR_SPACING), (MOTOR_SPACING, 0.0)])
+# Forearm: a line from the elbow towards the wrist
+FOREARM_LAYOUT = MotorLayout('forearm', [(index * MOTOR_SPACING, 0.0) for index in range(NUM_MOTORS)])
+LAYOUTS = {layout.name: layout for layout in (BACK_OF_HAND_LAYOUT, FOREARM_LAYOUT)}
+
+
+def _segment_weights(positions: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """Linear weights along the nearest motor pair (shortest pair on ties)."""
+    weights = np.zeros((len(points), len(positions)))
+    best = np.full((len(points), 2), np.inf)  # distance, segment length
+    for i, j in itertools.combinations(range(len(positions)), 2):
+        segment = positions[j] - positions[i]
+        length = float(np.hypot(*segment))
+        if length == 0:
+            continue
+        t = np.clip((points - positions[i]) @ segment / length ** 2, 0, 1)
+        distance = np.hypot(*(points - (positions[i] + t[:, np.newaxis] * segment)).T)
+        closer = (distance < best[:, 0] - 1e-9) | ((np.abs(distance - best[:, 0]) <= 1e-9) & (length < best[:, 1]))
+        weights[closer] = 0
+        weights[closer, i] = 1 - t[closer]
+        weights[closer, j] = t[closer]
+        best[closer] = np.column_stack([distance[closer], np.full(closer.sum(), length)])
+    return weights
+
+
+def phantom_weights(layout: MotorLayout, points: np.ndarray) -> np.ndarray:
+    """Energy-model amplitude weights, shape (points, motors), for (points, 2) positions.
+
+    Inside the layout the linear weights are barycentric coordinates averaged
+    over every motor triangle that contains the point (so a square of motors
+    renders symmetrically); elsewhere, and for motors in a line, they
+    interpolate along the nearest pair of motors.
+    """
+    positions = layout.positions()
+    if len(positions) == 1:
+        return np.ones((len(points), 1))
+    triangles = []  # (linear weights, inside) per non-degenerate motor triangle
+    for i, j, k in itertools.combinations(range(len(positions)), 3):
+        a, b, c = positions[i], positions[j], positions[k]
+        area = (b[0] - a[0]) * (c[1] - a[1]) - (c[0] - a[0]) * (b[1] - a[1])
+        if abs(area) < 1e-9:
+            continue
+        weights = np.zeros((len(points), len(positions)))
+        weights[:, j] = ((points[:, 0] - a[0]) * (c[1] - a[1]) - (c[0] - a[0]) * (points[:, 1] - a[1])) / area
+        weights[:, k] = ((b[0] - a[0]) * (points[:, 1] - a[1]) - (points[:, 0] - a[0]) * (b[1] - a[1])) / area
+        weights[:, i] = 1 - weights[:, j] - weights[:, k]
+        inside = np.all(weights[:, [i, j, k]] >= -1e-9, axis=1)
+        # A point on a shared edge gets the same weights from both triangles; count them once
+        for earlier, earlier_inside in triangles:
+            inside &= ~(earlier_inside & np.all(np.abs(weights - earlier) < 1e-9, axis=1))
+        triangles.append((weights, inside))
+
+    linear = np.zeros((len(points), len(positions)))
+    containing = np.zeros(len(points))
+    for weights, inside in triangles:
+        linear[inside] += weights[inside]
+        containing += inside
+
+    outside = containing == 0
+    linear[~outside] /= containing[~outside, np.newaxis]
+    linear[outside] = _segment_weights(positions, points[outside])
+    return np.sqrt(np.clip(linear, 0, 1))
+
+
+class SpatialRenderer:
+    """Precomputed weight grid for a motor layout."""
+
+    def __init__(self, layout: MotorLayout = BACK_OF_HAND_LAYOUT, resolution: float = 1.0,
+                 margin: float = 20.0):
+        self.layout = layout
+        self.resolution = resolution
+        min_x, min_y, max_x, max_y = layout.bounds()
+        self.origin = (min_x - margin, min_y - margin)
+        self.columns = int(np.ceil((max_x - min_x + 2 * margin) / resolution)) + 1
+        self.rows = int(np.ceil((max_y - min_y + 2 * margin) / resolution)) + 1
+
+        xs = self.origin[0] + np.arange(self.columns) * resolution
+        ys = self.origin[1] + np.arange(self.rows) * resolution
+        grid_x, grid_y = np.meshgrid(xs, ys)
+        points = np.column_stack([grid_x.ravel(), grid_y.ravel()])
+        weights = phantom_weights(layout, points)
+        self.weights = weights.reshape(self.rows, self.columns, -1).astype(np.float32)
+        self.weights.flags.writeable = False
+
+    def cells(self, x, y) -> Tuple[np.ndarray, np.ndarray]:
+        """Grid row and column of positions; points off the grid use the nearest edge cell."""
+        column = np.clip(np.rint((np.asarray(x) - self.origin[0]) / self.resolution), 0, self.columns - 1)
+        row = np.clip(np.rint((np.asarray(y) - self.origin[1]) / self.resolution), 0, self.rows - 1)
+        return row.astype(np.intp), column.astype(np.intp)
+
+    def render(self, x: float, y: float, depth: float) -> List[float]:
+        """Per-motor intensities for one contact at (x, y) mm."""
+        row, column = self.cells(x, y)
+        return np.minimum(self.weights[row, column] * depth, 1.0).tolist()
+
+    def render_path(self, xs, ys, depths) -> np.ndarray:
+        """(points, motors) intensities for a sequence of contacts."""
+        rows, columns = self.cells(xs, ys)
+        return np.minimum(self.weights[rows, columns] * np.reshape(depths, (-1, 1)), 1.0)
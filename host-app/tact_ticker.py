@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tact Tick Scheduler
+Fixed-rate ticks driven by absolute deadlines.
+
+Sleeping for the tick period after each step lets serial writes, logging and
+OS sleep overshoot add up, so a 2 s gesture at 20 Hz ran noticeably long.
+TickScheduler instead computes every deadline as start + index * period and
+waits for it with the clock's sleep_until() (sleep, then spin the last couple
+of milliseconds), so time spent on a tick never delays the next one. When a
+tick is already more than a period late, the catch-up policy decides what
+happens: "skip" jumps to the tick that is due now (the final tick always runs),
+"compress" runs the missed ticks back to back until the schedule is met again.
+How late each tick ran is recorded in a LatencyHistogram.
+"""
+
+from typing import Iterator, Optional
+
+from tact_clock import SPIN_THRESHOLD_NS, SYSTEM_CLOCK
+from tact_latency import LatencyHistogram
+
+CATCH_UP_SKIP = 'skip'
+CATCH_UP_COMPRESS = 'compress'
+CATCH_UP_POLICIES = (CATCH_UP_SKIP, CATCH_UP_COMPRESS)
+
+
+class TickScheduler:
+    def __init__(self, period: float, clock=SYSTEM_CLOCK, catch_up: str = CATCH_UP_SKIP,
+                 spin_ns: int = SPIN_THRESHOLD_NS):
+        if catch_up not in CATCH_UP_POLICIES:
+            raise ValueError(f"Unknown catch-up policy: {catch_up}")
+        self.period_ns = int(round(period * 1e9))
+        self.clock = clock
+        self.catch_up = catch_up
+        self.spin_ns = spin_ns
+        self.lateness = LatencyHistogram()  # microseconds past each deadline
+
+        # Statistics for the last run
+        self.count: Optional[int] = 0
+        self.ran = 0
+        self.skipped = 0
+        self.last_index: Optional[int] = None
+        self.elapsed_ns: Optional[int] = None  # start to the last tick that ran
+
+    def ticks(self, count: Optional[int] = None) -> Iterator[int]:
+        """Yield tick indices 0..count-1, each at its deadline; skipped indices are not yielded.
+
+        With count None the ticks go on until the caller stops iterating.
+        """
+        self.lateness.reset()
+        self.count = count
+        self.ran = 0
+        self.skipped = 0
+        self.last_index = None
+        self.elapsed_ns = None
+        start_ns = self.clock.monotonic_ns()
+        index = 0
+        while count is None or index < count:
+            deadline_ns = start_ns + index * self.period_ns
+            now_ns = self.clock.monotonic_ns()
+            if now_ns < deadline_ns:
+                self.clock.sleep_until(deadline_ns, self.spin_ns)
+                now_ns = self.clock.monotonic_ns()
+            elif self.catch_up == CATCH_UP_SKIP and now_ns - deadline_ns >= self.period_ns:
+                behind = (now_ns - deadline_ns) // self.period_ns
+                if count is not None:
+                    behind = min(behind, count - 1 - index)
+                self.skipped += behind
+                index += behind
+                deadline_ns = start_ns + index * self.period_ns
+
+            self.lateness.record((now_ns - deadline_ns) // 1000)
+            self.ran += 1
+            self.last_index = index
+            self.elapsed_ns = now_ns - start_ns
+            yield index
+            index += 1
+
+    def report(self) -> str:
+        """One-line summary of the last run: duration against nominal and lateness in ms."""
+        stats = self.lateness.summary()
+        if not stats['count']:
+            return "No ticks run yet"
+
+        def ms(value):
+            return f"{value / 1000:.2f}"
+
+        nominal = self.last_index * self.period_ns / 1e9
+        count = self.last_index + 1 if self.count is None else self.count
+        return (f"{self.ran}/{count} ticks at {1e9 / self.period_ns:.1f} Hz, "
+                f"{self.skipped} skipped ({self.catch_up}), {self.elapsed_ns / 1e9:.3f}s "
+                f"(nominal {nominal:.3f}s) | "
+                f"lateness ms: p50 {ms(stats['p50'])}, p99 {ms(stats['p99'])}, max {ms(stats['max'])}")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tact Message Trace
+Fixed-size in-memory record of the messages sent to and received from the
+device.
+
+Recording is a single deque append of the raw bytes and a monotonic timestamp;
+formatting only happens when entries are dumped, so tracing stays cheap on the
+send path. Console output goes through the "tact" logger, where per-message
+lines are logged at DEBUG and stay silent at the default levels.
+"""
+
+import collections
+import logging
+from typing import List, NamedTuple, Optional
+
+from tact_clock import SYSTEM_CLOCK
+
+logger = logging.getLogger("tact")
+
+DEFAULT_TRACE_SIZE = 1024
+
+DIRECTION_SENT = 'tx'
+DIRECTION_RECEIVED = 'rx'
+
+
+class TraceEntry(NamedTuple):
+    timestamp_ns: int
+    direction: str
+    data: bytes
+
+
+class MessageTrace:
+    def __init__(self, size: int = DEFAULT_TRACE_SIZE, clock=SYSTEM_CLOCK):
+        self.entries = collections.deque(maxlen=size)
+        self.clock = clock
+        self.start_ns = clock.monotonic_ns()
+
+    def record(self, direction: str, data: bytes):
+        """Append a message to the ring buffer, evicting the oldest if full."""
+        self.entries.append(TraceEntry(self.clock.monotonic_ns(), direction, data))
+
+    def sent(self, data: bytes):
+        self.record(DIRECTION_SENT, data)
+
+    def received(self, data: bytes):
+        self.record(DIRECTION_RECEIVED, data)
+
+    def clear(self):
+        self.entries.clear()
+
+    def last(self, count: Optional[int] = None) -> List[TraceEntry]:
+        """Return the most recent entries, oldest first."""
+        entries = list(self.entries)
+        if count is not None:
+            entries = entries[-count:] if count > 0 else []
+        return entries
+
+    def format_entry(self, entry: TraceEntry) -> str:
+        elapsed_ms = (entry.timestamp_ns - self.start_ns) / 1e6
+        return f"{elapsed_ms:12.3f} ms  {entry.direction}  {format_message(entry.data)}"
+
+    def dump(self, count: Optional[int] = None) -> List[str]:
+        """Format the last entries as text lines."""
+        return [self.format_entry(entry) for entry in self.last(count)]
+
+
+def format_message(data: bytes) -> str:
+    """Render a wire message as text, falling back to hex for binary data."""
+    try:
+        text = data.decode('ascii')
+    except UnicodeDecodeError:
+        return data.hex()
+    lines = text.strip().splitlines()
+    if all(line.isprintable() for line in lines):
+        return ' | '.join(line.strip() for line in lines)
+    return data.hex()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Tact In-Memory Transport
+Serial-port stand-in wired straight to the firmware model.
+
+InMemoryTransport implements the parts of the pyserial API the host tools use
+(write, readline, timeout, dtr, close) on top of TactFirmwareReference. Time
+comes from a VirtualClock: the firmware loop runs as a clock timer every 33 ms,
+reading whatever the host wrote before that loop, and scheduled commands fire at
+their exact due time. Device lines are handed to a subscribed DeviceReader as
+soon as they are printed, so no reader thread is needed. The board is assumed to
+be running already; the start-up banner and motor test are not modelled here
+(use tact_emulator.py for that).
+"""
+
+import collections
+from typing import Callable, List, Optional
+
+from tact_clock import VirtualClock
+from tact_firmware_reference import TactFirmwareReference, _signed32
+
+LOOP_DELAY = 33  # milliseconds
+
+
+class InMemoryTransport:
+    def __init__(self, clock: VirtualClock, firmware: Optional[TactFirmwareReference] = None,
+                 loop_period_ms: int = LOOP_DELAY):
+        self.clock = clock
+        self.firmware = firmware or TactFirmwareReference(clock=clock.monotonic)
+        self.loop_period_ns = loop_period_ms * 1000000
+        self.pending_input = bytearray()
+        self.lines = collections.deque()
+        self.subscribers: List[Callable[[bytes], None]] = []
+        self.is_open = True
+
+        # pyserial attributes touched by the host tools
+        self.port = "memory"
+        self.timeout = 1.0
+        self.dtr = True
+        self.rts = True
+
+        # Statistics
+        self.loops = 0
+        self.bytes_written = 0
+
+        self.clock.call_at(self.clock.monotonic_ns(), self._loop)
+
+    def _loop(self):
+        if not self.is_open:
+            return
+        firmware = self.firmware
+        firmware.feed(bytes(self.pending_input))
+        self.pending_input.clear()
+        firmware.update_playback()
+        firmware.update_motor_states()
+        firmware.apply_due_commands()
+        self._deliver()
+        self.loops += 1
+
+        next_loop_ns = self.clock.monotonic_ns() + self.loop_period_ns
+        self._schedule_due_commands(next_loop_ns)
+        self.clock.call_at(next_loop_ns, self._loop)
+
+    def _schedule_due_commands(self, next_loop_ns: int):
+        # The firmware applies scheduled commands during its loop delay
+        if not self.firmware.has_pending_schedule:
+            return
+        wait_ms = _signed32(self.firmware.pending_schedule_time - self.firmware.millis())
+        due_ns = self.clock.monotonic_ns() + max(0, wait_ms) * 1000000
+        if due_ns < next_loop_ns:
+            self.clock.call_at(due_ns, lambda: self._apply_due_commands(next_loop_ns))
+
+    def _apply_due_commands(self, next_loop_ns: int):
+        if not self.is_open:
+            return
+        self.firmware.apply_due_commands()
+        self._deliver()
+        self._schedule_due_commands(next_loop_ns)
+
+    def _deliver(self):
+        for line in self.firmware.output:
+            raw = (line + "\r\n").encode()
+            if self.subscribers:
+                for callback in list(self.subscribers):
+                    callback(raw)
+            else:
+                self.lines.append(raw)
+        self.firmware.output.clear()
+
+    def subscribe(self, callback: Callable[[bytes], None]):
+        """Push each device line to callback instead of queueing it for readline()."""
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[bytes], None]):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def write(self, data: bytes) -> int:
+        if not self.is_open:
+            raise OSError("Transport is closed")
+        self.pending_input.extend(data)
+        self.bytes_written += len(data)
+        return len(data)
+
+    def readline(self) -> bytes:
+        """Next device line, advancing virtual time by up to `timeout` to wait for it."""
+        if not self.lines:
+            deadline_ns = self.clock.monotonic_ns() + int((self.timeout or 0) * 1e9)
+            self.clock.advance_until(deadline_ns, lambda: bool(self.lines))
+        return self.lines.popleft() if self.lines else b""
+
+    @property
+    def in_waiting(self) -> int:
+        return sum(len(line) for line in self.lines)
+
+    def reset_input_buffer(self):
+        self.lines.clear()
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.is_open = False
@@ -15,7 +15,6 @@ Usage:
 """
 
 import sys
-import os
 import subprocess
 import time
 from pathlib import Path
@@ -51,15 +50,16 @@ def install_dependencies():
         return False
     
     try:
-        # Try to import pyserial first
+        # Try to import pyserial and numpy first
         import serial
-        print(f"✅ pyserial {serial.__version__} already available")
+        import numpy
+        print(f"✅ pyserial {serial.__version__} and numpy {numpy.__version__} already available")
         return True
     except ImportError:
         pass
     
     try:
-        print("   Installing pyserial...")
+        print("   Installing pyserial and numpy...")
         subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", str(requirements_file)])
         print("✅ Dependencies installed successfully")
         return True
@@ -78,15 +78,13 @@ def detect_arduino():
     print("\n[3/6] Detecting Arduino connection...")
     
     try:
-        import serial.tools.list_ports
+        sys.path.append(str(Path(__file__).parent / 'host-app'))
+        from tact_port_discovery import discover_ports
         
-        # Look for Arduino devices
-        arduino_ports = []
-        for port in serial.tools.list_ports.comports():
-            if any(keyword in port.description.lower() for keyword in ['arduino', 'genuino', 'intel']):
-                arduino_ports.append(port.device)
+        # Cached port first, otherwise probe all candidates concurrently
+        results = discover_ports()
         
-        if not arduino_ports:
+        if not results:
             print("❌ No Arduino devices detected")
             print("   Please check:")
             print("   - Arduino 101 is connected via USB")
@@ -94,14 +92,15 @@ def detect_arduino():
             print("   - Arduino drivers are installed")
             return None
         
-        if len(arduino_ports) == 1:
-            print(f"✅ Arduino detected on {arduino_ports[0]}")
-            return arduino_ports[0]
+        if len(results) == 1:
+            print(f"✅ Arduino detected on {results[0].candidate.device}")
+            return results[0].candidate.device
         else:
             print(f"✅ Multiple Arduino devices detected:")
-            for i, port in enumerate(arduino_ports):
-                print(f"   {i+1}. {port}")
-            return arduino_ports[0]  # Use first one
+            for i, result in enumerate(results):
+                firmware = f" ({result.firmware})" if result.firmware else ""
+                print(f"   {i+1}. {result.candidate.device}{firmware}")
+            return results[0].candidate.device  # Best match first
             
     except ImportError:
         print("❌ Error: pyserial not available")
@@ -110,75 +109,61 @@ def detect_arduino():
         print(f"❌ Error detecting Arduino: {e}")
         return None
 
-def check_firmware(port):
-    """Check if Tact firmware is loaded"""
-    print("\n[4/6] Checking firmware...")
-    
+def open_session(port):
+    """Open the one connection shared by every remaining step and demo"""
     try:
-        import serial
-        
-        # Try to connect and send test command
-        ser = serial.Serial(port, 115200, timeout=2)
-        time.sleep(2)  # Wait for Arduino to initialize
-        
-        # Send test command
-        ser.write(b"0,0.5,1\n")
-        time.sleep(0.1)
+        sys.path.append(str(Path(__file__).parent / 'host-app'))
+        from tact_host_simulator import TactHostSimulator
         
-        # Try to read response (firmware sends confirmation)
-        response = ser.read_all().decode('utf-8', errors='ignore')
-        ser.close()
+        # Don't assert DTR, so a running board is not reset; the basic test
+        # below exercises every motor, so the firmware's own test is skipped
+        session = TactHostSimulator(port=port, reset_on_open=False, skip_motor_test=True)
+        if not session.connect():
+            print("❌ Failed to connect to Tact device")
+            return None
+        return session
         
-        if "Tact" in response or "Motor" in response or len(response) > 0:
-            print("✅ Tact firmware detected")
-            return True
-        else:
-            print("⚠️  Warning: Firmware may not be loaded")
-            print("   Please upload tact_haptic_controller.ino to your Arduino")
-            return False
-            
-    except Exception as e:
-        print(f"⚠️  Warning: Could not verify firmware: {e}")
-        print("   Continuing anyway...")
+    except ImportError as e:
+        print(f"❌ Error importing controller: {e}")
+        return None
+
+def check_firmware(session):
+    """Check if Tact firmware is loaded"""
+    print("\n[4/6] Checking firmware...")
+    
+    status = session.ready_status
+    if status.ready:
+        print(f"✅ Tact firmware detected (connected in {session.connect_time:.2f}s)")
         return True
+    else:
+        print("⚠️  Warning: Firmware may not be loaded")
+        print("   Please upload tact_haptic_controller.ino to your Arduino")
+        return False
 
-def run_basic_test(port):
+def run_basic_test(session):
     """Run basic functionality test"""
     print("\n[5/6] Running basic functionality test...")
     
     try:
-        # Import the controller
-        sys.path.append(str(Path(__file__).parent / 'host-app'))
-        from tact_host_simulator import TactHostSimulator
-        
-        controller = TactHostSimulator(port=port)
-        if not controller.connect():
-            print("❌ Failed to connect to Tact device")
-            return False
-        
         print("   Testing motor activation...")
         
         # Test each motor briefly
         for motor_id in range(4):
             print(f"   Motor {motor_id}...", end=" ")
-            controller.send_touch_event(motor_id, 0.6, first_contact=True)
+            session.send_touch_event(motor_id, 0.6, first_contact=True)
             time.sleep(0.3)
-            controller.send_touch_event(motor_id, 0.0, first_contact=False)
+            session.send_touch_event(motor_id, 0.0, first_contact=False)
             time.sleep(0.2)
             print("OK")
         
-        controller.disconnect()
         print("✅ Basic test completed successfully")
         return True
         
-    except ImportError as e:
-        print(f"❌ Error importing controller: {e}")
-        return False
     except Exception as e:
         print(f"❌ Error during test: {e}")
         return False
 
-def launch_demo(port):
+def launch_demo(session):
     """Launch interactive demo"""
     print("\n[6/6] Launching interactive demo...")
     print("\n" + "=" * 40)
@@ -190,17 +175,21 @@ def launch_demo(port):
     print("  2. Run gesture patterns demo")
     print("  3. Exit")
     
+    # Demos run in this process on the already open session
+    sys.path.append(str(Path(__file__).parent / 'examples'))
+    from basic_usage import run_demo
+    
     while True:
         try:
             choice = input("\nSelect option (1-3): ").strip()
             
             if choice == '1':
                 print("\nStarting interactive demo...")
-                os.system(f'python "{Path(__file__).parent / "examples" / "basic_usage.py"}" --port "{port}" --demo interactive')
+                run_demo(session, 'interactive')
                 break
             elif choice == '2':
                 print("\nStarting gesture demo...")
-                os.system(f'python "{Path(__file__).parent / "examples" / "basic_usage.py"}" --port "{port}" --demo gestures')
+                run_demo(session, 'gestures')
                 break
             elif choice == '3':
                 print("\nExiting. Your Tact system is ready for use!")
@@ -260,17 +249,26 @@ def main():
         print("\nPlease connect your Arduino 101 and try again.")
         return 1
     
-    # Step 4: Check firmware
-    firmware_ok = check_firmware(arduino_port)
-    
-    # Step 5: Run basic test (only if firmware seems OK)
-    if firmware_ok:
-        test_ok = run_basic_test(arduino_port)
-        if not test_ok:
-            print("\n⚠️  Basic test failed, but continuing...")
+    # Open the port once for every remaining step
+    session = open_session(arduino_port)
+    if session is None:
+        print("\n❌ Setup failed: Could not connect to Arduino")
+        return 1
     
-    # Step 6: Launch demo
-    launch_demo(arduino_port)
+    try:
+        # Step 4: Check firmware
+        firmware_ok = check_firmware(session)
+        
+        # Step 5: Run basic test (only if firmware seems OK)
+        if firmware_ok:
+            test_ok = run_basic_test(session)
+            if not test_ok:
+                print("\n⚠️  Basic test failed, but continuing...")
+        
+        # Step 6: Launch demo
+        launch_demo(session)
+    finally:
+        session.disconnect()
     
     # Print next steps
     print_next_steps()
@@ -7,29 +7,42 @@ validating communication, motor response, and gesture functionality.
 """
 
 import sys
-import time
 import serial
-import serial.tools.list_ports
+from pathlib import Path
 from typing import List, Optional
 
+# Add host-app directory to path to import the protocol helpers
+sys.path.append(str(Path(__file__).parent.parent / 'host-app'))
+
+from tact_clock import SYSTEM_CLOCK, VirtualClock
+from tact_handshake import wait_for_ready
+from tact_latency import AckTracker
+from tact_port_discovery import find_tact_port
+from tact_reader import DeviceReader, EVENT_ACK
+from tact_transport import InMemoryTransport
+
 class TactValidator:
-    def __init__(self, port: str = None, baud_rate: int = 115200):
+    def __init__(self, port: str = None, baud_rate: int = 115200, measure_latency: bool = False,
+                 skip_motor_test: bool = False, clock=SYSTEM_CLOCK, transport=None):
         self.port = port
         self.baud_rate = baud_rate
         self.serial_connection = None
         self.test_results = []
+        self.measure_latency = measure_latency
+        self.clock = clock
+        self.transport = transport
+        self.acks = AckTracker(clock=clock)
+        self.skip_motor_test = skip_motor_test
         
     def find_arduino_port(self) -> Optional[str]:
         """Find Arduino port automatically."""
-        ports = serial.tools.list_ports.comports()
-        for port in ports:
-            if 'Arduino' in port.description or 'USB' in port.description:
-                return port.device
-        return None
+        return find_tact_port(self.baud_rate)
     
     def connect(self) -> bool:
         """Establish connection to Arduino."""
-        if self.port is None:
+        if self.transport is not None:
+            self.port = self.transport.port
+        elif self.port is None:
             self.port = self.find_arduino_port()
             
         if self.port is None:
@@ -37,21 +50,14 @@ class TactValidator:
             return False
             
         try:
-            self.serial_connection = serial.Serial(self.port, self.baud_rate, timeout=2)
-            time.sleep(2)  # Wait for Arduino initialization
+            self.serial_connection = self.transport or serial.Serial(self.port, self.baud_rate, timeout=2)
             
-            # Check for Arduino ready message
-            ready_found = False
-            for _ in range(10):
-                if self.serial_connection.in_waiting:
-                    response = self.serial_connection.readline().decode().strip()
-                    if "Tact Haptic Controller Ready" in response:
-                        ready_found = True
-                        break
-                time.sleep(0.1)
+            # Wait for the firmware to report ready (or answer a probe if already running)
+            status = wait_for_ready(self.serial_connection, skip_motor_test=self.skip_motor_test,
+                                    clock=self.clock)
             
-            if ready_found:
-                self.log_result("Connection", True, f"Connected to {self.port}")
+            if status.ready:
+                self.log_result("Connection", True, f"Connected to {self.port} in {status.elapsed:.2f}s")
                 return True
             else:
                 self.log_result("Connection", False, "Arduino not responding with ready message")
@@ -68,17 +74,21 @@ class TactValidator:
             'test': test_name,
             'status': status,
             'details': details,
-            'timestamp': time.time()
+            'timestamp': self.clock.time()
         }
         self.test_results.append(result)
         print(f"[{status}] {test_name}: {details}")
     
-    def send_command(self, actuator_id: int, penetration: float, first_contact: bool) -> bool:
+    def send_command(self, actuator_id: int, penetration: float, first_contact: bool,
+                     sequence: Optional[int] = None) -> bool:
         """Send command and verify transmission."""
         if not self.serial_connection:
             return False
             
         message = f"{actuator_id},{penetration:.2f},{1 if first_contact else 0}\n"
+        if sequence is not None:
+            message = message[:-1] + f"@{sequence}\n"
+            self.acks.mark_sent(sequence)
         try:
             self.serial_connection.write(message.encode())
             return True
@@ -102,7 +112,7 @@ class TactValidator:
         for actuator_id, penetration, first_contact in test_commands:
             if self.send_command(actuator_id, penetration, first_contact):
                 success_count += 1
-                time.sleep(0.1)
+                self.clock.sleep(0.1)
         
         passed = success_count == len(test_commands)
         self.log_result("Basic Communication", passed, 
@@ -119,7 +129,7 @@ class TactValidator:
             
             # Send activation command
             if self.send_command(motor_id, 0.7, True):
-                time.sleep(0.2)  # Let motor run
+                self.clock.sleep(0.2)  # Let motor run
                 
                 # Send deactivation command
                 if self.send_command(motor_id, 0.0, False):
@@ -132,7 +142,7 @@ class TactValidator:
                 motor_results.append(False)
                 print(f"  Motor {motor_id}: Failed to activate")
             
-            time.sleep(0.3)  # Pause between motors
+            self.clock.sleep(0.3)  # Pause between motors
         
         success_count = sum(motor_results)
         passed = success_count >= 3  # Allow one motor to fail
@@ -160,7 +170,7 @@ class TactValidator:
                 if not self.send_command(actuator_id, penetration, first_contact):
                     sequence_success = False
                     break
-                time.sleep(0.1)
+                self.clock.sleep(0.1)
             
             if sequence_success:
                 success_count += 1
@@ -168,7 +178,7 @@ class TactValidator:
             else:
                 print(f"  Sequence {i+1}: Failed")
             
-            time.sleep(0.5)  # Pause between sequences
+            self.clock.sleep(0.5)  # Pause between sequences
         
         passed = success_count == len(test_sequences)
         self.log_result("First Contact Detection", passed, 
@@ -190,7 +200,7 @@ class TactValidator:
             self.log_result("Intensity Scaling", False, "Failed to start intensity test")
             return False
         
-        time.sleep(0.2)
+        self.clock.sleep(0.2)
         
         # Test scaling through different levels
         success_count = 0
@@ -200,7 +210,7 @@ class TactValidator:
                 print(f"  Intensity {intensity}: Sent successfully")
             else:
                 print(f"  Intensity {intensity}: Failed")
-            time.sleep(0.3)
+            self.clock.sleep(0.3)
         
         # Stop motor
         self.send_command(motor_id, 0.0, False)
@@ -215,7 +225,7 @@ class TactValidator:
         print("\n=== Testing Timing Performance ===")
         
         # Test rapid command sequence
-        start_time = time.time()
+        start_time = self.clock.monotonic()
         command_count = 20
         success_count = 0
         
@@ -227,9 +237,9 @@ class TactValidator:
             if self.send_command(motor_id, penetration, first_contact):
                 success_count += 1
             
-            time.sleep(0.05)  # 20 Hz rate
+            self.clock.sleep(0.05)  # 20 Hz rate
         
-        end_time = time.time()
+        end_time = self.clock.monotonic()
         total_time = end_time - start_time
         expected_time = command_count * 0.05
         
@@ -241,6 +251,44 @@ class TactValidator:
                        f"{success_count}/{command_count} commands in {total_time:.2f}s")
         return passed
     
+    def test_round_trip_latency(self, rates=(10, 20, 50), commands_per_rate: int = 40) -> bool:
+        """Measure command-to-ack latency at several send rates."""
+        print("\n=== Testing Round-Trip Latency ===")
+        
+        reader = DeviceReader(self.serial_connection, clock=self.clock)
+        reader.add_callback(EVENT_ACK, lambda event: self.acks.mark_acked(event.sequence, event.timestamp_ns))
+        reader.start()
+        
+        passed = True
+        try:
+            for rate in rates:
+                self.acks.reset()
+                interval = 1.0 / rate
+                next_send = self.clock.monotonic()
+                for i in range(commands_per_rate):
+                    motor_id = i % 4
+                    penetration = 0.5 if (i // 4) % 2 == 0 else 0.0
+                    self.send_command(motor_id, penetration, False, self.acks.allocate())
+                    next_send += interval
+                    self.clock.sleep(max(0.0, next_send - self.clock.monotonic()))
+                
+                self.acks.wait_for_acks(timeout=1.0)
+                report = self.acks.report()
+                print(f"  {rate} Hz: {report}")
+                
+                # Require nearly every command to be acknowledged
+                rate_ok = self.acks.acked >= 0.95 * commands_per_rate
+                passed = passed and rate_ok
+                self.log_result(f"Round-Trip Latency @ {rate} Hz", rate_ok, report)
+        finally:
+            reader.stop()
+            
+        # Leave all motors off
+        for motor_id in range(4):
+            self.send_command(motor_id, 0.0, False)
+        
+        return passed
+    
     def test_error_handling(self) -> bool:
         """Test system error handling with invalid commands."""
         print("\n=== Testing Error Handling ===")
@@ -264,11 +312,11 @@ class TactValidator:
             except Exception as e:
                 print(f"  Invalid command {i+1}: Caused exception: {e}")
             
-            time.sleep(0.1)
+            self.clock.sleep(0.1)
         
         # Send valid command to ensure system still works
         if self.send_command(0, 0.5, True):
-            time.sleep(0.1)
+            self.clock.sleep(0.1)
             self.send_command(0, 0.0, False)
             recovery_ok = True
         else:
@@ -298,6 +346,8 @@ class TactValidator:
             self.test_timing_performance,
             self.test_error_handling
         ]
+        if self.measure_latency:
+            tests.append(self.test_round_trip_latency)
         
         passed_tests = 0
         for test in tests:
@@ -336,10 +386,22 @@ def main():
     parser = argparse.ArgumentParser(description='Tact System Validation Suite')
     parser.add_argument('--port', help='Serial port (auto-detect if not specified)')
     parser.add_argument('--baud', type=int, default=115200, help='Baud rate')
+    parser.add_argument('--latency', action='store_true',
+                        help='Measure round-trip latency using device acks')
+    parser.add_argument('--skip-motor-test', action='store_true',
+                        help="Skip the firmware's power-on motor test")
+    parser.add_argument('--virtual', action='store_true',
+                        help='Validate the firmware model on a virtual clock instead of hardware')
     
     args = parser.parse_args()
     
-    validator = TactValidator(port=args.port, baud_rate=args.baud)
+    clock, transport = SYSTEM_CLOCK, None
+    if args.virtual:
+        clock = VirtualClock()
+        transport = InMemoryTransport(clock)
+    
+    validator = TactValidator(port=args.port, baud_rate=args.baud, measure_latency=args.latency,
+                              skip_motor_test=args.skip_motor_test, clock=clock, transport=transport)
     
     try:
         success = validator.run_full_validation()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tact Contact Tracker Tests
+
+Checks the hysteresis edges, and that the tracker's mirror of the firmware
+contact state matches the firmware reference fed the same wire messages.
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent / 'host-app'))
+
+from tact_clock import VirtualClock
+from tact_contact import ContactTracker
+from tact_firmware_reference import TactFirmwareReference
+from tact_protocol import encode_csv_event, encode_csv_frame
+
+
+class HysteresisTests(unittest.TestCase):
+    def test_edges(self):
+        tracker = ContactTracker(4, on_threshold=0.1, off_threshold=0.05)
+        depths = [0.0, 0.2, 0.08, 0.12, 0.04, 0.07, 0.1, 0.0]
+        flags = [tracker.update(0, depth) for depth in depths]
+        # 0.08 and 0.12 stay in contact; 0.07 after leaving is not enough to re-enter
+        self.assertEqual(flags, [False, True, False, False, False, False, True, False])
+        self.assertEqual(tracker.edges, 2)
+
+    def test_explicit_flags_are_dropped_when_ignored(self):
+        tracker = ContactTracker(4)
+        self.assertTrue(tracker.update(0, 0.5, True))
+        self.assertFalse(tracker.update(0, 0.6, True))   # already in contact on the device
+        self.assertFalse(tracker.update(1, 0.05, True))  # zeroed by the firmware threshold
+        self.assertEqual(tracker.suppressed, 2)
+
+    def test_flag_on_a_depth_that_rounds_up_lands(self):
+        tracker = ContactTracker(4)
+        self.assertTrue(tracker.update(0, 0.096, True))
+        self.assertEqual(tracker.device_contact[0], True)
+
+    def test_thresholds_must_be_ordered(self):
+        with self.assertRaises(ValueError):
+            ContactTracker(4, on_threshold=0.05, off_threshold=0.1)
+
+    def test_vectorized_frames_match_scalar(self):
+        rng = np.random.default_rng(1)
+        depths = rng.choice([0.0, 0.04, 0.06, 0.094, 0.095, 0.096, 0.1, 0.3], (2000, 4))
+        explicit = rng.integers(0, 16, 2000)
+        for first_contact in (None, explicit):
+            vectorized, scalar = ContactTracker(4), ContactTracker(4)
+            # Two blocks, so the state has to carry over between them
+            masks = []
+            for block in (slice(0, 700), slice(700, None)):
+                block_masks = None if first_contact is None else first_contact[block]
+                masks += vectorized.update_frames(depths[block], block_masks).tolist()
+            expected = []
+            for index, row in enumerate(depths):
+                mask = None if first_contact is None else int(first_contact[index])
+                expected.append(scalar.update_frame(row.tolist(), mask))
+            self.assertEqual(masks, expected)
+            self.assertEqual((vectorized.edges, vectorized.suppressed), (scalar.edges, scalar.suppressed))
+            self.assertEqual(vectorized.in_contact, scalar.in_contact)
+            self.assertEqual(vectorized.device_contact, scalar.device_contact)
+
+
+class FirmwareMirrorTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = VirtualClock()
+        self.firmware = TactFirmwareReference(self.clock.monotonic)
+        self.tracker = ContactTracker(4)
+
+    def pulses(self) -> int:
+        count = sum(line.startswith("First contact pulse") for line in self.firmware.output)
+        self.firmware.output.clear()
+        return count
+
+    def test_events(self):
+        rng = np.random.default_rng(2)
+        for _ in range(3000):
+            actuator_id = int(rng.integers(0, 4))
+            depth = float(rng.choice([0.0, 0.03, 0.094, 0.0949, 0.095, 0.099, 0.1, 0.5, 1.2]))
+            requested = [None, True, False][int(rng.integers(0, 3))]
+            flag = self.tracker.update(actuator_id, depth, requested)
+            self.firmware.feed(encode_csv_event(actuator_id, depth, flag))
+            # Every flag sent starts a pulse, and the mirror follows the device
+            self.assertEqual(self.pulses(), int(flag))
+            self.assertEqual(self.tracker.device_contact[actuator_id],
+                             self.firmware.previous_contact[actuator_id])
+
+    def test_frames(self):
+        rng = np.random.default_rng(3)
+        for _ in range(1000):
+            depths = rng.choice([0.0, 0.04, 0.0949, 0.095, 0.2, 0.7], 4).tolist()
+            mask = self.tracker.update_frame(depths)
+            self.firmware.feed(encode_csv_frame(depths, mask))
+            self.assertEqual(self.pulses(), bin(mask).count('1'))
+            self.assertEqual(self.tracker.device_contact, self.firmware.previous_contact)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Tact Frame Streaming Tests
+
+Checks the vectorized frame encoding against MessageEncoder.frame(), the
+chunked FrameStream, and that play_frames() puts the same bytes on the wire
+as sending the rows one by one with send_frame().
+"""
+
+import contextlib
+import io
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent / 'host-app'))
+
+from tact_clock import VirtualClock
+from tact_contact import ContactTracker
+from tact_frame_stream import FrameStream, encode_frames, load_frames, quantize_frames
+from tact_host_simulator import TactHostSimulator
+from tact_protocol import (DEPTH_STEPS, NUM_MOTORS, PROTOCOL_BINARY, PROTOCOL_CSV, MessageEncoder,
+                           quantize_depth)
+from tact_transport import InMemoryTransport
+
+MODES = (PROTOCOL_CSV, PROTOCOL_BINARY)
+
+
+def random_frames(rows: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    frames = rng.uniform(-0.2, 1.2, (rows, NUM_MOTORS))
+    frames[rng.random((rows, NUM_MOTORS)) < 0.3] = 0.0
+    return frames
+
+
+class EncodeTests(unittest.TestCase):
+    def test_quantize_matches_scalar(self):
+        frames = random_frames(2000)
+        expected = [[quantize_depth(depth) for depth in row] for row in frames.tolist()]
+        self.assertEqual(quantize_frames(frames).tolist(), expected)
+
+    def test_encoded_rows_match_encoder(self):
+        frames = random_frames(500)
+        depths_q = quantize_frames(frames)
+        masks = np.random.default_rng(1).integers(0, 16, len(frames)).astype(np.uint8)
+        for mode in MODES:
+            encoder = MessageEncoder(mode, NUM_MOTORS)
+            buffer, offsets = encode_frames(mode, depths_q, masks)
+            self.assertEqual(offsets[-1], len(buffer))
+            for row in range(len(frames)):
+                expected = encoder.frame((depths_q[row] / DEPTH_STEPS).tolist(), int(masks[row]))
+                self.assertEqual(buffer[offsets[row]:offsets[row + 1]].tobytes(), expected)
+
+
+class LoadTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_npy_files_are_memory_mapped(self):
+        path = self.directory / 'frames.npy'
+        np.save(path, random_frames(100).astype(np.float32))
+        frames = load_frames(str(path))
+        self.assertIsInstance(frames, np.memmap)
+        self.assertEqual(frames.shape, (100, NUM_MOTORS))
+
+    def test_invalid_frames(self):
+        for frames in (np.zeros((5, NUM_MOTORS - 1)), np.zeros(NUM_MOTORS), np.array([['a'] * NUM_MOTORS]),
+                       np.array([[0.0, np.nan, 0.0, 0.0]]), np.array([[0.0, 0.0, np.inf, 0.0]])):
+            with self.assertRaises(ValueError):
+                load_frames(frames)
+
+
+class StreamTests(unittest.TestCase):
+    def test_skipped_rows_carry_first_contacts(self):
+        frames = random_frames(1000, seed=2)
+        all_masks = ContactTracker(NUM_MOTORS).update_frames(quantize_frames(frames) / DEPTH_STEPS)
+        encoder = MessageEncoder(PROTOCOL_CSV, NUM_MOTORS)
+        stream = FrameStream(frames, encoder, ContactTracker(NUM_MOTORS), chunk_size=64)
+        rows = sorted(np.random.default_rng(3).choice(len(frames), 300, replace=False).tolist())
+        previous = 0
+        for row in rows:
+            message, mask = stream.message(row)
+            self.assertEqual(mask, int(np.bitwise_or.reduce(all_masks[previous:row + 1])))
+            self.assertEqual(bytes(message), encoder.frame(stream.depths(row), mask))
+            previous = row + 1
+
+    def test_first_contact_length_is_checked(self):
+        with self.assertRaises(ValueError):
+            FrameStream(np.zeros((3, NUM_MOTORS)), MessageEncoder(PROTOCOL_CSV, NUM_MOTORS),
+                        ContactTracker(NUM_MOTORS), first_contact=np.zeros(2, dtype=np.uint8))
+
+
+class PlayFramesTests(unittest.TestCase):
+    def run_session(self, binary: bool, ack: bool, frames: np.ndarray, bulk: bool):
+        clock = VirtualClock()
+        transport = InMemoryTransport(clock)
+        simulator = TactHostSimulator(binary=binary, ack_mode=ack, skip_motor_test=True, clock=clock,
+                                      transport=transport, suppress_unchanged=False)
+        writes = []
+        write = transport.write
+        transport.write = lambda data: writes.append(bytes(data)) or write(data)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(simulator.connect())
+        try:
+            start = len(writes)
+            if bulk:
+                sent = simulator.play_frames(frames, 20)
+            else:
+                sent = sum(simulator.send_frame(row) for row in frames.tolist())
+                simulator.release_all()
+            clock.sleep(0.2)
+            return sent, b"".join(writes[start:]), list(transport.firmware.pwm)
+        finally:
+            with contextlib.redirect_stdout(io.StringIO()):
+                simulator.disconnect()
+
+    def test_same_bytes_as_send_frame(self):
+        frames = random_frames(300, seed=4)
+        for binary in (False, True):
+            for ack in (False, True):
+                bulk = self.run_session(binary, ack, frames, True)
+                single = self.run_session(binary, ack, frames, False)
+                self.assertEqual(bulk[0], len(frames))
+                self.assertEqual(bulk, single, (binary, ack))
+
+
+if __name__ == '__main__':
+    unittest.main()
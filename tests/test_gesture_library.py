@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tact Gesture Library Tests
+
+Checks gesture file parsing, keyframe interpolation, loop unrolling and the
+compiled-table disk cache (including recovery from a corrupt cache file).
+"""
+
+import json
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent / 'host-app'))
+
+from tact_gesture_library import DEFAULT_LIBRARY_DIR, GestureLibrary, compile_spec, parse_gesture
+
+
+def gesture(interpolation: str = 'linear', **extra) -> str:
+    data = {"interpolation": interpolation,
+            "motors": {"0": [{"t": 0.0, "depth": 0.0}, {"t": 0.5, "depth": 1.0, "contact": True},
+                             {"t": 1.0, "depth": 0.0}]}}
+    data.update(extra)
+    return json.dumps(data)
+
+
+class ParseTests(unittest.TestCase):
+    def test_defaults_and_clamping(self):
+        text = json.dumps({"motors": {"2": [{"t": 0.3, "depth": 1.5}, {"t": 0.1, "depth": -1}]}})
+        spec = parse_gesture('g', text)
+        self.assertEqual(spec.interpolation, 'linear')
+        self.assertEqual(spec.duration, 0.3)
+        self.assertEqual([(key.time, key.depth) for key in spec.motors[2]], [(0.1, 0.0), (0.3, 1.0)])
+
+    def test_invalid_files(self):
+        for text in ('not json', gesture('cubic'), json.dumps({"motors": {"4": [{"t": 0, "depth": 1}]}}),
+                     json.dumps({"motors": {"0": []}}), gesture(loop={"start": 0.8, "end": 0.2})):
+            with self.assertRaises(ValueError):
+                parse_gesture('bad', text)
+
+
+class CompileTests(unittest.TestCase):
+    def test_linear(self):
+        table = compile_spec(parse_gesture('g', gesture('linear')), rate=4)
+        np.testing.assert_allclose(table.depths[:, 0], [0.0, 0.5, 1.0, 0.5])
+        self.assertEqual(table.first_contact.tolist(), [0, 0, 1, 0])
+
+    def test_step(self):
+        table = compile_spec(parse_gesture('g', gesture('step')), rate=4)
+        np.testing.assert_allclose(table.depths[:, 0], [0.0, 0.0, 1.0, 1.0])
+
+    def test_smooth_eases_between_keyframes(self):
+        table = compile_spec(parse_gesture('g', gesture('smooth')), rate=8)
+        np.testing.assert_allclose(table.depths[:5, 0], [0.0, 0.1464466, 0.5, 0.8535534, 1.0], atol=1e-6)
+
+    def test_loop_is_unrolled(self):
+        spec = parse_gesture('g', gesture('step', loop={"start": 0.5, "end": 1.0, "count": 3}))
+        table = compile_spec(spec, rate=4)
+        np.testing.assert_allclose(table.depths[:, 0], [0.0, 0.0] + [1.0, 1.0] * 3)
+        self.assertEqual(table.first_contact.tolist(), [0, 0, 1, 0, 1, 0, 1, 0])
+
+
+class LibraryTests(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_bundled_gestures_compile(self):
+        library = GestureLibrary(DEFAULT_LIBRARY_DIR, cache_dir=None)
+        self.assertTrue(library.names())
+        for name in library.names():
+            table = library.compile(name)
+            self.assertGreater(len(table), 0)
+            self.assertIs(library.compile(name), table)
+
+    def test_disk_cache_is_reused(self):
+        name = GestureLibrary(DEFAULT_LIBRARY_DIR, cache_dir=None).names()[0]
+        first = GestureLibrary(DEFAULT_LIBRARY_DIR, cache_dir=self.cache_dir)
+        first.compile(name)
+        second = GestureLibrary(DEFAULT_LIBRARY_DIR, cache_dir=self.cache_dir)
+        np.testing.assert_array_equal(second.compile(name).depths, first.compile(name).depths)
+        self.assertEqual((second.compiled, second.disk_hits), (0, 1))
+
+    def test_corrupt_cache_is_recompiled(self):
+        name = GestureLibrary(DEFAULT_LIBRARY_DIR, cache_dir=None).names()[0]
+        GestureLibrary(DEFAULT_LIBRARY_DIR, cache_dir=self.cache_dir).compile(name)
+        for damage in (lambda data: data[:len(data) // 2], lambda data: b'PK\x03\x04' + bytes(16)):
+            for path in self.cache_dir.glob('*.npz'):
+                path.write_bytes(damage(path.read_bytes()))
+            library = GestureLibrary(DEFAULT_LIBRARY_DIR, cache_dir=self.cache_dir)
+            library.compile(name)
+            self.assertEqual(library.compiled, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
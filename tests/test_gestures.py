@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tact Gesture Compiler Tests
+
+Checks the vectorized gesture tables against per-step reference loops and the
+table cache's memoization. Runs without hardware:
+
+    python -m unittest discover tests
+"""
+
+import math
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent / 'host-app'))
+
+from tact_gestures import GestureCompiler, compile_pat, compile_poke, compile_squeeze, compile_stroke
+
+
+class GestureTableTests(unittest.TestCase):
+    def test_stroke_matches_reference(self):
+        steps, intensity = 40, 0.6
+        table = compile_stroke(steps, intensity)
+        for step in range(steps):
+            phase = step / steps * 2 * math.pi
+            expected = [intensity * (0.5 + 0.5 * abs(math.sin(phase + motor_id * math.pi / 2)))
+                        for motor_id in range(4)]
+            np.testing.assert_allclose(table.depths[step], expected, atol=1e-6)
+        self.assertEqual(table.first_contact.tolist(), [0b0001] + [0] * (steps - 1))
+
+    def test_squeeze_matches_reference(self):
+        steps, max_intensity = 30, 0.7
+        table = compile_squeeze(steps, max_intensity)
+        for step in range(steps):
+            if step < steps // 2:
+                expected = step / (steps // 2) * max_intensity
+            else:
+                expected = (steps - step) / (steps // 2) * max_intensity
+            np.testing.assert_allclose(table.depths[step], [expected] * 4, atol=1e-6)
+        self.assertEqual(table.first_contact[0], 0b1111)
+        self.assertFalse(table.first_contact[1:].any())
+
+    def test_single_motor_gestures(self):
+        pat = compile_pat(1, 0.8, rate=20)
+        np.testing.assert_allclose(pat.depths[:, 1], [0.8, 0.8, 0.56, 0.56, 0.32, 0.32], atol=1e-6)
+        self.assertEqual(pat.motor_mask(), 0b0010)
+        poke = compile_poke(2, 0.9, rate=20)
+        self.assertEqual(len(poke), 1)
+        self.assertEqual(poke.first_contact.tolist(), [0b0100])
+
+    def test_scaled_clamps_to_one(self):
+        table = compile_squeeze(10, 0.8).scaled(2.0)
+        self.assertLessEqual(float(table.depths.max()), 1.0)
+
+
+class GestureCompilerTests(unittest.TestCase):
+    def test_tables_are_memoized_and_read_only(self):
+        compiler = GestureCompiler(max_entries=2)
+        table = compiler.compile('stroke', 2.0, 0.6)
+        self.assertIs(compiler.compile('stroke', 2.0, 0.6), table)
+        self.assertEqual((compiler.hits, compiler.misses), (1, 1))
+        with self.assertRaises(ValueError):
+            table.depths[0, 0] = 1.0
+
+    def test_least_recently_used_table_is_evicted(self):
+        compiler = GestureCompiler(max_entries=2)
+        stroke = compiler.compile('stroke', 1.0, 0.5)
+        compiler.compile('squeeze', 1.0, 0.5)
+        compiler.compile('stroke', 1.0, 0.5)
+        compiler.compile('squeeze', 2.0, 0.5)   # evicts squeeze 1.0
+        self.assertIs(compiler.compile('stroke', 1.0, 0.5), stroke)
+        self.assertEqual(compiler.misses, 3)
+        compiler.compile('squeeze', 1.0, 0.5)
+        self.assertEqual(compiler.misses, 4)
+
+    def test_unknown_gesture(self):
+        with self.assertRaises(ValueError):
+            GestureCompiler().compile('wave', 1.0, 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tact Contact Ingestion Tests
+
+Checks window aggregation and that the ingestor sends one frame per device
+tick on a virtual clock.
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / 'host-app'))
+
+from tact_clock import VirtualClock
+from tact_ingest import AGGREGATE_LAST, AGGREGATE_MAX, AGGREGATE_MEAN, ContactAggregator, ContactIngestor
+
+
+class AggregatorTests(unittest.TestCase):
+    def aggregate(self, mode: str):
+        aggregator = ContactAggregator(4, mode)
+        for depth in (0.2, 0.8, 0.5):
+            aggregator.submit(0, depth)
+        aggregator.submit(1, 0.3)
+        return aggregator.close_window()
+
+    def test_modes(self):
+        self.assertEqual(self.aggregate(AGGREGATE_MAX)[0][:2], [0.8, 0.3])
+        self.assertEqual(self.aggregate(AGGREGATE_LAST)[0][:2], [0.5, 0.3])
+        mean, _ = self.aggregate(AGGREGATE_MEAN)
+        self.assertAlmostEqual(mean[0], 0.5)
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            ContactAggregator(4, 'median')
+
+    def test_empty_window_keeps_last_depth(self):
+        aggregator = ContactAggregator(4, AGGREGATE_MAX)
+        aggregator.submit(2, 0.9)
+        aggregator.submit(2, 0.4)
+        aggregator.close_window()
+        depths, first_contact = aggregator.close_window()
+        self.assertEqual(depths, [0.0, 0.0, 0.4, 0.0])
+        self.assertIsNone(first_contact)
+
+    def test_explicit_flags_are_carried_into_the_window(self):
+        aggregator = ContactAggregator(4)
+        aggregator.submit(1, 0.5, True)
+        aggregator.submit(1, 0.6)
+        aggregator.submit(3, 0.5, False)
+        self.assertEqual(aggregator.close_window()[1], 0b0010)
+        self.assertIsNone(aggregator.close_window()[1])
+
+    def test_active(self):
+        aggregator = ContactAggregator(4)
+        self.assertFalse(aggregator.active)
+        aggregator.submit(0, 0.5)
+        aggregator.close_window()
+        self.assertTrue(aggregator.active)  # still holding a depth
+        aggregator.submit(0, 0.0)
+        aggregator.close_window()
+        self.assertFalse(aggregator.active)
+
+
+class IngestorTests(unittest.TestCase):
+    def test_one_frame_per_tick_in_virtual_time(self):
+        clock = VirtualClock()
+        frames = []
+        ingestor = ContactIngestor(lambda depths, mask: frames.append((clock.monotonic(), depths)),
+                                   4, AGGREGATE_MAX, 0.033, clock)
+        ingestor.start()
+        # 120 Hz samples for half a second, then release
+        for index in range(60):
+            ingestor.submit(0, 0.5 if index % 12 == 0 else 0.1)
+            clock.sleep(1 / 120)
+        ingestor.submit(0, 0.0)
+        clock.sleep(0.2)
+        ingestor.stop()
+
+        self.assertEqual(ingestor.aggregator.samples, 61)
+        self.assertEqual(len(frames), ingestor.frames_sent)
+        self.assertLessEqual(len(frames), int(0.7 / 0.033) + 1)
+        intervals = [later[0] - earlier[0] for earlier, later in zip(frames, frames[1:])]
+        for interval in intervals:
+            self.assertAlmostEqual(interval, 0.033, places=6)
+        # Max-hold keeps every tap, and nothing is sent once released
+        self.assertEqual(sum(1 for _, depths in frames if depths[0] == 0.5), 5)
+        self.assertEqual(frames[-1][1], [0.0] * 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
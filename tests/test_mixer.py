@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Tact Gesture Mixer Tests
+
+Checks how overlapping voices are blended into one frame per tick, and how
+gestures are cancelled, preempted and waited for on a virtual clock.
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent / 'host-app'))
+
+from tact_clock import VirtualClock
+from tact_gestures import GestureTable
+from tact_mixer import (BLEND_MAX, BLEND_PRIORITY, BLEND_SUM, VOICE_CANCELLED, VOICE_DONE, VOICE_PREEMPTED,
+                        GestureHandle, GestureMixer, GesturePlayer)
+
+
+def constant_table(depths, ticks: int, first_contact: int = 0) -> GestureTable:
+    """A table holding the same row for every tick, with first contacts on tick 0."""
+    mask = np.zeros(ticks, dtype=np.uint8)
+    mask[0] = first_contact
+    return GestureTable(np.tile(np.asarray(depths, dtype=np.float32), (ticks, 1)), mask)
+
+
+class BlendTests(unittest.TestCase):
+    def mix_two(self, blend: str):
+        mixer = GestureMixer(4, blend)
+        mixer.add('low', constant_table([0.5, 0.25, 0.0, 0.0], 2), priority=1)
+        mixer.add('high', constant_table([0.25, 0.5, 0.75, 0.0], 2), priority=0)
+        depths, _ = mixer.mix()
+        return depths
+
+    def test_max(self):
+        self.assertEqual(self.mix_two(BLEND_MAX), [0.5, 0.5, 0.75, 0.0])
+
+    def test_sum_clamps_to_full_depth(self):
+        mixer = GestureMixer(4, BLEND_SUM)
+        mixer.add('a', constant_table([0.5, 0.75, 0.0, 0.0], 1))
+        mixer.add('b', constant_table([0.25, 0.5, 0.0, 0.0], 1))
+        depths, _ = mixer.mix()
+        self.assertEqual(depths, [0.75, 1.0, 0.0, 0.0])
+
+    def test_priority_follows_highest_voice(self):
+        self.assertEqual(self.mix_two(BLEND_PRIORITY), [0.5, 0.25, 0.0, 0.0])
+
+    def test_voice_only_drives_its_motors(self):
+        mixer = GestureMixer(4)
+        mixer.add('masked', constant_table([0.5] * 4, 1), motor_mask=0b0101)
+        depths, _ = mixer.mix()
+        self.assertEqual(depths, [0.5, 0.0, 0.5, 0.0])
+
+    def test_unknown_blend(self):
+        with self.assertRaises(ValueError):
+            GestureMixer(4, 'average')
+
+
+class TimelineTests(unittest.TestCase):
+    def test_release_frame_then_idle(self):
+        mixer = GestureMixer(4)
+        mixer.add('short', constant_table([0.5] * 4, 2, first_contact=0b1111))
+        self.assertEqual(mixer.mix(), ([0.5] * 4, 0b1111))
+        self.assertEqual(mixer.mix(), ([0.5] * 4, 0))
+        self.assertEqual(mixer.mix(), ([0.0] * 4, 0))
+        self.assertIsNone(mixer.mix())
+        self.assertTrue(mixer.idle)
+
+    def test_delayed_start(self):
+        mixer = GestureMixer(4)
+        mixer.add('later', constant_table([0.5] * 4, 1), start_tick=2)
+        self.assertIsNone(mixer.mix())
+        self.assertIsNone(mixer.mix())
+        self.assertEqual(mixer.mix(), ([0.5] * 4, 0))
+
+    def test_skipped_ticks_keep_first_contacts(self):
+        mixer = GestureMixer(4)
+        mixer.add('tap', constant_table([0.5, 0.0, 0.0, 0.0], 4, first_contact=0b0001))
+        _, first_contact = mixer.mix(2)
+        self.assertEqual(first_contact, 0b0001)
+        self.assertEqual(mixer.tick, 3)
+
+    def test_held_touch_overrides_voices(self):
+        mixer = GestureMixer(4)
+        mixer.add('wave', constant_table([0.5] * 4, 3, first_contact=0b1111))
+        mixer.hold(1, 0.25)
+        depths, first_contact = mixer.mix()
+        self.assertEqual(depths, [0.5, 0.25, 0.5, 0.5])
+        self.assertEqual(first_contact, 0b1101)
+
+
+class HandleTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = VirtualClock()
+        self.frames = []
+        self.mixer = GestureMixer(4)
+        self.player = GesturePlayer(self.mixer, lambda depths, mask: self.frames.append((depths, mask)),
+                                    0.05, self.clock, threaded=False)
+
+    def start(self, name: str, table: GestureTable, **kwargs) -> GestureHandle:
+        return GestureHandle(self.mixer.add(name, table, **kwargs), self.mixer, self.player)
+
+    def test_wait_plays_to_the_end_in_virtual_time(self):
+        handle = self.start('wave', constant_table([0.5] * 4, 10))
+        self.assertTrue(handle.wait())
+        self.assertEqual(handle.state, VOICE_DONE)
+        self.assertEqual(handle.progress, 1.0)
+        # Ten gesture frames, then the release frame on the tick the voice ends
+        self.assertEqual(len(self.frames), 11)
+        self.assertEqual(self.frames[-1], ([0.0] * 4, 0))
+        self.assertAlmostEqual(self.clock.monotonic(), 0.5, places=6)
+
+    def test_wait_timeout(self):
+        handle = self.start('wave', constant_table([0.5] * 4, 100))
+        self.assertFalse(handle.wait(timeout=0.2))
+        self.assertFalse(handle.done)
+        self.assertGreater(handle.progress, 0.0)
+
+    def test_cancel_releases_motors_on_next_frame(self):
+        handle = self.start('wave', constant_table([0.5] * 4, 10))
+        self.mixer.mix()
+        self.assertTrue(handle.cancel())
+        self.assertFalse(handle.cancel())
+        self.assertEqual(handle.state, VOICE_CANCELLED)
+        self.assertEqual(self.mixer.mix(), ([0.0] * 4, 0))
+        self.assertIsNone(self.mixer.mix())
+
+    def test_preempt_takes_motors_from_lower_priority(self):
+        background = self.start('ambient', constant_table([0.25] * 4, 10), priority=0)
+        foreground = self.start('alert', constant_table([0.75, 0.75, 0.0, 0.0], 10), priority=5,
+                                motor_mask=0b0011, preempt=True)
+        depths, _ = self.mixer.mix()
+        self.assertEqual(depths, [0.75, 0.75, 0.25, 0.25])
+        self.assertEqual(background.voice.motor_mask, 0b1100)
+
+        affected = self.mixer.preempt(0b1111, 10)
+        self.assertEqual(affected, [background.voice, foreground.voice])
+        self.assertEqual(background.state, VOICE_PREEMPTED)
+        self.assertEqual(foreground.state, VOICE_PREEMPTED)
+
+    def test_equal_priority_is_not_preempted(self):
+        background = self.start('ambient', constant_table([0.25] * 4, 10), priority=3)
+        self.assertEqual(self.mixer.preempt(0b1111, 3), [])
+        self.assertEqual(background.voice.motor_mask, 0b1111)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Tact Protocol Encoder Tests
+
+Checks that the table-driven MessageEncoder produces exactly the bytes of
+encode_event() and encode_frame() for every input, including out-of-range and
+non-finite depths, and that the firmware reference accepts its output and
+resynchronises on binary messages after stray bytes.
+"""
+
+import math
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent / 'host-app'))
+
+from tact_clock import VirtualClock
+from tact_firmware_reference import TactFirmwareReference
+from tact_protocol import (DEPTH_STEPS, MAX_INPUT_LENGTH, NUM_MOTORS, PROTOCOL_BINARY, PROTOCOL_CSV,
+                           MessageEncoder, encode_event, encode_frame)
+
+MODES = (PROTOCOL_CSV, PROTOCOL_BINARY)
+
+
+def sample_depths():
+    """Every wire step, both sides of every rounding boundary, and out-of-range values."""
+    steps = np.arange(DEPTH_STEPS + 1) / DEPTH_STEPS
+    boundaries = (np.arange(DEPTH_STEPS) + 0.5) / DEPTH_STEPS
+    around = [np.nextafter(boundaries, 0), np.nextafter(boundaries, 1)]
+    noise = np.random.default_rng(0).uniform(-0.5, 1.5, 500)
+    depths = np.concatenate([steps, boundaries, *around, noise]).tolist()
+    return depths + [-1e300, 1e300, math.inf, -math.inf, math.nan, -0.0]
+
+
+class EncoderTests(unittest.TestCase):
+    def test_events_match_encode_event(self):
+        for mode in MODES:
+            encoder = MessageEncoder(mode, NUM_MOTORS)
+            for depth in sample_depths():
+                for actuator_id in range(NUM_MOTORS):
+                    for first_contact in (False, True):
+                        self.assertEqual(encoder.event(actuator_id, depth, first_contact),
+                                         encode_event(mode, actuator_id, depth, first_contact),
+                                         (mode, actuator_id, depth, first_contact))
+
+    def test_frames_match_encode_frame(self):
+        rng = np.random.default_rng(1)
+        depths = sample_depths()
+        for mode in MODES:
+            encoder = MessageEncoder(mode, NUM_MOTORS)
+            for _ in range(2000):
+                frame = [depths[index] for index in rng.integers(0, len(depths), NUM_MOTORS)]
+                mask = int(rng.integers(0, 0x20))
+                self.assertEqual(encoder.frame(frame, mask), encode_frame(mode, frame, mask),
+                                 (mode, frame, mask))
+
+    def test_sequence_numbers(self):
+        for mode in MODES:
+            encoder = MessageEncoder(mode, NUM_MOTORS)
+            self.assertEqual(encoder.event(2, 0.5, True, 7), encode_event(mode, 2, 0.5, True, 7))
+            frame = [0.1, 0.2, 0.3, 0.4]
+            self.assertEqual(encoder.frame(frame, 3, 7), encode_frame(mode, frame, 3, 7))
+
+    def test_batch_reuses_one_buffer(self):
+        events = [(0, 0.5, True), (3, 0.25, False), (1, math.inf, False)]
+        for mode in MODES:
+            encoder = MessageEncoder(mode, NUM_MOTORS)
+            batch = encoder.batch(events)
+            self.assertEqual(bytes(batch), b"".join(encode_event(mode, *event) for event in events))
+            self.assertIs(encoder.batch(events[:1]), batch)
+            self.assertEqual(bytes(batch), encode_event(mode, *events[0]))
+
+    def test_invalid_input(self):
+        encoder = MessageEncoder(PROTOCOL_CSV, NUM_MOTORS)
+        with self.assertRaises(ValueError):
+            encoder.event(NUM_MOTORS, 0.5, False)
+        with self.assertRaises(ValueError):
+            encoder.frame([0.5] * (NUM_MOTORS - 1), 0)
+
+    def test_firmware_applies_encoded_frames(self):
+        for mode in MODES:
+            firmware = TactFirmwareReference(VirtualClock().monotonic)
+            firmware.binary_mode = mode == PROTOCOL_BINARY
+            firmware.feed(MessageEncoder(mode, NUM_MOTORS).frame([0.0, 0.5, 1.0, math.nan], 0))
+            self.assertEqual(firmware.pwm[0], 0)
+            self.assertGreater(firmware.pwm[1], 0)
+            self.assertEqual(firmware.pwm[2], firmware.pwm[3])
+
+    def test_firmware_resyncs_after_stray_bytes(self):
+        encoder = MessageEncoder(PROTOCOL_BINARY, NUM_MOTORS)
+        firmware = TactFirmwareReference(VirtualClock().monotonic)
+        firmware.binary_mode = True
+        firmware.feed(b"\x13junk" + encoder.frame([0.5, 0.0, 0.0, 0.0], 0) + encoder.event(3, 0.8, False))
+        self.assertGreater(firmware.pwm[0], 0)
+        self.assertGreater(firmware.pwm[3], 0)
+        self.assertFalse(firmware.input_buffer)
+        self.assertNotIn("Error: Invalid message format", firmware.output)
+
+    def test_firmware_drops_overlong_lines(self):
+        firmware = TactFirmwareReference(VirtualClock().monotonic)
+        firmware.feed(b"9" * (MAX_INPUT_LENGTH * 4) + b"\n" + encode_event(PROTOCOL_CSV, 1, 0.5, False))
+        self.assertEqual(len(firmware.output), 1)
+        self.assertEqual(firmware.output[0], "Error: Message too long")
+        self.assertGreater(firmware.pwm[1], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Tact Session Recorder Tests
+
+Checks that a recorded session replays the same bytes on its original
+schedule, the header check, and that reopening a recording cut short by a
+crash trims the partial record and starts a new session.
+"""
+
+import contextlib
+import io
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / 'host-app'))
+
+from tact_clock import VirtualClock
+from tact_host_simulator import TactHostSimulator
+from tact_recorder import (HEADER_SIZE, RECORD_EVENT, RECORD_FRAME, RECORD_SESSION, RECORD_SIZE,
+                           SessionRecorder, SessionReplayer, check_header, repair_recording)
+from tact_transport import InMemoryTransport
+
+
+class Session:
+    """A virtual-mode simulator that keeps every write with its send time."""
+
+    def __init__(self):
+        self.clock = VirtualClock()
+        self.transport = InMemoryTransport(self.clock)
+        self.simulator = TactHostSimulator(skip_motor_test=True, clock=self.clock, transport=self.transport,
+                                           suppress_unchanged=False)
+        self.writes = []
+        write = self.transport.write
+
+        def timed_write(data):
+            self.writes.append((self.clock.monotonic(), bytes(data)))
+            return write(data)
+        self.transport.write = timed_write
+
+    def __enter__(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert self.simulator.connect()
+        self.start = len(self.writes)
+        return self
+
+    def __exit__(self, *exc_info):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.simulator.disconnect()
+
+    def sent(self):
+        """Writes since connecting, with times relative to the first."""
+        writes = self.writes[self.start:]
+        return [(round(when - writes[0][0], 6), data) for when, data in writes]
+
+
+def play(simulator, clock):
+    simulator.send_touch_event(0, 0.5, True)
+    clock.sleep(0.25)
+    simulator.send_frame([0.2, 0.4, 0.0, 0.9], 0b1000)
+    clock.sleep(0.5)
+    simulator.send_frame([0.0] * 4)
+
+
+class RecorderTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.path = self.directory / 'session.tactrec'
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def record(self):
+        with contextlib.redirect_stdout(io.StringIO()), Session() as session:
+            session.simulator.start_recording(str(self.path))
+            play(session.simulator, session.clock)
+            session.simulator.stop_recording()
+        return session.sent()
+
+    def replay(self, speed=1.0):
+        with Session() as session:
+            replayer = SessionReplayer(self.path)
+            sent = replayer.replay(session.simulator, speed)
+        return sent, session.sent()
+
+    def test_round_trip(self):
+        recorded = self.record()
+        replayer = SessionReplayer(self.path)
+        self.assertEqual(replayer.records['kind'].tolist(), [RECORD_EVENT, RECORD_FRAME, RECORD_FRAME])
+        self.assertEqual(replayer.info().records, 3)
+        self.assertAlmostEqual(replayer.info().duration, 0.75)
+        self.assertEqual(self.replay(), (3, recorded))
+        sent, writes = self.replay(speed=None)
+        self.assertEqual([data for _, data in writes], [data for _, data in recorded])
+
+    def test_header_is_checked(self):
+        for data in (b'', b'TACTREC1', b'NOTAREC1' + bytes(HEADER_SIZE)):
+            self.path.write_bytes(data)
+            with self.assertRaises(ValueError):
+                check_header(self.path)
+        self.path.write_bytes(b'not a recording')
+        with self.assertRaises(ValueError):
+            SessionRecorder(self.path)
+        self.assertEqual(self.path.read_bytes(), b'not a recording')
+
+    def test_unknown_kind_is_rejected(self):
+        self.record()
+        data = bytearray(self.path.read_bytes())
+        data[HEADER_SIZE + RECORD_SIZE + 8] = 0x80
+        self.path.write_bytes(bytes(data))
+        with Session() as session, self.assertRaises(ValueError):
+            SessionReplayer(self.path).replay(session.simulator, None)
+
+    def test_reopening_a_truncated_file(self):
+        recorded = self.record()
+        self.path.write_bytes(self.path.read_bytes()[:-10])
+        with self.assertRaises(ValueError):
+            SessionReplayer(self.path)
+
+        self.record()
+        replayer = SessionReplayer(self.path)
+        self.assertEqual(replayer.records['kind'].tolist(),
+                         [RECORD_EVENT, RECORD_FRAME, RECORD_SESSION, RECORD_EVENT, RECORD_FRAME, RECORD_FRAME])
+        self.assertEqual(replayer.info().records, 5)
+        self.assertAlmostEqual(replayer.info().duration, 0.25 + 0.75)
+        # The second session starts right after the first; the gap between the runs is not replayed
+        sent, writes = self.replay()
+        self.assertEqual(sent, 5)
+        self.assertEqual(writes[:2], recorded[:2])
+        self.assertEqual([when for when, _ in writes], [0.0, 0.25, 0.25, 0.5, 1.0])
+
+    def test_repair(self):
+        self.record()
+        size = self.path.stat().st_size
+        self.assertEqual(repair_recording(self.path), 0)
+        with open(self.path, 'ab') as recording:
+            recording.write(bytes(RECORD_SIZE - 1))
+        with self.assertLogs('tact', 'WARNING'):
+            self.assertEqual(repair_recording(self.path), RECORD_SIZE - 1)
+        self.assertEqual(self.path.stat().st_size, size)
+
+
+if __name__ == '__main__':
+    unittest.main()
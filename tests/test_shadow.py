@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Tact Device Shadow Tests
+
+Checks which commands the shadow suppresses, and that suppression never
+changes what the motors do: the same session run against the firmware
+reference, with and without suppression, gives the same PWM on every loop.
+"""
+
+import contextlib
+import io
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / 'host-app'))
+
+from tact_clock import VirtualClock
+from tact_firmware_reference import FIRST_CONTACT_AMPLITUDE, TactFirmwareReference
+from tact_host_simulator import TactHostSimulator
+from tact_shadow import DeviceShadow, expected_pwm
+from tact_transport import InMemoryTransport
+
+
+class LoopRecordingFirmware(TactFirmwareReference):
+    """Firmware reference that keeps the PWM output of every loop."""
+
+    def __init__(self, clock):
+        super().__init__(clock)
+        self.timeline = []
+
+    def update_motor_states(self):
+        super().update_motor_states()
+        self.timeline.append(tuple(self.pwm))
+
+
+class ShadowTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = VirtualClock()
+        self.shadow = DeviceShadow(self.clock, 4, keepalive=1.0)
+
+    def test_expected_pwm(self):
+        self.assertEqual(expected_pwm(0.0), 0)
+        self.assertEqual(expected_pwm(0.094), 0)
+        self.assertGreater(expected_pwm(0.095), 0)   # sent as 0.10
+        self.assertEqual(expected_pwm(1.0), expected_pwm(5.0))
+        self.assertEqual(expected_pwm(0.501), expected_pwm(0.499))
+
+    def test_unchanged_events_are_suppressed(self):
+        self.assertTrue(self.shadow.check_event(0, 0.5, False))
+        self.assertFalse(self.shadow.check_event(0, 0.5, False))
+        self.assertFalse(self.shadow.check_event(0, 0.501, False))
+        self.assertTrue(self.shadow.check_event(0, 0.6, False))
+        self.assertTrue(self.shadow.check_event(0, 0.6, False, force=True))
+        self.assertEqual((self.shadow.sent, self.shadow.suppressed), (3, 2))
+
+    def test_keepalive_resends(self):
+        self.shadow.check_event(1, 0.5, False)
+        self.clock.advance(0.9)
+        self.assertFalse(self.shadow.check_event(1, 0.5, False))
+        self.clock.advance(0.1)
+        self.assertTrue(self.shadow.check_event(1, 0.5, False))
+
+        shadow = DeviceShadow(self.clock, 4, keepalive=None)
+        shadow.check_event(1, 0.5, False)
+        self.clock.advance(60.0)
+        self.assertFalse(shadow.check_event(1, 0.5, False))
+
+    def test_first_contact_pulse_is_held(self):
+        self.assertTrue(self.shadow.check_event(2, 0.5, True))
+        self.assertEqual(self.shadow.pwm[2], FIRST_CONTACT_AMPLITUDE)
+        # The firmware ignores depths during the pulse, so the shadow keeps the pulse level
+        self.clock.advance(0.01)
+        self.assertTrue(self.shadow.check_event(2, 0.7, False))
+        self.assertEqual(self.shadow.pwm[2], FIRST_CONTACT_AMPLITUDE)
+        # The first command after the pulse goes out even though its depth was sent before
+        self.clock.advance(0.5)
+        self.assertTrue(self.shadow.check_event(2, 0.7, False))
+        self.assertEqual(self.shadow.pwm[2], expected_pwm(0.7))
+        self.assertFalse(self.shadow.check_event(2, 0.7, False))
+
+    def test_frames_are_sent_or_skipped_whole(self):
+        self.assertTrue(self.shadow.check_frame([0.5, 0.0, 0.0, 0.0], 0))
+        self.assertFalse(self.shadow.check_frame([0.5, 0.0, 0.0, 0.0], 0))
+        self.assertTrue(self.shadow.check_frame([0.5, 0.2, 0.0, 0.0], 0))
+        self.assertTrue(self.shadow.check_frame([0.5, 0.2, 0.0, 0.0], 0b0001))
+
+    def test_forget(self):
+        self.shadow.check_event(3, 0.5, False)
+        self.shadow.forget()
+        self.assertTrue(self.shadow.check_event(3, 0.5, False))
+
+
+class SuppressionTimelineTests(unittest.TestCase):
+    def run_session(self, suppress_unchanged: bool):
+        clock = VirtualClock()
+        firmware = LoopRecordingFirmware(clock.monotonic)
+        simulator = TactHostSimulator(skip_motor_test=True, clock=clock,
+                                      transport=InMemoryTransport(clock, firmware),
+                                      suppress_unchanged=suppress_unchanged)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(simulator.connect())
+        try:
+            simulator.gesture_stroke(1.0, 0.6)
+            simulator.gesture_pat(1)
+            simulator.gesture_poke(2)
+            # A held touch that drifts below wire precision, then a slow contact sweep
+            for step in range(120):
+                simulator.send_touch_event(3, 0.4 + (step // 40) * 0.001)
+                clock.sleep(0.01)
+            for step in range(120):
+                simulator.send_contact(20.0 + step * 0.1, 30.0, 0.5)
+                clock.sleep(0.01)
+            simulator.release_all()
+            clock.sleep(0.5)
+        finally:
+            with contextlib.redirect_stdout(io.StringIO()):
+                simulator.disconnect()
+        return firmware.timeline, simulator
+
+    def test_suppression_keeps_the_pwm_timeline(self):
+        suppressed, simulator = self.run_session(True)
+        unsuppressed, _ = self.run_session(False)
+        self.assertEqual(suppressed, unsuppressed)
+        self.assertGreater(simulator.shadow.suppressed, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
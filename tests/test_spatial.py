@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Tact Spatial Renderer Tests
+
+Checks the energy-model phantom weights and the precomputed weight grid.
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent / 'host-app'))
+
+from tact_spatial import BACK_OF_HAND_LAYOUT, FOREARM_LAYOUT, MOTOR_SPACING, SpatialRenderer, phantom_weights
+
+
+class PhantomWeightTests(unittest.TestCase):
+    def test_energy_sums_to_one(self):
+        rng = np.random.default_rng(0)
+        for layout in (BACK_OF_HAND_LAYOUT, FOREARM_LAYOUT):
+            min_x, min_y, max_x, max_y = layout.bounds()
+            points = rng.uniform([min_x - 10, min_y - 10], [max_x + 10, max_y + 10], (500, 2))
+            weights = phantom_weights(layout, points)
+            np.testing.assert_allclose((weights ** 2).sum(axis=1), 1.0, atol=1e-9)
+
+    def test_motor_position_drives_only_that_motor(self):
+        weights = phantom_weights(BACK_OF_HAND_LAYOUT, BACK_OF_HAND_LAYOUT.positions())
+        np.testing.assert_allclose(weights, np.eye(4), atol=1e-9)
+
+    def test_center_is_symmetric(self):
+        weights = phantom_weights(BACK_OF_HAND_LAYOUT, np.array([BACK_OF_HAND_LAYOUT.center()]))
+        np.testing.assert_allclose(weights[0], [0.5] * 4, atol=1e-9)
+
+    def test_edge_midpoint_uses_its_two_motors(self):
+        weights = phantom_weights(BACK_OF_HAND_LAYOUT, np.array([[MOTOR_SPACING / 2, 0.0]]))
+        np.testing.assert_allclose(weights[0], [np.sqrt(0.5), 0.0, 0.0, np.sqrt(0.5)], atol=1e-9)
+
+    def test_line_layout_interpolates_neighbours(self):
+        weights = phantom_weights(FOREARM_LAYOUT, np.array([[MOTOR_SPACING * 1.25, 0.0]]))
+        np.testing.assert_allclose(weights[0], [0.0, np.sqrt(0.75), np.sqrt(0.25), 0.0], atol=1e-9)
+
+
+class RendererTests(unittest.TestCase):
+    def setUp(self):
+        self.renderer = SpatialRenderer(BACK_OF_HAND_LAYOUT)
+
+    def test_grid_matches_direct_weights(self):
+        x, y = 20.0, 41.0
+        expected = phantom_weights(BACK_OF_HAND_LAYOUT, np.array([[x, y]]))[0] * 0.5
+        np.testing.assert_allclose(self.renderer.render(x, y, 0.5), expected, atol=1e-6)
+
+    def test_path_matches_single_renders(self):
+        xs, ys, depths = [0.0, 31.75, 63.5, 500.0], [0.0, 31.75, 10.0, -500.0], [1.0, 0.6, 0.2, 0.8]
+        path = self.renderer.render_path(xs, ys, depths)
+        for index, point in enumerate(zip(xs, ys, depths)):
+            np.testing.assert_allclose(path[index], self.renderer.render(*point), atol=1e-6)
+
+    def test_grid_is_read_only(self):
+        with self.assertRaises(ValueError):
+            self.renderer.weights[0, 0, 0] = 1.0
+
+
+if __name__ == '__main__':
+    unittest.main()